@@ -1,7 +1,26 @@
 from django.contrib import admin
+from django.db import transaction
+
+from reports.versions import STATIONS_VERSION_KEY, bump_versions
 from .models import StationProfile
 
 @admin.register(StationProfile)
 class StationProfileAdmin(admin.ModelAdmin):
     list_display = ('station_name', 'user')
     search_fields = ('station_name', 'user__username')
+
+    # stansiya nomi/statusi hisobot cache lari va eksport fingerprint iga kiradi
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_versions([STATIONS_VERSION_KEY])
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_versions([STATIONS_VERSION_KEY])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_versions([STATIONS_VERSION_KEY])
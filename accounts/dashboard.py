@@ -0,0 +1,311 @@
+import calendar
+import operator
+from datetime import date, timedelta
+from functools import reduce
+
+from django.contrib.auth.models import User
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from reports.models import TABLE1_METRIC_KEYS, Table1DailyRollup, Table1MonthlyRollup
+from .presence import ONLINE_WINDOW, last_seen_map
+
+
+DASHBOARD_SECTIONS = (
+    "totals",
+    "structure",
+    "incomeMini",
+    "monthly",
+    "monthlyCont",
+    "stations",
+    "dayNightTop",
+    "dayNightTopCont",
+    "online_users",
+)
+
+# KPI kartalari: payload kaliti -> rollup ustuni
+TOTALS_COLUMNS = {
+    "vygr": "vygr_itogo",
+    "pod_vygr": "pod_vygr_itogo",
+    "pogr": "pogr_itogo",
+    "pod_pogr": "pod_pogr_itogo",
+    "vygr_cont": "vygr_cont",
+    "pod_vygr_cont": "pod_vygr_cont",
+    "pod_pogr_cont": "pod_pogr_cont",
+    "pogr_cont": "pogr_cont",
+}
+
+# stations: "pogr*"/"vygr*" bilan boshlanadigan barcha ustunlar (pod_* dan tashqari)
+POGR_COLUMNS = [k for k in TABLE1_METRIC_KEYS if k.startswith("pogr")]
+VYGR_COLUMNS = [k for k in TABLE1_METRIC_KEYS if k.startswith("vygr")]
+
+
+def _columns_sum(columns):
+    return reduce(operator.add, (F(c) for c in columns))
+
+
+def _month_add(d: date, months: int) -> date:
+    y = d.year + (d.month - 1 + months) // 12
+    m = (d.month - 1 + months) % 12 + 1
+    return date(y, m, 1)
+
+
+def _station_name(u: User) -> str:
+    sp = getattr(u, "station_profile", None)
+    if sp and sp.station_name:
+        return sp.station_name
+    return u.username
+
+
+def _station_sums(d_from=None, d_to=None) -> dict:
+    """
+    Kun/tun smenalari (total siz) bo'yicha stansiya kesimidagi barcha kerakli summalar -
+    bitta GROUP BY. totals, top-5 va stansiyalar grafigi shundan hisoblanadi.
+    """
+    qs = Table1DailyRollup.objects.exclude(shift="total")
+    if d_from:
+        qs = qs.filter(date__gte=d_from)
+    if d_to:
+        qs = qs.filter(date__lte=d_to)
+
+    # alias lar ustun nomlari bilan to'qnashmasin (pogr_cont, vygr_cont ...)
+    sums = {
+        **{key: Sum(column) for key, column in TOTALS_COLUMNS.items()},
+        "income": Sum("income_daily"),
+        "st_pogr": Sum(_columns_sum(POGR_COLUMNS)),
+        "st_vygr": Sum(_columns_sum(VYGR_COLUMNS)),
+    }
+    rows = (
+        qs
+        .values("station_user_id")
+        .annotate(**{f"sum_{key}": expr for key, expr in sums.items()})
+        .order_by()
+    )
+
+    return {
+        row["station_user_id"]: {key: int(row[f"sum_{key}"] or 0) for key in sums}
+        for row in rows
+    }
+
+
+def _top5(by_user: dict, score) -> list:
+    return sorted(by_user.items(), key=lambda item: (-score(item[1]), item[0]))[:5]
+
+
+def _day_night_top(top5: list, users: dict, pogr_key: str, vygr_key: str) -> dict:
+    labels, day, night = [], [], []
+    for uid, sums in top5:
+        u = users.get(uid)
+        if not u:
+            continue
+        labels.append(_station_name(u))
+        day.append(sums[pogr_key])
+        night.append(sums[vygr_key])
+    return {"labels": labels, "day": day, "night": night}
+
+
+def _monthly_series(today: date) -> tuple[dict, dict]:
+    this_month_start = today.replace(day=1)
+    six_months_start = _month_add(this_month_start, -5)
+    sums = dict(
+        pogr=Sum("pogr_itogo"),
+        vygr=Sum("vygr_itogo"),
+        pogr_kont=Sum("pogr_cont"),
+        vygr_kont=Sum("vygr_cont"),
+    )
+
+    # yopilgan oylar - oylik rollup dan, joriy oy - bugungacha kunlik rollup dan
+    by_month = {
+        row["month"]: row
+        for row in (
+            Table1MonthlyRollup.objects
+            .filter(month__gte=six_months_start, month__lt=this_month_start)
+            .values("month")
+            .annotate(**sums)
+            .order_by()
+        )
+    }
+    by_month[this_month_start] = (
+        Table1DailyRollup.objects
+        .filter(date__gte=this_month_start, date__lte=today)
+        .aggregate(**sums)
+    )
+
+    labels = []
+    monthly = {"ortish": [], "tushirish": []}
+    monthly_cont = {"ortish": [], "tushirish": []}
+    cur = six_months_start
+    for _ in range(6):
+        row = by_month.get(cur) or {}
+        labels.append(calendar.month_name[cur.month])
+        monthly["ortish"].append(int(row.get("pogr") or 0))
+        monthly["tushirish"].append(int(row.get("vygr") or 0))
+        monthly_cont["ortish"].append(int(row.get("pogr_kont") or 0))
+        monthly_cont["tushirish"].append(int(row.get("vygr_kont") or 0))
+        cur = _month_add(cur, 1)
+
+    return {"labels": labels, **monthly}, {"labels": list(labels), **monthly_cont}
+
+
+def _income_mini(today: date) -> dict:
+    start_10 = today - timedelta(days=9)
+    income_by_date = dict(
+        Table1DailyRollup.objects
+        .filter(date__gte=start_10, date__lte=today)
+        .values_list("date")
+        .annotate(total=Sum("income_daily"))
+        .order_by()
+    )
+
+    labels, values = [], []
+    cur = start_10
+    for _ in range(10):
+        labels.append(cur.strftime("%d.%m.%y"))
+        values.append(int(income_by_date.get(cur) or 0))
+        cur += timedelta(days=1)
+
+    return {"labels": labels, "values": values}
+
+
+def _online_users() -> list:
+    now = timezone.now()
+
+    users = list(
+        User.objects.filter(station_profile__isnull=False)
+        .select_related("station_profile")
+        .only(
+            "id", "username", "last_login",
+            "station_profile__user_id",
+            "station_profile__station_name",
+            "station_profile__last_seen"
+        )
+    )
+    # heartbeat lar presence cache da; bazadagi last_seen flush gacha orqada qolishi mumkin
+    seen_by_user = last_seen_map(u.station_profile for u in users)
+
+    out = []
+    for u in users:
+        sp = u.station_profile
+
+        last_seen = seen_by_user.get(u.id)
+        online = bool(last_seen and (now - last_seen).total_seconds() < ONLINE_WINDOW)
+
+        last_login_str = "-"
+        if u.last_login:
+            last_login_str = timezone.localtime(u.last_login).strftime("%Y-%m-%d %H:%M")
+
+        out.append({
+            "name": sp.station_name or u.username,
+            "department": "-",
+            "last_login": last_login_str,
+            "online": online,
+        })
+
+    out.sort(key=lambda x: x["name"].lower())
+    return out
+
+
+def build_dashboard_payload(d_from=None, d_to=None, sections=None) -> dict:
+    """
+    admin_settings sahifasidagi barcha grafiklar uchun ma'lumot.
+
+    - totals/structure: [d_from or oy boshi, d_to or oy oxiri]
+    - stations/dayNightTop*: [d_from, d_to], berilmasa - butun davr
+    - monthly*/incomeMini: oxirgi 6 oy / 10 kun (total qatorlar bilan)
+
+    Stansiya kesimidagi summalar har bir diapazon uchun bitta GROUP BY bilan olinadi.
+    sections=None - hammasi.
+    """
+    wanted = set(DASHBOARD_SECTIONS if sections is None else sections)
+    today = timezone.localdate()
+
+    first_day = today.replace(day=1)
+    last_day = today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    kpi_range = (d_from or first_day, d_to or last_day)
+    chart_range = (d_from, d_to)
+
+    sums_cache = {}
+
+    def sums_for(rng):
+        if rng not in sums_cache:
+            sums_cache[rng] = _station_sums(*rng)
+        return sums_cache[rng]
+
+    payload = {
+        "range": {"from": str(d_from) if d_from else None, "to": str(d_to) if d_to else None},
+    }
+
+    top5_income = top5_pod = top5_cont = []
+    if "structure" in wanted:
+        top5_income = _top5(sums_for(kpi_range), lambda s: s["income"])
+    if "dayNightTop" in wanted:
+        top5_pod = _top5(sums_for(chart_range), lambda s: s["pod_pogr"] + s["pod_vygr"])
+    if "dayNightTopCont" in wanted:
+        top5_cont = _top5(sums_for(chart_range), lambda s: s["pogr_cont"] + s["vygr_cont"])
+
+    user_ids = {uid for uid, _ in top5_income + top5_pod + top5_cont}
+    if "stations" in wanted:
+        user_ids |= set(sums_for(chart_range))
+
+    users = {}
+    if user_ids:
+        users = {
+            u.id: u
+            for u in (
+                User.objects.filter(id__in=user_ids)
+                .select_related("station_profile")
+                .only("id", "username", "first_name", "last_name", "station_profile__station_name")
+            )
+        }
+
+    if "totals" in wanted:
+        by_user = sums_for(kpi_range)
+        payload["totals"] = {
+            key: sum(s[key] for s in by_user.values())
+            for key in TOTALS_COLUMNS
+        }
+
+    if "structure" in wanted:
+        labels, values = [], []
+        for uid, s in top5_income:
+            u = users.get(uid)
+            if not u:
+                continue
+            labels.append((f"{u.first_name} {u.last_name}".strip() or u.station_profile.station_name))
+            values.append(s["income"])
+        payload["structure"] = {"labels": labels, "values": values}
+
+    if "incomeMini" in wanted:
+        payload["incomeMini"] = _income_mini(today)
+
+    if wanted & {"monthly", "monthlyCont"}:
+        monthly, monthly_cont = _monthly_series(today)
+        if "monthly" in wanted:
+            payload["monthly"] = monthly
+        if "monthlyCont" in wanted:
+            payload["monthlyCont"] = monthly_cont
+
+    if "stations" in wanted:
+        rows = []
+        for uid, s in sums_for(chart_range).items():
+            u = users.get(uid)
+            if not u:
+                continue
+            rows.append((_station_name(u), s["st_pogr"], s["st_vygr"]))
+        rows.sort(key=lambda x: x[0].lower())
+        payload["stations"] = {
+            "labels": [r[0] for r in rows],
+            "ortish": [r[1] for r in rows],
+            "tushirish": [r[2] for r in rows],
+        }
+
+    if "dayNightTop" in wanted:
+        payload["dayNightTop"] = _day_night_top(top5_pod, users, "pod_pogr", "pod_vygr")
+
+    if "dayNightTopCont" in wanted:
+        payload["dayNightTopCont"] = _day_night_top(top5_cont, users, "pogr_cont", "vygr_cont")
+
+    if "online_users" in wanted:
+        payload["online_users"] = _online_users()
+
+    return payload
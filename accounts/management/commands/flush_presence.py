@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.presence import flush_presence
+
+
+class Command(BaseCommand):
+    help = (
+        "Heartbeat presence cache dagi vaqtlarni StationProfile.last_seen ga bitta "
+        "bulk_update bilan yozadi. --loop bilan PRESENCE_FLUSH_INTERVAL da takrorlaydi (script.sh)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Har --interval sekundda flush qiladi (to'xtatilguncha).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Flush oralig'i, sekund (default: settings.PRESENCE_FLUSH_INTERVAL).",
+        )
+
+    def handle(self, *args, **options):
+        interval = options["interval"] or settings.PRESENCE_FLUSH_INTERVAL
+
+        while True:
+            close_old_connections()
+            n = flush_presence()
+            if n:
+                self.stdout.write(f"Flushed last_seen for {n} stations.")
+
+            if not options["loop"]:
+                return
+            time.sleep(interval)
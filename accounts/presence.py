@@ -0,0 +1,87 @@
+"""
+Stansiyalar "online" holati (heartbeat) uchun write-behind presence.
+
+Heartbeat har 30 sekundda har bir ochiq tab dan keladi; har birida
+StationProfile.save() qilish SQLite da yozuvchilarni navbatga qo'yib, haqiqiy
+hisobot saqlashlar bilan raqobatlashadi. Shuning uchun heartbeat faqat
+"presence" cache ga vaqt yozadi, last_seen esa flush_presence() orqali
+PRESENCE_FLUSH_INTERVAL da bir marta, bitta bulk_update bilan bazaga tushadi
+(manage.py flush_presence --loop, script.sh).
+
+"presence" cache barcha gunicorn worker lari va flush jarayoni uchun umumiy
+bo'lishi kerak (settings.CACHES).
+"""
+from django.core.cache import caches
+from django.utils import timezone
+
+from .models import StationProfile
+
+
+PRESENCE_CACHE_ALIAS = "presence"
+
+ONLINE_WINDOW = 60  # sekund
+
+
+def _cache():
+    return caches[PRESENCE_CACHE_ALIAS]
+
+
+def _key(user_id: int) -> str:
+    return f"presence:{user_id}"
+
+
+def _aware(dt):
+    if dt and timezone.is_naive(dt):
+        return timezone.make_aware(dt, timezone.get_current_timezone())
+    return dt
+
+
+def touch(user_id: int, when=None):
+    """Heartbeat: faqat cache ga yozadi, bazaga tegmaydi."""
+    _cache().set(_key(user_id), when or timezone.now(), timeout=None)
+
+
+def last_seen_map(profiles) -> dict:
+    """
+    {user_id: last_seen} - cache dagi va bazadagi qiymatning eng kechi
+    (cache tozalangan bo'lsa ham baza qiymati qoladi).
+    profiles - user_id va last_seen bor StationProfile lar.
+    """
+    profiles = list(profiles)
+    cached = _cache().get_many([_key(sp.user_id) for sp in profiles])
+
+    out = {}
+    for sp in profiles:
+        seen = _aware(sp.last_seen)
+        hit = cached.get(_key(sp.user_id))
+        if hit and (seen is None or hit > seen):
+            seen = hit
+        out[sp.user_id] = seen
+    return out
+
+
+def online_user_ids(profiles, now=None) -> set:
+    """Oxirgi ONLINE_WINDOW ichida heartbeat yuborgan user_id lar."""
+    now = now or timezone.now()
+    return {
+        user_id
+        for user_id, seen in last_seen_map(profiles).items()
+        if seen and (now - seen).total_seconds() < ONLINE_WINDOW
+    }
+
+
+def flush_presence() -> int:
+    """Cache dagi yangi vaqtlarni last_seen ga bitta bulk_update bilan yozadi."""
+    profiles = list(StationProfile.objects.only("id", "user_id", "last_seen"))
+    cached = _cache().get_many([_key(sp.user_id) for sp in profiles])
+
+    dirty = []
+    for sp in profiles:
+        hit = cached.get(_key(sp.user_id))
+        if hit and (sp.last_seen is None or hit > _aware(sp.last_seen)):
+            sp.last_seen = hit
+            dirty.append(sp)
+
+    if dirty:
+        StationProfile.objects.bulk_update(dirty, ["last_seen"])
+    return len(dirty)
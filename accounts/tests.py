@@ -1,3 +1,96 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from reports.models import StationDailyTable1
+from reports.rollups import table1_rows_changed
+from .dashboard import build_dashboard_payload
+from .models import StationProfile
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "presence": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "presence-tests"},
+    "reports": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "reports-tests"},
+})
+class StationPresenceTests(TestCase):
+    def setUp(self):
+        caches["presence"].clear()
+        self.station = User.objects.create_user("st1", password="x")
+        self.sp = StationProfile.objects.create(user=self.station, station_name="Alpha")
+        self.admin = User.objects.create_user("boss", password="x", is_staff=True)
+
+    def test_heartbeat_is_write_behind(self):
+        self.client.force_login(self.station)
+
+        with self.assertNumQueries(3):  # session, user, station_profile - UPDATE yo'q
+            self.assertEqual(self.client.get(reverse("station_heartbeat")).status_code, 200)
+        self.sp.refresh_from_db()
+        self.assertIsNone(self.sp.last_seen)
+
+        # admin online ro'yxati presence store dan o'qiydi
+        self.client.force_login(self.admin)
+        users = self.client.get(reverse("admin_settings_online_users_json")).json()["online_users"]
+        self.assertEqual([(u["name"], u["online"]) for u in users], [("Alpha", True)])
+
+        call_command("flush_presence", stdout=StringIO())
+        self.sp.refresh_from_db()
+        self.assertIsNotNone(self.sp.last_seen)
+
+
+class DashboardPayloadTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.admin = User.objects.create_user("boss", password="x", is_staff=True)
+        rows = {
+            "Alpha": {
+                "day": {"vygr_itogo": 2, "pogr_itogo": 3, "pogr_cont": 1, "pod_pogr_itogo": 4, "income_daily": 100},
+                "night": {"vygr_itogo": 1, "pod_vygr_itogo": 5},
+                "total": {"vygr_itogo": 3, "pogr_itogo": 3},
+            },
+            "Beta": {
+                "day": {"vygr_itogo": 10, "pod_pogr_itogo": 1, "income_daily": 300},
+            },
+        }
+        for name, shifts in rows.items():
+            user = User.objects.create_user(name.lower(), password="x")
+            StationProfile.objects.create(user=user, station_name=name)
+            for shift, data in shifts.items():
+                StationDailyTable1.objects.create(station_user=user, date=self.today, shift=shift, block=1, data=data)
+            table1_rows_changed(user.id, [self.today])
+
+    def test_sections_are_projected_from_rollups(self):
+        payload = build_dashboard_payload(self.today, self.today)
+
+        # total smena qatorlari stansiya summalariga kirmaydi
+        self.assertEqual(
+            {k: payload["totals"][k] for k in ("vygr", "pogr", "pod_vygr", "pod_pogr", "pogr_cont")},
+            {"vygr": 13, "pogr": 3, "pod_vygr": 5, "pod_pogr": 5, "pogr_cont": 1},
+        )
+        self.assertEqual(payload["structure"], {"labels": ["Beta", "Alpha"], "values": [300, 100]})
+        self.assertEqual(payload["stations"], {"labels": ["Alpha", "Beta"], "ortish": [4, 0], "tushirish": [3, 10]})
+        self.assertEqual(payload["dayNightTop"], {"labels": ["Alpha", "Beta"], "day": [4, 1], "night": [5, 0]})
+        self.assertEqual(payload["dayNightTopCont"]["labels"][0], "Alpha")
+
+        # oylik grafik: joriy oy (oxirgi nuqta) barcha smenalar bilan
+        self.assertEqual(len(payload["monthly"]["labels"]), 6)
+        self.assertEqual((payload["monthly"]["ortish"][-1], payload["monthly"]["tushirish"][-1]), (6, 16))
+        self.assertEqual(payload["incomeMini"]["values"][-1], 400)
+
+    def test_json_endpoints_return_requested_sections(self):
+        self.client.force_login(self.admin)
+        params = {"from": self.today.isoformat(), "to": self.today.isoformat()}
+
+        data = self.client.get(
+            reverse("admin_settings_dashboard_json"), {**params, "sections": "totals,stations,bogus"},
+        ).json()
+        self.assertEqual(set(data), {"range", "totals", "stations"})
+
+        # eski URL lar - shu payload ning bitta bo'limi
+        legacy = self.client.get(reverse("admin_settings_stations_json"), params).json()
+        self.assertEqual(legacy, {"stations": data["stations"]})
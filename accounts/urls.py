@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     AppLoginView,
     AppLogoutView,
+    admin_settings_dashboard_json,
     admin_settings_monthly_json,
     admin_settings_monthly_json_cont,
     admin_settings_online_users_json,
@@ -35,6 +36,7 @@ urlpatterns = [
     path('logout/', logout_get, name='logout'),
 
     # charts/json
+    path("admin/settings/dashboard.json", admin_settings_dashboard_json, name="admin_settings_dashboard_json"),
     path("admin/settings/monthly.json", admin_settings_monthly_json, name="admin_settings_monthly_json"),
     path("admin/settings/monthly.json/cont", admin_settings_monthly_json_cont, name="admin_settings_monthly_json_cont"),
     path("admin/settings/stations.json", admin_settings_stations_json, name="admin_settings_stations_json"),
@@ -1,6 +1,4 @@
-import calendar
-from collections import defaultdict
-from datetime import date, timedelta, datetime
+from datetime import datetime
 
 from django.contrib import messages
 from django.contrib.auth import logout
@@ -13,7 +11,9 @@ from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
-from reports.models import StationDailyTable1
+from reports.versions import STATIONS_VERSION_KEY, bump_versions
+from . import presence
+from .dashboard import DASHBOARD_SECTIONS, build_dashboard_payload
 from .models import StationProfile
 
 
@@ -32,6 +32,7 @@ class AppLoginView(LoginView):
             sp.status_online = True
             sp.last_seen = timezone.now()
             sp.save(update_fields=["status_online", "last_seen"])
+            presence.touch(sp.user_id, sp.last_seen)
 
         return response
 
@@ -54,10 +55,10 @@ class AppLogoutView(LogoutView):
 
 @login_required
 def station_heartbeat(request):
+    # bazaga yozilmaydi: last_seen ni flush_presence bir oraliqda bitta bulk_update bilan yozadi
     sp = getattr(request.user, "station_profile", None)
     if sp:
-        sp.last_seen = timezone.now()
-        sp.save(update_fields=["last_seen"])
+        presence.touch(sp.user_id)
     return JsonResponse({"ok": True})
 
 
@@ -91,6 +92,7 @@ def admin_stations(request):
                 station_name=station_name,
                 plain_password=password,
             )
+            bump_versions([STATIONS_VERSION_KEY])
 
             messages.success(request, "Филиал успешно создан.")
             return redirect("admin_stations")
@@ -109,6 +111,7 @@ def promote_station(request, station_id: int):
     status_raw = (request.POST.get("status") or "").strip().lower()
     profile.status = status_raw == "true"
     profile.save(update_fields=["status"])
+    bump_versions([STATIONS_VERSION_KEY])
 
     return redirect("admin_stations")
 
@@ -146,6 +149,7 @@ def admin_station_edit(request, station_id: int):
             if password:
                 profile.plain_password = password
             profile.save()
+            bump_versions([STATIONS_VERSION_KEY])
 
             messages.success(request, "Данные филиала успешно обновлены.")
             return redirect("admin_stations")
@@ -176,6 +180,7 @@ def admin_station_delete(request, station_id: int):
         return redirect("admin_stations")
 
     profile.user.delete()
+    bump_versions([STATIONS_VERSION_KEY])
     messages.success(request, "Филиал успешно удалён.")
     return redirect("admin_stations")
 
@@ -189,12 +194,6 @@ def _parse_yyyy_mm_dd(s: str):
         return None
 
 
-def _month_add(d: date, months: int) -> date:
-    y = d.year + (d.month - 1 + months) // 12
-    m = (d.month - 1 + months) % 12 + 1
-    return date(y, m, 1)
-
-
 def station_settings(request):
     return render(request, "station_settings.html")
 
@@ -212,94 +211,8 @@ def admin_settings(request):
     d_from = _parse_yyyy_mm_dd(request.GET.get("from"))
     d_to = _parse_yyyy_mm_dd(request.GET.get("to"))
 
-    today = timezone.now().date()
-    first_day = today.replace(day=1)
-    last_day = today.replace(day=calendar.monthrange(today.year, today.month)[1])
-
-    start_date = d_from if d_from else first_day
-    end_date = d_to if d_to else last_day
-
-    qs = StationDailyTable1.objects.all().only("data", "date", "station_user").exclude(shift="total")
-    qs = qs.filter(date__range=(start_date, end_date))
-
-    totals = {
-        "vygr": 0,
-        "pod_vygr": 0,
-        "pogr": 0,
-        "pod_pogr": 0,
-        "vygr_cont": 0,
-        "pod_vygr_cont": 0,
-        "pod_pogr_cont": 0,
-        "pogr_cont": 0,
-    }
-
-    for row in qs:
-        d = row.data or {}
-        totals["vygr"] += d.get("vygr_itogo", 0)
-        totals["pod_pogr"] += d.get("pod_pogr_itogo", 0)
-        totals["pod_pogr_cont"] += d.get("pod_pogr_cont", 0)
-        totals["pod_vygr"] += d.get("pod_vygr_itogo", 0)
-        totals["pod_vygr_cont"] += d.get("pod_vygr_cont", 0)
-        totals["vygr_cont"] += d.get("vygr_cont", 0)
-        totals["pogr"] += d.get("pogr_itogo", 0)
-        totals["pogr_cont"] += d.get("pogr_cont", 0)
-
-    today = timezone.localdate()
-
-    qs_top5 = (
-        StationDailyTable1.objects
-        .filter(date__range=(start_date, end_date))
-        .select_related("station_user")
-        .only("data", "station_user__username", "station_user__first_name", "station_user__last_name")
-        .exclude(shift="total")
-    )
-
-    sums = defaultdict(float)
-    for row in qs_top5:
-        val = (row.data or {}).get("income_daily", 0)
-        if isinstance(val, (int, float)):
-            sums[row.station_user_id] += float(val)
-
-    top5 = sorted(sums.items(), key=lambda x: x[1], reverse=True)[:5]
-    users_map = {
-        u.id: u
-        for u in User.objects.filter(id__in=[uid for uid, _ in top5]).select_related("station_profile")
-    }
-
-    structure_labels, structure_values = [], []
-    for uid, total in top5:
-        u = users_map.get(uid)
-        if not u:
-            continue
-        structure_labels.append((f"{u.first_name} {u.last_name}".strip() or u.station_profile.station_name))
-        structure_values.append(int(total))
-
-    start_10 = today - timedelta(days=9)
-    qs_10 = (
-        StationDailyTable1.objects
-        .filter(date__gte=start_10, date__lte=today)
-        .only("date", "data")
-    )
-
-    income_by_date = defaultdict(float)
-    for row in qs_10:
-        val = (row.data or {}).get("income_daily", 0)
-        if isinstance(val, (int, float)):
-            income_by_date[row.date] += float(val)
-
-    income_labels, income_values = [], []
-    cur = start_10
-    for _ in range(10):
-        income_labels.append(cur.strftime("%d.%m.%y"))
-        income_values.append(int(income_by_date.get(cur, 0)))
-        cur += timedelta(days=1)
-
-    dash_json = {
-        "range": {"from": str(d_from) if d_from else None, "to": str(d_to) if d_to else None},
-        "totals": totals,
-        "structure": {"labels": structure_labels, "values": structure_values},
-        "incomeMini": {"labels": income_labels, "values": income_values},
-    }
+    # qolgan grafiklar sahifadan admin_settings_dashboard_json orqali bitta so'rovda olinadi
+    dash_json = build_dashboard_payload(d_from, d_to, sections=("totals", "structure", "incomeMini"))
 
     return render(
         request,
@@ -312,267 +225,65 @@ def admin_settings(request):
     )
 
 
-def admin_settings_monthly_json(request):
-    if not (request.user.is_staff or request.user.is_superuser):
-        return JsonResponse({"detail": "forbidden"}, status=403)
-
-    today = timezone.localdate()
-    this_month_start = today.replace(day=1)
-    six_months_start = _month_add(this_month_start, -5)
-
-    qs_6m = (
-        StationDailyTable1.objects
-        .filter(date__gte=six_months_start, date__lte=today)
-        .only("date", "data")
+def _dashboard_json(request, sections) -> dict:
+    return build_dashboard_payload(
+        _parse_yyyy_mm_dd(request.GET.get("from")),
+        _parse_yyyy_mm_dd(request.GET.get("to")),
+        sections=sections,
     )
 
-    by_month = defaultdict(lambda: {"pogr": 0.0, "vygr": 0.0})
-    for row in qs_6m:
-        mkey = row.date.replace(day=1)
-        d = row.data or {}
-        by_month[mkey]["vygr"] += d.get("vygr_itogo", 0)
-        by_month[mkey]["pogr"] += d.get("pogr_itogo", 0)
 
-    labels, ortish, tushirish = [], [], []
-    cur = six_months_start
-    for _ in range(6):
-        labels.append(calendar.month_name[cur.month])
-        ortish.append(int(by_month[cur]["pogr"]))
-        tushirish.append(int(by_month[cur]["vygr"]))
-        cur = _month_add(cur, 1)
-
-    return JsonResponse({"monthly": {"labels": labels, "ortish": ortish, "tushirish": tushirish}})
-
-
-def admin_settings_monthly_json_cont(request):
+def admin_settings_dashboard_json(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"detail": "forbidden"}, status=403)
 
-    today = timezone.localdate()
-    this_month_start = today.replace(day=1)
-    six_months_start = _month_add(this_month_start, -5)
-
-    qs_6m = (
-        StationDailyTable1.objects
-        .filter(date__gte=six_months_start, date__lte=today)
-        .only("date", "data")
-    )
+    sections = None
+    raw = (request.GET.get("sections") or "").strip()
+    if raw:
+        sections = [x for x in raw.split(",") if x in DASHBOARD_SECTIONS]
 
-    by_month = defaultdict(lambda: {"pogr": 0.0, "vygr": 0.0})
-    for row in qs_6m:
-        mkey = row.date.replace(day=1)
-        d = row.data or {}
-        by_month[mkey]["vygr"] += d.get("vygr_cont", 0)
-        by_month[mkey]["pogr"] += d.get("pogr_cont", 0)
+    return JsonResponse(_dashboard_json(request, sections))
 
-    labels, ortish, tushirish = [], [], []
-    cur = six_months_start
-    for _ in range(6):
-        labels.append(calendar.month_name[cur.month])
-        ortish.append(int(by_month[cur]["pogr"]))
-        tushirish.append(int(by_month[cur]["vygr"]))
-        cur = _month_add(cur, 1)
 
-    return JsonResponse({"monthly": {"labels": labels, "ortish": ortish, "tushirish": tushirish}})
+# eski URL lar: admin_settings_dashboard_json ning bitta bo'limi
 
+def admin_settings_monthly_json(request):
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({"detail": "forbidden"}, status=403)
 
-def _station_name(u: User) -> str:
-    sp = getattr(u, "station_profile", None)
-    if sp and sp.station_name:
-        return sp.station_name
-    return u.username
+    return JsonResponse({"monthly": _dashboard_json(request, ["monthly"])["monthly"]})
 
 
-def admin_settings_stations_json(request):
+def admin_settings_monthly_json_cont(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"detail": "forbidden"}, status=403)
 
-    d_from = _parse_yyyy_mm_dd(request.GET.get("from"))
-    d_to = _parse_yyyy_mm_dd(request.GET.get("to"))
-
-    qs = StationDailyTable1.objects.all().only("date", "data", "station_user").exclude(shift="total")
-    if d_from:
-        qs = qs.filter(date__gte=d_from)
-    if d_to:
-        qs = qs.filter(date__lte=d_to)
-
-    agg = defaultdict(lambda: {"pogr": 0.0, "vygr": 0.0})
-
-    for row in qs:
-        d = row.data or {}
-        for k, v in d.items():
-            if not isinstance(v, (int, float)):
-                continue
-            if k.startswith("pogr") and not k.startswith("pod_pogr"):
-                agg[row.station_user_id]["pogr"] += float(v)
-            elif k.startswith("vygr") and not k.startswith("pod_vygr"):
-                agg[row.station_user_id]["vygr"] += float(v)
-
-    users = (
-        User.objects.filter(id__in=list(agg.keys()))
-        .select_related("station_profile")
-        .only("id", "username", "station_profile__station_name")
-    )
-    u_map = {u.id: u for u in users}
+    return JsonResponse({"monthly": _dashboard_json(request, ["monthlyCont"])["monthlyCont"]})
 
-    rows = []
-    for uid, vals in agg.items():
-        u = u_map.get(uid)
-        if not u:
-            continue
-        name = _station_name(u)
-        rows.append((name, int(vals["pogr"]), int(vals["vygr"])))
 
-    rows.sort(key=lambda x: x[0].lower())
+def admin_settings_stations_json(request):
+    if not (request.user.is_staff or request.user.is_superuser):
+        return JsonResponse({"detail": "forbidden"}, status=403)
 
-    return JsonResponse({
-        "stations": {
-            "labels": [r[0] for r in rows],
-            "ortish": [r[1] for r in rows],
-            "tushirish": [r[2] for r in rows],
-        }
-    })
+    return JsonResponse({"stations": _dashboard_json(request, ["stations"])["stations"]})
 
 
 def admin_settings_stacked_top5_json(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"detail": "forbidden"}, status=403)
 
-    d_from = _parse_yyyy_mm_dd(request.GET.get("from"))
-    d_to = _parse_yyyy_mm_dd(request.GET.get("to"))
-
-    qs = StationDailyTable1.objects.all().only("date", "data", "station_user").exclude(shift="total")
-    if d_from:
-        qs = qs.filter(date__gte=d_from)
-    if d_to:
-        qs = qs.filter(date__lte=d_to)
-
-    agg = defaultdict(lambda: {"pogr": 0.0, "vygr": 0.0})
-
-    for row in qs:
-        d = row.data or {}
-        agg[row.station_user_id]["pogr"] += d.get("pod_pogr_itogo", 0)
-        agg[row.station_user_id]["vygr"] += d.get("pod_vygr_itogo", 0)
-
-    top5 = sorted(
-        agg.items(),
-        key=lambda x: x[1]["pogr"] + x[1]["vygr"],
-        reverse=True
-    )[:5]
-
-    users = (
-        User.objects.filter(id__in=[uid for uid, _ in top5])
-        .select_related("station_profile")
-        .only("id", "username", "station_profile__station_name")
-    )
-    u_map = {u.id: u for u in users}
-
-    labels, day, night = [], [], []
-    for uid, vals in top5:
-        u = u_map.get(uid)
-        if not u:
-            continue
-        labels.append(_station_name(u))
-        day.append(int(vals["pogr"]))
-        night.append(int(vals["vygr"]))
-
-    return JsonResponse({
-        "dayNightTop": {
-            "labels": labels,
-            "day": day,
-            "night": night,
-        }
-    })
+    return JsonResponse({"dayNightTop": _dashboard_json(request, ["dayNightTop"])["dayNightTop"]})
 
 
 def admin_settings_stacked_top5_json_cont(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"detail": "forbidden"}, status=403)
 
-    d_from = _parse_yyyy_mm_dd(request.GET.get("from"))
-    d_to = _parse_yyyy_mm_dd(request.GET.get("to"))
-
-    qs = StationDailyTable1.objects.all().only("date", "data", "station_user").exclude(shift="total")
-    if d_from:
-        qs = qs.filter(date__gte=d_from)
-    if d_to:
-        qs = qs.filter(date__lte=d_to)
-
-    agg = defaultdict(lambda: {"pogr": 0.0, "vygr": 0.0})
-
-    for row in qs:
-        d = row.data or {}
-        agg[row.station_user_id]["pogr"] += d.get("pogr_cont", 0)
-        agg[row.station_user_id]["vygr"] += d.get("vygr_cont", 0)
-
-    top5 = sorted(
-        agg.items(),
-        key=lambda x: x[1]["pogr"] + x[1]["vygr"],
-        reverse=True
-    )[:5]
-
-    users = (
-        User.objects.filter(id__in=[uid for uid, _ in top5])
-        .select_related("station_profile")
-        .only("id", "username", "station_profile__station_name")
-    )
-    u_map = {u.id: u for u in users}
-
-    labels, day, night = [], [], []
-    for uid, vals in top5:
-        u = u_map.get(uid)
-        if not u:
-            continue
-        labels.append(_station_name(u))
-        day.append(int(vals["pogr"]))
-        night.append(int(vals["vygr"]))
-
-    return JsonResponse({
-        "dayNightTop": {
-            "labels": labels,
-            "day": day,
-            "night": night,
-        }
-    })
+    return JsonResponse({"dayNightTop": _dashboard_json(request, ["dayNightTopCont"])["dayNightTopCont"]})
 
 
 def admin_settings_online_users_json(request):
     if not (request.user.is_staff or request.user.is_superuser):
         return JsonResponse({"detail": "forbidden"}, status=403)
 
-    ONLINE_WINDOW = 60
-    now = timezone.now()
-
-    users = (
-        User.objects.filter(station_profile__isnull=False)
-        .select_related("station_profile")
-        .only(
-            "id", "username", "last_login",
-            "station_profile__station_name",
-            "station_profile__last_seen"
-        )
-    )
-
-    out = []
-    for u in users:
-        sp = u.station_profile
-
-        last_seen = sp.last_seen
-        if last_seen and timezone.is_naive(last_seen):
-            last_seen = timezone.make_aware(last_seen, timezone.get_current_timezone())
-
-        online = bool(last_seen and (now - last_seen).total_seconds() < ONLINE_WINDOW)
-
-        last_login_str = "-"
-        if u.last_login:
-            last_login_str = timezone.localtime(u.last_login).strftime("%Y-%m-%d %H:%M")
-
-        out.append({
-            "name": sp.station_name or u.username,
-            "department": "-",
-            "last_login": last_login_str,
-            "online": online,
-        })
-
-    out.sort(key=lambda x: x["name"].lower())
-    return JsonResponse({"online_users": out})
\ No newline at end of file
+    return JsonResponse({"online_users": _dashboard_json(request, ["online_users"])["online_users"]})
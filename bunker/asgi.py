@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Production da faqat uzoq yashaydigan SSE ulanishlari (/api/notifications/stream/)
+shu yerdan uvicorn orqali xizmat qiladi (script.sh, nginx location); qolgan
+so'rovlar gunicorn (wsgi.py) da.
 """
 
 import os
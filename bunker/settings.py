@@ -80,6 +80,43 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# "presence" - heartbeat lar uchun write-behind store (accounts.presence), "events" - SSE
+# o'zgarish signallari (reports.notifications). Ikkalasi ham barcha gunicorn/uvicorn worker lari
+# va flush_presence jarayoni uchun umumiy bo'lishi kerak, shuning uchun LocMem emas.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "presence": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "presence",
+    },
+    "events": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "cache" / "events",
+    },
+    # hisobot natijalari (reports.report_cache): kalitda ma'lumot versiyalari bor, shuning uchun
+    # har worker o'z LocMem ida saqlashi ham to'g'ri; umumiy cache kerak bo'lsa REPORTS_CACHE_DIR
+    "reports": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "reports",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+if os.environ.get("REPORTS_CACHE_DIR"):
+    CACHES["reports"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ["REPORTS_CACHE_DIR"],
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+
+PRESENCE_FLUSH_INTERVAL = 60  # sekund
+
+# Excel eksport artifact lari (reports.exports, manage.py run_export_worker)
+EXPORT_ROOT = BASE_DIR / "exports"
+EXPORT_ARTIFACT_MAX_AGE_DAYS = 7
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/router/'
 LOGOUT_REDIRECT_URL = '/login/'
@@ -1,5 +1,12 @@
+from collections import defaultdict
+
 from django.contrib import admin
-from .models import KPI, KPIValue, StationDailyTable1, StationDailyTable2
+from django.db import transaction
+
+from .models import KPI, ExportJob, KPIValue, StationDailyTable1, StationDailyTable2
+from .rollups import table1_rows_changed
+from .table2_sectors import with_canonical_sectors
+from .versions import bump_versions, table2_version_key
 
 @admin.register(KPI)
 class KPIAdmin(admin.ModelAdmin):
@@ -22,16 +29,71 @@ class StationDailyTable1Admin(admin.ModelAdmin):
     list_filter = ('date', 'shift')
     search_fields = ('station_user__username',)
 
+    # admin orqali o'zgartirishlar ham rollup larni yangilasin
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old = None
+        if change:
+            old = StationDailyTable1.objects.filter(pk=obj.pk).values("station_user_id", "date").first()
+        super().save_model(request, obj, form, change)
+        if old and (old["station_user_id"], old["date"]) != (obj.station_user_id, obj.date):
+            table1_rows_changed(old["station_user_id"], [old["date"]])
+        table1_rows_changed(obj.station_user_id, [obj.date])
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        table1_rows_changed(obj.station_user_id, [obj.date])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        dates_by_user = defaultdict(set)
+        for user_id, d in queryset.values_list("station_user_id", "date"):
+            dates_by_user[user_id].add(d)
+        super().delete_queryset(request, queryset)
+        for user_id, dates in dates_by_user.items():
+            table1_rows_changed(user_id, dates)
+
 @admin.register(StationDailyTable2)
 class StationDailyTable2Admin(admin.ModelAdmin):
     list_display = ('date', 'station_user', 'submitted_at')
     search_fields = ('station_user__username',)
 
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old_date = None
+        if change:
+            old_date = StationDailyTable2.objects.filter(pk=obj.pk).values_list("date", flat=True).first()
+        # qo'lda tahrirlangan JSON ham kanonik sektor shaklida saqlansin
+        obj.data = with_canonical_sectors(obj.data)
+        super().save_model(request, obj, form, change)
+        bump_versions(table2_version_key(d) for d in {old_date, obj.date} if d)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        if obj.date:
+            bump_versions([table2_version_key(obj.date)])
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        dates = set(queryset.exclude(date=None).values_list("date", flat=True))
+        super().delete_queryset(request, queryset)
+        bump_versions(table2_version_key(d) for d in dates)
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('fingerprint', 'artifact', 'error', 'created_at', 'started_at', 'finished_at')
+
 
 
 
 from django.contrib import admin
 from .models import Notification, NotificationRead
+from .notifications import NOTIFICATION_TOPIC, publish
 
 
 @admin.register(Notification)
@@ -44,6 +106,19 @@ class NotificationAdmin(admin.ModelAdmin):
         return obj.message[:80]
     short_message.short_description = "Xabar"
 
+    # SSE stream lar oxirgi aktiv habarnomani qayta yuborsin
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        publish(NOTIFICATION_TOPIC)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        publish(NOTIFICATION_TOPIC)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        publish(NOTIFICATION_TOPIC)
+
 
 @admin.register(NotificationRead)
 class NotificationReadAdmin(admin.ModelAdmin):
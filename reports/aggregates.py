@@ -0,0 +1,171 @@
+import calendar
+import hashlib
+from datetime import date, timedelta
+
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import StationProfile
+from .models import Table1DailyRollup
+from .report_cache import report_cache
+from .versions import STATIONS_VERSION_KEY, get_table1_versions_between
+
+
+# kvartalniy metric -> Table1 typed ustuni (data kaliti bilan bir xil)
+TABLE1_STATION_METRICS = {
+    "pogr": "pogr_itogo",
+    "vygr": "vygr_itogo",
+    "pogr_kont": "pogr_itogo_kon",
+    "vygr_kont": "vygr_itogo_kon",
+    "income": "income_daily",
+}
+
+# yopilgan davr natijasi o'zgarmaydi, kalit versiyalar bilan eskiradi
+CLOSED_PERIOD_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _int_sum(column: str):
+    return Coalesce(Sum(column), 0)
+
+
+def _merge_intervals(intervals) -> list[tuple[date, date]]:
+    """Oraliqlarni tartiblab, kesishgan/yonma-yon bo'lganlarini birlashtiradi."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start - merged[-1][1] <= timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def date_intervals(dates) -> list[tuple[date, date]]:
+    """Sanalar ro'yxatini uzluksiz [start, end] oraliqlarga yig'adi."""
+    return _merge_intervals((d, d) for d in dates)
+
+
+def _same_day_last_year(d: date) -> date:
+    try:
+        return d.replace(year=d.year - 1)
+    except ValueError:
+        return d.replace(year=d.year - 1, day=28)
+
+
+def last_year_intervals(intervals) -> list[tuple[date, date]]:
+    """
+    Oraliqlardagi har bir kunning "o'tgan yildagi shu kuni" to'plami - kunma-kun ro'yxatsiz.
+
+    29-fevral o'tgan yilning 28-fevraliga tushadi (u baribir oraliq ichida). O'tgan yilning
+    29-fevraliga esa hech bir kun tushmaydi (ketma-ket ikki kabisa yil yo'q), shuning uchun
+    siljitilgan oraliqdan u chiqarib tashlanadi.
+    """
+    out = []
+    for start, end in intervals:
+        cur, last = _same_day_last_year(start), _same_day_last_year(end)
+        for year in range(cur.year, last.year + 1):
+            if not calendar.isleap(year):
+                continue
+            leap_day = date(year, 2, 29)
+            if cur <= leap_day <= last:
+                if cur < leap_day:
+                    out.append((cur, leap_day - timedelta(days=1)))
+                cur = leap_day + timedelta(days=1)
+        if cur <= last:
+            out.append((cur, last))
+    return _merge_intervals(out)
+
+
+def _date_filter(intervals) -> Q:
+    """Uzun oraliqlar - indeksli BETWEEN, yakka kunlar - bitta IN."""
+    single_days = [start for start, end in intervals if start == end]
+    cond = Q(date__in=single_days) if single_days else Q()
+    for start, end in intervals:
+        if start != end:
+            cond |= Q(date__range=(start, end))
+    return cond
+
+
+def aggregate_table1_by_station(date_list: list[date], station_ids=None) -> dict:
+    """aggregate_table1_between() - sanalar ro'yxati uchun (oraliqlarga yig'ib)."""
+    return aggregate_table1_between(date_intervals(date_list), station_ids=station_ids)
+
+
+def aggregate_table1_between(intervals, station_ids=None) -> dict:
+    """
+    Kun/tun smenalari bo'yicha faktlarni stansiya kesimida yig'adi.
+
+    Table1DailyRollup dan o'qiydi (stansiya x kun x smena, bloklar yig'ilgan).
+    intervals - [(start, end), ...] uzluksiz sana oraliqlari (ikkala chegara ham kiradi);
+    har biri date BETWEEN bo'lib ketadi, shuning uchun bir necha yillik oraliq ham
+    parametrlar sonini oshirmaydi. StationProfile bitta JOIN orqali topiladi, summalar
+    DB tomonda hisoblanadi: 2 ta query.
+
+    Natija: {station_profile_id: {"station": StationProfile, "pogr": .., ...}}
+    """
+    if not intervals:
+        return {}
+
+    qs = (
+        Table1DailyRollup.objects
+        .filter(_date_filter(intervals), station_user__station_profile__isnull=False)
+        .exclude(shift="total")
+    )
+
+    if station_ids is not None:
+        qs = qs.filter(station_user__station_profile__id__in=station_ids)
+
+    rows = list(
+        qs
+        .values(profile_id=F("station_user__station_profile__id"))
+        .annotate(**{
+            metric: _int_sum(column)
+            for metric, column in TABLE1_STATION_METRICS.items()
+        })
+        .order_by()
+    )
+
+    stations = StationProfile.objects.in_bulk([r["profile_id"] for r in rows])
+
+    station_map = {}
+    for r in rows:
+        station = stations.get(r["profile_id"])
+        if station is None:
+            continue
+
+        station_map[station.id] = {
+            "station": station,
+            **{metric: int(r[metric] or 0) for metric in TABLE1_STATION_METRICS},
+        }
+
+    return station_map
+
+
+def aggregate_table1_closed_period(intervals, station_ids=None) -> dict:
+    """
+    aggregate_table1_between() natijasi cache dan - "o'tgan yilning shu kunlari"
+    kabi yopilgan (bugundan oldingi) davrlar uchun.
+
+    Kalit oraliqlar, station_ids hamda oraliqlardagi Table1 versiyalari va stansiyalar
+    versiyasidan tuziladi: tarixiy qator tahrirlansa (table1_rows_changed) yoki stansiya
+    o'zgarsa, yangi kalit hosil bo'ladi. Cache hit da bitta query (versiyalar).
+    Bugun yoki kelajak sanasi bo'lsa cache siz hisoblanadi.
+    """
+    intervals = _merge_intervals(intervals)
+    if not intervals or intervals[-1][1] >= timezone.localdate():
+        return aggregate_table1_between(intervals, station_ids=station_ids)
+
+    versions = get_table1_versions_between(intervals, keys=[STATIONS_VERSION_KEY])
+
+    digest = hashlib.sha1("|".join([
+        ",".join(f"{start.isoformat()}/{end.isoformat()}" for start, end in intervals),
+        ",".join(f"{key}={version}" for key, version in sorted(versions.items())),
+        "*" if station_ids is None else ",".join(str(i) for i in sorted(station_ids)),
+    ]).encode()).hexdigest()
+    cache_key = f"reports:table1_closed:{intervals[0][0].isoformat()}:{intervals[-1][1].isoformat()}:{digest}"
+
+    station_map = report_cache().get(cache_key)
+    if station_map is None:
+        station_map = aggregate_table1_between(intervals, station_ids=station_ids)
+        report_cache().set(cache_key, station_map, CLOSED_PERIOD_CACHE_TIMEOUT)
+    return station_map
@@ -0,0 +1,283 @@
+"""
+Hisobot endpoint lari uchun so'rovlar soni va vaqt o'lchovi (manage.py bench_reports).
+
+Har bir masshtab ("stansiyalar x yillar") uchun alohida vaqtinchalik test bazasi
+yaratiladi, reports.synthetic bilan to'ldiriladi va har endpoint:
+- cold: cache tozalangandan keyingi birinchi so'rov;
+- warm: darhol takroriy so'rov (cache dan);
+bo'yicha o'lchanadi. Natija JSON fayl - keyingi o'lchov bilan compare_results()
+orqali solishtiriladi: so'rovlar soni oshgani yoki vaqt sezilarli o'sgani ko'rinadi.
+
+Excel eksportlar view orqali emas (u navbatga qo'yadi), EXPORT_KINDS dagi builder
+ni to'g'ridan-to'g'ri chaqirib o'lchanadi.
+"""
+import io
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .exports import EXPORT_KINDS
+from .synthetic import SYNTH_ADMIN, SYNTH_PREFIX, generate_history
+
+
+RESULTS_FORMAT_VERSION = 1
+
+# cold run lardan oldin tozalanadigan cache lar (hisobot natijalari shu yerda)
+REPORT_CACHE_ALIASES = ("default", "reports")
+
+# compare_results: shundan ko'p sekinlashish regressiya hisoblanadi
+DEFAULT_TIME_THRESHOLD = 0.25
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    kind: str  # "page" | "json" | "excel"
+    target: str  # URL yoki builder (import yo'li)
+    as_station: bool = False
+    args: tuple = ()
+
+
+def parse_scales(raw: str) -> list[tuple[int, float]]:
+    """ "10x1,30x2" -> [(10, 1.0), (30, 2.0)] """
+    scales = []
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        stations, _, years = part.lower().partition("x")
+        scales.append((int(stations), float(years or 1)))
+    if not scales:
+        raise ValueError("Kamida bitta masshtab kerak, masalan 10x1")
+    return scales
+
+
+def scale_label(stations: int, years: float) -> str:
+    return f"{stations}x{years:g}"
+
+
+def report_endpoints(day: date, station_user_id: int) -> list[Endpoint]:
+    """Sintetik tarix ustidagi barcha hisobot, JSON va Excel endpoint lari."""
+    d = day.isoformat()
+    month = day.strftime("%Y-%m")
+    year_start = day.replace(month=1, day=1).isoformat()
+    month_start = day.replace(day=1).isoformat()
+    after = (day - timedelta(days=30)).isoformat()
+
+    def url(name, query="", **kwargs):
+        return reverse(name, kwargs=kwargs or None) + (f"?{query}" if query else "")
+
+    return [
+        # Table1 (admin)
+        Endpoint("admin_table1_reports", "page", url("admin_table1_reports")),
+        Endpoint("admin_table1_reports_json", "json", url("admin_table1_reports_json")),
+        Endpoint("admin_table1_reports_json:after", "json", url("admin_table1_reports_json", f"after={after}&pos=30")),
+        Endpoint("admin_table1_reports_json:approx", "json", url("admin_table1_reports_json", "total=approx")),
+        Endpoint("admin_table1_reports_json:page", "json", url("admin_table1_reports_json", "page=5")),
+        Endpoint("admin_table1_report_view", "page", url("admin_table1_report_view", date_str=d)),
+        Endpoint("admin_table1_status_detail", "json", url("admin_table1_status_detail", date_str=d)),
+        Endpoint(
+            "admin_table1_station_blocks", "json",
+            url("admin_table1_station_blocks", date_str=d, user_id=station_user_id),
+        ),
+        # Table2 (admin)
+        Endpoint("admin_table2_reports", "page", url("admin_table2_reports")),
+        Endpoint("admin_table2_reports_json", "json", url("admin_table2_reports_json")),
+        Endpoint("admin_table2_reports_json:after", "json", url("admin_table2_reports_json", f"after={after}&pos=30")),
+        Endpoint("admin_table2_day", "page", url("admin_table2_day", date_str=d)),
+        Endpoint("admin_table2_graph", "page", url("admin_table2_graph", date_str=d)),
+        Endpoint("admin_table2_layout", "page", url("admin_table2_layout", date_str=d)),
+        Endpoint("admin_table2_range:month", "page", url("admin_table2_range", f"from_date={month_start}&to_date={d}")),
+        Endpoint("admin_table2_range_json:month", "json", url("admin_table2_range_json", f"from_date={month_start}&to_date={d}")),
+        Endpoint("admin_table2_status_detail", "json", url("admin_table2_status_detail", date_str=d)),
+        Endpoint("admin_table2_station_pick", "page", url("admin_table2_station_pick", date_str=d)),
+        Endpoint(
+            "admin_table2_station_view", "page",
+            url("admin_table2_station_view", date_str=d, user_id=station_user_id),
+        ),
+        # kvartalniy / umumiy
+        Endpoint("kvartalniy_month", "page", url("kvartalniy_month_by_date", month_str=month)),
+        Endpoint("kvartalniy_range:month", "page", url("kvartalniy_um", f"from_date={month_start}&to_date={d}")),
+        Endpoint("kvartalniy_range:year", "page", url("kvartalniy_um", f"from_date={year_start}&to_date={d}")),
+        Endpoint("kvartalniy_monthly_list", "page", url("kvartalniy_monthly_list")),
+        Endpoint("kvartalniy_monthly_list_json", "json", url("kvartalniy_monthly_list_json")),
+        # admin dashboard
+        Endpoint("admin_settings_dashboard_json", "json", url("admin_settings_dashboard_json")),
+        Endpoint("admin_settings_online_users_json", "json", url("admin_settings_online_users_json")),
+        Endpoint("notifications_latest:admin", "json", url("notifications_latest")),
+        # stansiya
+        Endpoint("station_table_1_list", "page", url("station_table_1_list"), as_station=True),
+        Endpoint("station_table_1_view", "page", url("station_table_1_view", date_str=d), as_station=True),
+        Endpoint("station_table_1_edit", "page", url("station_table_1_edit", date_str=d), as_station=True),
+        Endpoint("station_table_2_list", "page", url("station_table_2_list"), as_station=True),
+        Endpoint("station_table_2_view", "page", url("station_table_2_view", date_str=d), as_station=True),
+        Endpoint(
+            "kvartalniy_station_detail", "page",
+            url("kvartalniy_station_detail", f"from_date={year_start}&to_date={d}"),
+            as_station=True,
+        ),
+        Endpoint("notifications_latest:station", "json", url("notifications_latest"), as_station=True),
+        # Excel builder lar
+        *(
+            Endpoint(
+                f"excel:{kind}", "excel", spec["builder"],
+                args=tuple(
+                    {"date": day, "from_date": day.replace(month=1, day=1), "to_date": day}[name]
+                    for name in spec["params"]
+                ),
+            )
+            for kind, spec in EXPORT_KINDS.items()
+        ),
+    ]
+
+
+def clear_report_caches():
+    for alias in REPORT_CACHE_ALIASES:
+        caches[alias].clear()
+
+
+def _call(endpoint: Endpoint, client: Client) -> int:
+    if endpoint.kind == "excel":
+        import_string(endpoint.target)(*endpoint.args).save(io.BytesIO())
+        return 200
+    return client.get(endpoint.target).status_code
+
+
+def _timed(endpoint: Endpoint, client: Client) -> tuple[int, float, int]:
+    with CaptureQueriesContext(connection) as ctx:
+        started = time.perf_counter()
+        status = _call(endpoint, client)
+        elapsed = (time.perf_counter() - started) * 1000
+    return status, elapsed, len(ctx.captured_queries)
+
+
+def measure_endpoint(endpoint: Endpoint, client: Client, runs: int = 3) -> dict:
+    cold, warm = [], []
+    cold_queries = warm_queries = 0
+    status = None
+
+    for _ in range(max(runs, 1)):
+        clear_report_caches()
+        status, elapsed, cold_queries = _timed(endpoint, client)
+        cold.append(elapsed)
+        _status, elapsed, warm_queries = _timed(endpoint, client)
+        warm.append(elapsed)
+
+    return {
+        "kind": endpoint.kind,
+        "status": status,
+        "queries": cold_queries,
+        "warm_queries": warm_queries,
+        "cold_ms": round(statistics.median(cold), 2),
+        "warm_ms": round(statistics.median(warm), 2),
+    }
+
+
+def measure_endpoints(day: date, runs: int = 3, only=None) -> dict:
+    """Joriy bazadagi sintetik ma'lumot ustida barcha endpoint lar: {name: natija}."""
+    admin = User.objects.get(username=SYNTH_ADMIN)
+    station = (
+        User.objects
+        .filter(username__startswith=SYNTH_PREFIX, station_profile__isnull=False)
+        .order_by("username")
+        .first()
+    )
+
+    admin_client, station_client = Client(), Client()
+    admin_client.force_login(admin)
+    station_client.force_login(station)
+
+    results = {}
+    for endpoint in report_endpoints(day, station.id):
+        if only and not any(part in endpoint.name for part in only):
+            continue
+        client = station_client if endpoint.as_station else admin_client
+        results[endpoint.name] = measure_endpoint(endpoint, client, runs=runs)
+    return results
+
+
+def run_scale(stations: int, years: float, runs: int = 3, seed: int = 1, only=None) -> dict:
+    """
+    Vaqtinchalik test bazasida bitta masshtab: generatsiya + o'lchov.
+    Asosiy baza (NAME) ga tegilmaydi.
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        end = timezone.localdate() - timedelta(days=1)
+        started = time.perf_counter()
+        stats = generate_history(stations=stations, years=years, end=end, seed=seed)
+        generate_s = time.perf_counter() - started
+
+        # oxirgi kunlar qisman topshirilgan - "odatdagi" kun sifatida bir necha kun oldini olamiz
+        day = max(end - timedelta(days=3), stats.dates[0])
+        return {
+            "label": scale_label(stations, years),
+            "stations": stations,
+            "years": years,
+            "day": day.isoformat(),
+            "data": stats.as_dict(),
+            "generate_s": round(generate_s, 2),
+            "endpoints": measure_endpoints(day, runs=runs, only=only),
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run_benchmarks(scales, runs: int = 3, seed: int = 1, only=None, progress=None) -> dict:
+    results = {
+        "format": RESULTS_FORMAT_VERSION,
+        "created_at": timezone.now().isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "runs": runs,
+        "seed": seed,
+        "scales": [],
+    }
+    for stations, years in scales:
+        if progress:
+            progress(f"Scale {scale_label(stations, years)} ...")
+        results["scales"].append(run_scale(stations, years, runs=runs, seed=seed, only=only))
+    return results
+
+
+def compare_results(baseline: dict, current: dict, time_threshold: float = DEFAULT_TIME_THRESHOLD) -> list[dict]:
+    """
+    Bir xil masshtab va endpoint lar bo'yicha farqlar. regression=True:
+    so'rovlar soni oshgan yoki cold vaqt time_threshold dan ko'p o'sgan.
+    """
+    base_scales = {scale["label"]: scale for scale in baseline.get("scales", [])}
+    rows = []
+    for scale in current.get("scales", []):
+        base = base_scales.get(scale["label"])
+        if base is None:
+            continue
+        for name, cur in scale["endpoints"].items():
+            old = base["endpoints"].get(name)
+            if old is None:
+                continue
+            ratio = cur["cold_ms"] / old["cold_ms"] - 1 if old["cold_ms"] else 0.0
+            rows.append({
+                "scale": scale["label"],
+                "endpoint": name,
+                "queries": (old["queries"], cur["queries"]),
+                "warm_queries": (old["warm_queries"], cur["warm_queries"]),
+                "cold_ms": (old["cold_ms"], cur["cold_ms"]),
+                "warm_ms": (old["warm_ms"], cur["warm_ms"]),
+                "cold_change": round(ratio, 3),
+                "regression": (
+                    cur["queries"] > old["queries"]
+                    or cur["warm_queries"] > old["warm_queries"]
+                    or ratio > time_threshold
+                ),
+            })
+    return rows
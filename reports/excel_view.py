@@ -1,129 +1,20 @@
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
 
-from accounts.models import StationProfile
-from reports.forms import TABLE1_FIELDS
-from reports.models import StationDailyTable1
-from reports.views import TERMINAL_NAME_KEY, _apply_itogo_rules, _parse_date, _station_display_name, _terminal_blocks_for_station_date, staff_required
-
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-
-
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-
-
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-
-
-DISPLAY_GROUPS = [
-    {
-        "title": "group1",
-        "stations": [
-            "Chuqursoy LM",
-            "Toshkent LM",
-            "Sergeli LM",
-            "Ulug'bek LM",
-            "Marokand LM",
-            "Jaloir LM",
-            "Ohangaron LM",
-            "Nazarbek LM",
-            "Urtavul LM",
-            "Sirdaryo LM",
-            "Jizzax LM",
-            "Ablik LM",
-            "To'ytepa",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group2",
-        "stations": [
-            "Qo'qon LM",
-            "Rovuston LM",
-            "Marg'ilon LM",
-            "Axtachi LM",
-            "Asaka LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group3",
-        "stations": [
-            "Buxoro LM",
-            "Tinchlik LM",
-            "Karmana LM",
-            "Yangi-Zarafshon LM",
-            
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group4",
-        "stations": [
-            "Qarshi LM",
-            "Dehqonobod LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group5",
-        "stations": [
-            "Termiz LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group6",
-        "stations": [
-            "Nukus LM",
-            "Kirkkiz LM",
-            "Urganch LM",
-            "Pitnyak LM",
-        ],
-        "has_veshoz": True,
-    },
-]
-
-from django.http import HttpResponse
-from django.contrib.auth import get_user_model
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+from reports.exports import export_or_enqueue
+from reports.station_groups import get_station_group_index
+from reports.table1_report import get_table1_day_report
+from reports.views import _parse_date, staff_required
+from reports.xlsx import StreamingWorkbook
 
 
 @staff_required
 def admin_table1_report_excel_view(request, date_str):
-    d = _parse_date(date_str)
+    return export_or_enqueue(request, "table1_report", {"date": _parse_date(date_str)})
 
-    User = get_user_model()
-    users = (
-        User.objects
-        .exclude(is_staff=True)
-        .exclude(is_superuser=True)
-        .order_by("username")
-    )
 
-    FIELDS = [key for key, _label in TABLE1_FIELDS]
+def table1_report_workbook(d) -> StreamingWorkbook:
+    report = get_table1_day_report(d)
 
     def _to_int(v):
         if v in (None, "", "—", "-", "–"):
@@ -135,101 +26,38 @@ def admin_table1_report_excel_view(request, date_str):
         except Exception:
             return 0
 
-    def _sum_into(dst: dict, src: dict):
-        for k in FIELDS:
-            dst[k] = dst.get(k, 0) + _to_int(src.get(k, 0))
-
-    def _station_order_index(name):
-        for gi, group in enumerate(DISPLAY_GROUPS):
-            stations = group.get("stations", [])
-            for si, st_name in enumerate(stations):
-                if (st_name or "").strip().lower() == (name or "").strip().lower():
-                    return (gi, si)
-        return (999, (name or "").lower())
-
-    station_list = []
-
-    for u in users:
-        try:
-            sp = StationProfile.objects.select_related("user").get(user=u)
-        except StationProfile.DoesNotExist:
-            continue
-
-        has_night = bool(sp.status)
-
-        sent = StationDailyTable1.objects.filter(
-            station_user=u,
-            date=d,
-            submitted_at__isnull=False,
-        ).exists()
-        if not sent:
-            continue
-
-        blocks = _terminal_blocks_for_station_date(u, d, force_new=False)
-
-        terminals = []
-        for b in blocks:
-            day_obj = StationDailyTable1.objects.filter(
-                station_user=u, date=d, shift="day", block=b
-            ).first()
-            night_obj = StationDailyTable1.objects.filter(
-                station_user=u, date=d, shift="night", block=b
-            ).first()
-
-            day_raw = (day_obj.data or {}) if day_obj else {}
-            night_raw = (night_obj.data or {}) if (night_obj and has_night) else {}
-            day_data = _apply_itogo_rules(day_raw)
-            night_data = _apply_itogo_rules(night_raw, status=True) if has_night else {}
-
-            total_data = {k: 0 for k in FIELDS}
-            _sum_into(total_data, day_data)
-            if has_night:
-                _sum_into(total_data, night_data)
-            total_data = _apply_itogo_rules(total_data)
-
-            term_name = (
-                (day_raw or {}).get(TERMINAL_NAME_KEY)
-                or (night_raw or {}).get(TERMINAL_NAME_KEY)
-                or ""
-            )
-
-            terminals.append({
-                "block": b,
-                "terminal_name": term_name,
-                "day_data": day_data,
-                "night_data": night_data,
-                "total_data": total_data,
-            })
-
-        sum_total = {k: 0 for k in FIELDS}
-        for t in terminals:
-            _sum_into(sum_total, t["day_data"])
-            if has_night:
-                _sum_into(sum_total, t["night_data"])
-        sum_total = _apply_itogo_rules(sum_total)
-
-        station_name = _station_display_name(u)
-
-        station_list.append({
-            "name": station_name,
-            "login": getattr(u, "username", ""),
-            "user_id": u.id,
-            "status": has_night,
-            "terminals": terminals,
-            "sum_total": sum_total,
-            "_order": _station_order_index(station_name),
-        })
+    station_index = get_station_group_index()
+
+    def _station_order_index(st):
+        placement = station_index.by_user.get(st.user_id)
+        if placement:
+            return placement.sort_key
+        return (999, (st.name or "").lower())
+
+    station_list = [
+        {
+            "name": st.name,
+            "status": st.status,
+            "terminals": [
+                {
+                    "terminal_name": t.terminal_name,
+                    "day_data": t.day_data,
+                    "night_data": t.night_data,
+                }
+                for t in st.terminals
+            ],
+            "sum_total": st.sum_total,
+            "_order": _station_order_index(st),
+        }
+        for st in report.submitted_stations
+    ]
 
     station_list.sort(key=lambda x: x["_order"])
 
-    grand_total = {k: 0 for k in FIELDS}
-    for st in station_list:
-        _sum_into(grand_total, st.get("sum_total") or {})
-    grand_total = _apply_itogo_rules(grand_total)
+    grand_total = report.grand_total
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Table1_{d.strftime('%d_%m_%Y')}"
+    book = StreamingWorkbook()
+    ws = book.sheet(f"Table1_{d.strftime('%d_%m_%Y')}")
 
     thin = Side(style="thin", color="B7BDC7")
     medium = Side(style="medium", color="7C8591")
@@ -302,26 +130,23 @@ def admin_table1_report_excel_view(request, date_str):
     ]
 
     for idx, (_, _, width) in enumerate(columns, start=1):
-        ws.column_dimensions[get_column_letter(idx)].width = width
+        ws.column_width(get_column_letter(idx), width)
+    ws.freeze_panes = "D4"
 
     def cell(row, col, value="", font=None, fill=None, border=None, align=None, is_number=False):
-        c = ws.cell(row=row, column=col, value=value)
-        if font:
-            c.font = font
-        if fill:
-            c.fill = fill
-        if border:
-            c.border = border
-        if align:
-            c.alignment = align
-        if is_number:
-            c.number_format = '#,##0'
-        return c
+        return ws.cell(
+            row, col, value,
+            font=font,
+            fill=fill,
+            border=border,
+            alignment=align,
+            number_format='#,##0' if is_number else None,
+        )
 
     def set_range_thick_columns_only(r1, c1, r2, c2):
         for r in range(r1, r2 + 1):
             for c in range(c1, c2 + 1):
-                cur = ws.cell(r, c).border
+                cur = ws.cell(r, c).get("border") or Border()
                 left = cur.left
                 right = cur.right
                 top = cur.top
@@ -332,12 +157,12 @@ def admin_table1_report_excel_view(request, date_str):
                 if c == c2:
                     right = thick
 
-                ws.cell(r, c).border = Border(
+                ws.cell(r, c, border=Border(
                     left=left,
                     right=right,
                     top=top,
                     bottom=bottom,
-                )
+                ))
 
     def fill_for_key(key, is_total=False):
         if is_total:
@@ -364,6 +189,7 @@ def admin_table1_report_excel_view(request, date_str):
     title_text = f"\"O‘ztemiryo‘lkonteyner\" AJ logistika markazlari bo‘yicha sutkalik operativ ma’lumot — {d.strftime('%d.%m.%Y')}"
     ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=last_col)
     cell(row, 1, title_text, font=font_title, align=align_center)
+    ws.row_height(row, 22)
     row += 2
 
     header_row_1 = row
@@ -436,9 +262,7 @@ def admin_table1_report_excel_view(request, date_str):
 
     for r in range(header_row_1, header_row_2 + 1):
         for c in range(1, last_col + 1):
-            ws.cell(r, c).border = border_medium
-            if ws.cell(r, c).alignment is None:
-                ws.cell(r, c).alignment = align_center
+            ws.cell(r, c, border=border_medium)
 
     set_range_thick_columns_only(header_row_1, 6, header_row_2, 12)
     set_range_thick_columns_only(header_row_1, 13, header_row_2, 19)
@@ -446,6 +270,10 @@ def admin_table1_report_excel_view(request, date_str):
     set_range_thick_columns_only(header_row_1, 28, header_row_2, 34)
     set_range_thick_columns_only(header_row_1, 35, header_row_2, 35)
 
+    ws.row_height(header_row_1, 24)
+    ws.row_height(header_row_2, 52)
+    ws.flush(header_row_2 + 1)
+
     row = header_row_2 + 1
     terminal_field_keys = [c[0] for c in columns[3:]]
 
@@ -474,6 +302,7 @@ def admin_table1_report_excel_view(request, date_str):
     if not station_list:
         ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=last_col)
         cell(row, 1, "Нет данных по этой дате", font=font_body, border=border_thin, align=align_center)
+        ws.row_height(row, 19)
         row += 1
     else:
         for st in station_list:
@@ -550,6 +379,10 @@ def admin_table1_report_excel_view(request, date_str):
             set_range_thick_columns_only(station_start_row, 28, end_outline_row, 34)
             set_range_thick_columns_only(station_start_row, 35, end_outline_row, 35)
 
+            for r in range(station_start_row, row):
+                ws.row_height(r, 20 if show_total_row and r == end_outline_row else 19)
+            ws.flush(row)
+
         cell(row, 1, "Umumiy", font=font_total, fill=fill_total, border=border_medium, align=align_left)
         cell(row, 2, "", font=font_total, fill=fill_total, border=border_medium, align=align_center)
         cell(row, 3, "", font=font_total, fill=fill_total, border=border_medium, align=align_center)
@@ -572,24 +405,9 @@ def admin_table1_report_excel_view(request, date_str):
         set_range_thick_columns_only(row, 21, row, 27)
         set_range_thick_columns_only(row, 28, row, 34)
         set_range_thick_columns_only(row, 35, row, 35)
+        ws.row_height(row, 20)
         row += 1
 
-    ws.row_dimensions[1].height = 22
-    ws.row_dimensions[header_row_1].height = 24
-    ws.row_dimensions[header_row_2].height = 52
-
-    for r in range(header_row_2 + 1, row):
-        if ws.cell(r, 2).value == "jami" or ws.cell(r, 1).value == "Umumiy":
-            ws.row_dimensions[r].height = 20
-        else:
-            ws.row_dimensions[r].height = 19
-
-    ws.freeze_panes = "D4"
+    ws.flush()
 
-    filename = f'admin_table1_{d.strftime("%Y_%m_%d")}.xlsx'
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
\ No newline at end of file
+    return book
\ No newline at end of file
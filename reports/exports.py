@@ -0,0 +1,400 @@
+"""
+Excel eksportlar navbati.
+
+Eksport view lari faylni o'zi qurmaydi: export_or_enqueue() avval diskdagi artifact
+cache ni tekshiradi, topilmasa ExportJob yaratadi va foydalanuvchini kutish sahifasiga
+yuboradi. Faylni alohida jarayon - `manage.py run_export_worker` quradi, shuning uchun
+katta eksport gunicorn worker larini band qilmaydi.
+
+Artifact nomi: eksport turi + parametrlar + fingerprint. Fingerprint eksport o'qiydigan
+ReportDataVersion kalitlari versiyalaridan hisoblanadi - ma'lumot o'zgarmagan bo'lsa
+takroriy eksport tayyor fayldan darhol beriladi.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_POST
+
+from .models import ExportJob
+from .versions import (
+    STATIONS_VERSION_KEY,
+    get_table2_versions_between,
+    get_versions,
+    table1_version_key,
+    table2_version_key,
+)
+from .xlsx import XLSX_CONTENT_TYPE
+
+
+# eksport fayl tuzilishi o'zgarganda oshiring - eski artifact lar ishlatilmay qoladi
+EXPORT_FORMAT_VERSION = 1
+
+# shu vaqtdan ko'p "running" holatida turgan job (worker o'chib qolgan) qayta navbatga qo'yiladi
+STALE_JOB_TIMEOUT = timedelta(minutes=30)
+
+
+def _table1_day_versions(params) -> dict:
+    return get_versions([table1_version_key(params["date"]), STATIONS_VERSION_KEY])
+
+
+def _table2_day_versions(params) -> dict:
+    return get_versions([table2_version_key(params["date"]), STATIONS_VERSION_KEY])
+
+
+def _kvartalniy_range_versions(params) -> dict:
+    # oraliq sana kalitlari ro'yxat emas, BETWEEN bilan o'qiladi (sahifa cache i bilan bir xil)
+    from .umumiy import kvartalniy_range_versions
+
+    return kvartalniy_range_versions(params["from_date"], params["to_date"])
+
+
+def _table2_range_versions(params) -> dict:
+    d_from, d_to = sorted((params["from_date"], params["to_date"]))
+    return get_table2_versions_between([(d_from, d_to)], keys=[STATIONS_VERSION_KEY])
+
+
+EXPORT_KINDS = {
+    "table1_day": {
+        "builder": "reports.views.table1_export_workbook",
+        "params": ("date",),
+        "filename": "table1_like_site_{date:%Y-%m-%d}.xlsx",
+        "versions": _table1_day_versions,
+        "superuser_only": False,
+    },
+    "table1_report": {
+        "builder": "reports.excel_view.table1_report_workbook",
+        "params": ("date",),
+        "filename": "admin_table1_{date:%Y_%m_%d}.xlsx",
+        "versions": _table1_day_versions,
+        "superuser_only": False,
+    },
+    "table2_layout": {
+        "builder": "reports.views.table2_layout_workbook",
+        "params": ("date",),
+        "filename": "maket_table2_{date:%Y_%m_%d}.xlsx",
+        "versions": _table2_day_versions,
+        "superuser_only": False,
+    },
+    "table2_range": {
+        "builder": "reports.table2_range.table2_range_workbook",
+        "params": ("from_date", "to_date"),
+        "filename": "table2_range_{from_date}_{to_date}.xlsx",
+        "versions": _table2_range_versions,
+        "superuser_only": False,
+    },
+    "kvartalniy_range": {
+        "builder": "reports.umumiy.kvartalniy_range_workbook",
+        "params": ("from_date", "to_date"),
+        "filename": "kvartalniy_range_{from_date}_{to_date}.xlsx",
+        "versions": _kvartalniy_range_versions,
+        "superuser_only": True,
+    },
+}
+
+
+# =========================
+# params / artifact
+# =========================
+
+def _dump_params(kind: str, params: dict) -> dict:
+    return {name: params[name].isoformat() for name in EXPORT_KINDS[kind]["params"]}
+
+
+def _load_params(kind: str, raw: dict) -> dict:
+    """JSON (yoki POST) dagi 'YYYY-MM-DD' qiymatlarni date ga o'giradi; xato bo'lsa ValueError."""
+    out = {}
+    for name in EXPORT_KINDS[kind]["params"]:
+        value = raw.get(name)
+        if isinstance(value, date):
+            out[name] = value
+        else:
+            out[name] = datetime.strptime(str(value or ""), "%Y-%m-%d").date()
+    return out
+
+
+def export_fingerprint(kind: str, params: dict) -> str:
+    versions = EXPORT_KINDS[kind]["versions"](params)
+    payload = json.dumps(
+        [EXPORT_FORMAT_VERSION, kind, _dump_params(kind, params), sorted(versions.items())],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def export_filename(kind: str, params: dict) -> str:
+    return EXPORT_KINDS[kind]["filename"].format(**params)
+
+
+def _artifact_name(kind: str, params: dict, fingerprint: str) -> str:
+    stem = "_".join(_dump_params(kind, params).values())
+    return f"{kind}/{stem}_{fingerprint[:20]}.xlsx"
+
+
+def _artifact_path(name: str) -> Path:
+    return Path(settings.EXPORT_ROOT) / name
+
+
+def _artifact_response(name: str, filename: str) -> FileResponse:
+    # FileNotFoundError ni chaqiruvchi ushlaydi (artifact prune bilan o'chgan bo'lishi mumkin)
+    return FileResponse(
+        open(_artifact_path(name), "rb"),
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def _can_export(user, kind: str) -> bool:
+    if not (user.is_staff or user.is_superuser):
+        return False
+    return user.is_superuser or not EXPORT_KINDS[kind]["superuser_only"]
+
+
+# =========================
+# queue
+# =========================
+
+def _enqueue(kind: str, params: dict, fingerprint: str, user) -> ExportJob:
+    # xuddi shu ma'lumot uchun navbatdagi job bo'lsa, ikkinchisi qo'shilmaydi
+    pending = (
+        ExportJob.objects
+        .filter(kind=kind, fingerprint=fingerprint, status__in=(ExportJob.STATUS_QUEUED, ExportJob.STATUS_RUNNING))
+        .order_by("id")
+        .first()
+    )
+    if pending:
+        return pending
+
+    return ExportJob.objects.create(
+        kind=kind,
+        params=_dump_params(kind, params),
+        fingerprint=fingerprint,
+        requested_by=user if user.is_authenticated else None,
+    )
+
+
+def request_export(kind: str, params: dict, user) -> ExportJob:
+    """
+    Artifact tayyor bo'lsa darhol "done" job, aks holda navbatdagi job qaytaradi.
+    """
+    fingerprint = export_fingerprint(kind, params)
+    name = _artifact_name(kind, params, fingerprint)
+
+    if _artifact_path(name).is_file():
+        now = timezone.now()
+        return ExportJob.objects.create(
+            kind=kind,
+            params=_dump_params(kind, params),
+            fingerprint=fingerprint,
+            status=ExportJob.STATUS_DONE,
+            artifact=name,
+            requested_by=user if user.is_authenticated else None,
+            started_at=now,
+            finished_at=now,
+        )
+
+    return _enqueue(kind, params, fingerprint, user)
+
+
+def export_or_enqueue(request, kind: str, params: dict):
+    """
+    Eski eksport URL lari uchun: tayyor artifact bo'lsa faylni beradi,
+    bo'lmasa job yaratib kutish sahifasiga yo'naltiradi. Ruxsat export_job_create dagidek
+    tekshiriladi - view dekoratori tushib qolsa ham fayl begonaga berilmaydi.
+    """
+    if not _can_export(request.user, kind):
+        return HttpResponseForbidden("forbidden")
+
+    fingerprint = export_fingerprint(kind, params)
+    name = _artifact_name(kind, params, fingerprint)
+
+    try:
+        return _artifact_response(name, export_filename(kind, params))
+    except FileNotFoundError:
+        pass
+
+    job = _enqueue(kind, params, fingerprint, request.user)
+    return redirect("export_job_page", job_id=job.id)
+
+
+def claim_next_job():
+    """Eng eski navbatdagi job ni "running" qiladi. Bir nechta worker bo'lsa ham bitta job bitta worker ga tegadi."""
+    for job_id in (
+        ExportJob.objects
+        .filter(status=ExportJob.STATUS_QUEUED)
+        .order_by("created_at", "id")
+        .values_list("id", flat=True)[:10]
+    ):
+        claimed = (
+            ExportJob.objects
+            .filter(pk=job_id, status=ExportJob.STATUS_QUEUED)
+            .update(status=ExportJob.STATUS_RUNNING, started_at=timezone.now())
+        )
+        if claimed:
+            return ExportJob.objects.get(pk=job_id)
+    return None
+
+
+def run_export_job(job: ExportJob) -> bool:
+    spec = EXPORT_KINDS.get(job.kind)
+
+    try:
+        if spec is None:
+            raise ValueError(f"Unknown export kind: {job.kind}")
+
+        params = _load_params(job.kind, job.params)
+        # job navbatda turganda ma'lumot o'zgargan bo'lishi mumkin. Fingerprint qurishdan
+        # oldin olinadi: fayl hech qachon o'z kalitidan eski ma'lumotni saqlamaydi.
+        fingerprint = export_fingerprint(job.kind, params)
+        name = _artifact_name(job.kind, params, fingerprint)
+        path = _artifact_path(name)
+
+        if not path.is_file():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            book = import_string(spec["builder"])(*(params[name] for name in spec["params"]))
+
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".part")
+            os.close(fd)
+            try:
+                book.save(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+    except Exception:
+        ExportJob.objects.filter(pk=job.pk).update(
+            status=ExportJob.STATUS_FAILED,
+            error=traceback.format_exc()[-4000:],
+            finished_at=timezone.now(),
+        )
+        return False
+
+    ExportJob.objects.filter(pk=job.pk).update(
+        status=ExportJob.STATUS_DONE,
+        fingerprint=fingerprint,
+        artifact=name,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale_jobs() -> int:
+    return (
+        ExportJob.objects
+        .filter(status=ExportJob.STATUS_RUNNING, started_at__lt=timezone.now() - STALE_JOB_TIMEOUT)
+        .update(status=ExportJob.STATUS_QUEUED, started_at=None)
+    )
+
+
+def prune_exports(max_age: timedelta) -> tuple[int, int]:
+    """
+    max_age dan eski artifact fayllar va tugagan job larni o'chiradi.
+    Natija: (o'chirilgan fayllar, o'chirilgan job lar)
+    """
+    root = Path(settings.EXPORT_ROOT)
+    cutoff = time.time() - max_age.total_seconds()
+
+    files = 0
+    if root.is_dir():
+        for path in root.rglob("*"):
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                files += 1
+
+    jobs, _ = (
+        ExportJob.objects
+        .filter(
+            status__in=(ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED),
+            created_at__lt=timezone.now() - max_age,
+        )
+        .delete()
+    )
+    return files, jobs
+
+
+# =========================
+# views
+# =========================
+
+def _job_payload(job: ExportJob) -> dict:
+    payload = {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "status_url": reverse("export_job_status", kwargs={"job_id": job.id}),
+        "download_url": None,
+        "error": None,
+    }
+    if job.status == ExportJob.STATUS_DONE:
+        payload["download_url"] = reverse("export_job_download", kwargs={"job_id": job.id})
+    if job.status == ExportJob.STATUS_FAILED:
+        payload["error"] = "Eksportni tayyorlab bo'lmadi"
+    return payload
+
+
+def _get_job_for(request, job_id: int) -> ExportJob:
+    job = get_object_or_404(ExportJob, pk=job_id)
+    if job.kind not in EXPORT_KINDS or not _can_export(request.user, job.kind):
+        raise Http404("Export not found")
+    return job
+
+
+@login_required
+@require_POST
+def export_job_create(request):
+    kind = (request.POST.get("kind") or "").strip()
+    if kind not in EXPORT_KINDS:
+        return JsonResponse({"detail": "unknown kind"}, status=400)
+    if not _can_export(request.user, kind):
+        return JsonResponse({"detail": "forbidden"}, status=403)
+
+    try:
+        params = _load_params(kind, request.POST)
+    except ValueError:
+        return JsonResponse({"detail": "bad params"}, status=400)
+
+    job = request_export(kind, params, request.user)
+    return JsonResponse(_job_payload(job), status=200 if job.status == ExportJob.STATUS_DONE else 202)
+
+
+@login_required
+def export_job_status(request, job_id: int):
+    return JsonResponse(_job_payload(_get_job_for(request, job_id)))
+
+
+@login_required
+def export_job_download(request, job_id: int):
+    job = _get_job_for(request, job_id)
+    if job.status != ExportJob.STATUS_DONE:
+        return redirect("export_job_page", job_id=job.id)
+
+    try:
+        return _artifact_response(job.artifact, export_filename(job.kind, _load_params(job.kind, job.params)))
+    except FileNotFoundError:
+        raise Http404("Export file expired")
+
+
+@login_required
+def export_job_page(request, job_id: int):
+    job = _get_job_for(request, job_id)
+    return render(request, "export_job.html", {
+        "job": job,
+        "job_json": _job_payload(job),
+        "filename": export_filename(job.kind, _load_params(job.kind, job.params)),
+    })
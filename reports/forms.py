@@ -44,6 +44,9 @@ TABLE1_FIELDS = [
     ('income_daily', 'Суточные доходы'),
 ]
 
+# terminal (blok) nomi data ichida shu kalit bilan saqlanadi
+TERMINAL_NAME_KEY = "terminal_name"
+
 class StationTable1Form(forms.Form):
     date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
     shift = forms.ChoiceField(choices=(('day','день'),('night','ночь'),('total','итог')))
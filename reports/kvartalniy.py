@@ -2,7 +2,8 @@ from calendar import monthrange
 from datetime import date, datetime
 from urllib.parse import urlencode
 from django.core.paginator import Paginator
-from django.db.models import Count, Q
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 
 from django.contrib import messages
 from django.db import transaction
@@ -10,7 +11,17 @@ from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
 
-from .models import StationDailyTable1
+from .aggregates import (
+    _same_day_last_year,
+    aggregate_table1_between,
+    aggregate_table1_closed_period,
+    date_intervals,
+    last_year_intervals,
+)
+from .models import Table1MonthlyRollup
+from .report_cache import cached_report
+from .station_groups import VESHOZ_GROUP_KEYS, get_station_group_index
+from .versions import STATIONS_VERSION_KEY, bump_versions, get_table1_versions_between, kvartalniy_plan_version_key
 from accounts.models import (
     KvartalniyGroupExtraPlan,
     KvartalniyMonthly,
@@ -19,73 +30,17 @@ from accounts.models import (
 )
 
 
-DISPLAY_GROUPS = [
-    {
-        "title": "group1",
-        "stations": [
-            "Chuqursoy LM",
-            "Toshkent LM",
-            "Sergeli LM",
-            "Jaloir LM",
-            "Ohangaron LM",
-            "Nazarbek LM",
-            "Urtavul LM",
-            "Sirdaryo LM",
-            "Jizzax LM",
-            "Ablik LM",
-            "To'ytepa",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group2",
-        "stations": [
-            "Qo'qon LM",
-            "Rovuston LM",
-            "Marg'ilon LM",
-            "Axtachi LM",
-            "Asaka LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group3",
-        "stations": [
-            "Buxoro LM",
-            "Tinchlik LM",
-            "Karmana LM",
-            "Yangi-Zarafshon LM",
-            "Ulug'bek LM",
-            "Marokand LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group4",
-        "stations": [
-            "Qarshi LM",
-            "Dehqonobod LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group5",
-        "stations": [
-            "Termiz LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "group6",
-        "stations": [
-            "Nukus LM",
-            "Kirkkiz LM",
-            "Urganch LM",
-            "Pitnyak LM",
-        ],
-        "has_veshoz": True,
-    },
-]
+# KvartalniyMonthlyPlan / KvartalniyGroupExtraPlan ning formadan saqlanadigan ustunlari
+STATION_PLAN_FIELDS = ("pogr_plan", "vygr_plan", "pogr_kont_plan", "vygr_kont_plan", "income_plan")
+VESHOZ_PLAN_FIELDS = STATION_PLAN_FIELDS + (
+    # manual fact fields for veshoz row
+    "pogr_this_year", "pogr_last_year",
+    "vygr_this_year", "vygr_last_year",
+    "pogr_kont_this_year", "pogr_kont_last_year",
+    "vygr_kont_this_year", "vygr_kont_last_year",
+    "income_this_year", "income_last_year",
+)
+VESHOZ_ROW_NAME = "Boshqa Stansiya"
 
 
 def _safe_date(date_str, fallback):
@@ -117,33 +72,6 @@ def _safe_int(value, default=0):
         return default
 
 
-def _same_day_last_year(dt):
-    try:
-        return dt.replace(year=dt.year - 1)
-    except ValueError:
-        return dt.replace(year=dt.year - 1, day=28)
-
-
-def _get_station_profile_from_user(user):
-    return StationProfile.objects.get(user=user)
-
-
-def _normalize_station_name(value: str) -> str:
-    if not value:
-        return ""
-    return (
-        str(value)
-        .strip()
-        .replace("’", "'")
-        .replace("‘", "'")
-        .replace("`", "'")
-        .replace("ʻ", "'")
-        .replace("ʼ", "'")
-        .replace("  ", " ")
-        .lower()
-    )
-
-
 def _build_dates_for_selected_days(selected_month: date, selected_days: list[int]) -> list[date]:
     result = []
     max_day = monthrange(selected_month.year, selected_month.month)[1]
@@ -193,69 +121,20 @@ def _selected_month_and_days(request, month_str=None):
     return selected_month, selected_days, month_days
 
 
-def _payload_to_metrics(payload: dict) -> dict:
-    payload = payload or {}
-    return {
-        "pogr": _safe_int(payload.get("pogr_itogo", 0)),
-        "vygr": _safe_int(payload.get("vygr_itogo", 0)),
-        "pogr_kont": _safe_int(payload.get("pogr_itogo_kon", 0)),
-        "vygr_kont": _safe_int(payload.get("vygr_itogo_kon", 0)),
-        "income": _safe_int(payload.get("income_daily", 0)),
-    }
-
-
-def _aggregate_table1_by_station(date_list: list[date]) -> dict:
-    if not date_list:
-        return {}
-
-    qs = (
-        StationDailyTable1.objects
-        .filter(date__in=date_list)
-        .select_related("station_user")
-        .exclude(shift="total")
-    )
-
-    station_map = {}
-
-    for obj in qs:
-        try:
-            station = _get_station_profile_from_user(obj.station_user)
-        except StationProfile.DoesNotExist:
-            continue
-
-        metrics = _payload_to_metrics(obj.data or {})
-
-        if station.id not in station_map:
-            station_map[station.id] = {
-                "station": station,
-                "pogr": 0,
-                "vygr": 0,
-                "pogr_kont": 0,
-                "vygr_kont": 0,
-                "income": 0,
-            }
-
-        station_map[station.id]["pogr"] += metrics["pogr"]
-        station_map[station.id]["vygr"] += metrics["vygr"]
-        station_map[station.id]["pogr_kont"] += metrics["pogr_kont"]
-        station_map[station.id]["vygr_kont"] += metrics["vygr_kont"]
-        station_map[station.id]["income"] += metrics["income"]
-
-    return station_map
-
 def _current_and_last_maps_for_dates(current_dates):
     last_year_dates = [_same_day_last_year(d) for d in current_dates]
-    current_map = _aggregate_table1_by_station(current_dates)
-    last_map = _aggregate_table1_by_station(last_year_dates)
+    current_intervals = date_intervals(current_dates)
+    current_map = aggregate_table1_between(current_intervals)
+    last_map = aggregate_table1_closed_period(last_year_intervals(current_intervals))
     return current_map, last_map, last_year_dates
 
-def _group_plans_by_station(monthly_obj):
-    qs = KvartalniyMonthlyPlan.objects.filter(monthly=monthly_obj).select_related("station")
+def _group_plans_by_station(month: date):
+    qs = KvartalniyMonthlyPlan.objects.filter(monthly__date=month).select_related("station")
     return {obj.station_id: obj for obj in qs}
 
 
-def _group_extra_plans_by_key(monthly_obj):
-    qs = KvartalniyGroupExtraPlan.objects.filter(monthly=monthly_obj)
+def _group_extra_plans_by_key(month: date):
+    qs = KvartalniyGroupExtraPlan.objects.filter(monthly__date=month)
     return {f"{x.group_key}:{x.row_name}": x for x in qs}
 
 
@@ -417,7 +296,80 @@ def _redirect_with_selection(request, selected_month, selected_days):
 
 
 
-@transaction.atomic
+def _apply_posted_fields(obj, post, fields, prefix="", suffix="") -> bool:
+    """POST dagi qiymatlarni obj ga yozadi (bo'sh/yo'q bo'lsa eskisi qoladi). O'zgargan bo'lsa True."""
+    changed = False
+    for field in fields:
+        old = getattr(obj, field)
+        new = _safe_int(post.get(f"{prefix}{field}_{suffix}"), old)
+        if new != old:
+            setattr(obj, field, new)
+            changed = True
+    return changed
+
+
+def _save_month_plans(monthly_obj, post) -> int:
+    """
+    Oy rejalarini saqlaydi: mavjud qatorlar bitta so'rovda o'qiladi, POST bilan
+    solishtiriladi va faqat yangi/o'zgarganlari bulk_create/bulk_update bilan yoziladi.
+    Natija - yozilgan qatorlar soni.
+    """
+    written = 0
+
+    # station monthly plans (template hidden station_ids yuboradi)
+    posted_ids = {int(x) for x in post.getlist("station_ids") if x.isdigit()}
+    station_ids = list(
+        StationProfile.objects.filter(id__in=posted_ids)
+        .order_by("station_name")
+        .values_list("id", flat=True)
+    )
+    plans = {
+        p.station_id: p
+        for p in KvartalniyMonthlyPlan.objects.filter(monthly=monthly_obj, station_id__in=station_ids)
+    }
+
+    to_create, to_update = [], []
+    for sid in station_ids:
+        obj = plans.get(sid)
+        if obj is None:
+            obj = KvartalniyMonthlyPlan(monthly=monthly_obj, station_id=sid)
+            _apply_posted_fields(obj, post, STATION_PLAN_FIELDS, suffix=sid)
+            to_create.append(obj)
+        elif _apply_posted_fields(obj, post, STATION_PLAN_FIELDS, suffix=sid):
+            to_update.append(obj)
+
+    KvartalniyMonthlyPlan.objects.bulk_create(to_create)
+    KvartalniyMonthlyPlan.objects.bulk_update(to_update, STATION_PLAN_FIELDS)
+    written += len(to_create) + len(to_update)
+
+    # veshoz / Boshqa Stansiya rows
+    group_keys = VESHOZ_GROUP_KEYS
+    extras = {
+        x.group_key: x
+        for x in KvartalniyGroupExtraPlan.objects.filter(
+            monthly=monthly_obj,
+            group_key__in=group_keys,
+            row_name=VESHOZ_ROW_NAME,
+        )
+    }
+
+    to_create, to_update = [], []
+    for group_key in group_keys:
+        obj = extras.get(group_key)
+        if obj is None:
+            obj = KvartalniyGroupExtraPlan(monthly=monthly_obj, group_key=group_key, row_name=VESHOZ_ROW_NAME)
+            _apply_posted_fields(obj, post, VESHOZ_PLAN_FIELDS, prefix="veshoz_", suffix=group_key)
+            to_create.append(obj)
+        elif _apply_posted_fields(obj, post, VESHOZ_PLAN_FIELDS, prefix="veshoz_", suffix=group_key):
+            to_update.append(obj)
+
+    KvartalniyGroupExtraPlan.objects.bulk_create(to_create)
+    KvartalniyGroupExtraPlan.objects.bulk_update(to_update, VESHOZ_PLAN_FIELDS)
+    written += len(to_create) + len(to_update)
+
+    return written
+
+
 def kvartalniy(request, month_str=None):
     if not request.user.is_superuser:
         return redirect("station_table_1_list")
@@ -428,137 +380,59 @@ def kvartalniy(request, month_str=None):
     if not current_dates:
         current_dates = [selected_month.replace(day=1)]
 
-    selected_count = len(current_dates)
-    all_selected = selected_count == month_days
-
-    monthly_obj, _ = KvartalniyMonthly.objects.get_or_create(date=selected_month)
-
     if request.method == "POST" and request.POST.get("save") == "1":
-        # station monthly plans
-        for station in StationProfile.objects.all().order_by("station_name"):
-            sid = str(station.id)
-
-            # template sends hidden station_ids, so no need for station_enabled_<id>
-            if sid not in request.POST.getlist("station_ids"):
-                continue
-
-            obj, _ = KvartalniyMonthlyPlan.objects.get_or_create(
-                monthly=monthly_obj,
-                station=station,
-            )
-
-            obj.pogr_plan = _safe_int(request.POST.get(f"pogr_plan_{sid}"), obj.pogr_plan)
-            obj.vygr_plan = _safe_int(request.POST.get(f"vygr_plan_{sid}"), obj.vygr_plan)
-            obj.pogr_kont_plan = _safe_int(request.POST.get(f"pogr_kont_plan_{sid}"), obj.pogr_kont_plan)
-            obj.vygr_kont_plan = _safe_int(request.POST.get(f"vygr_kont_plan_{sid}"), obj.vygr_kont_plan)
-            obj.income_plan = _safe_int(request.POST.get(f"income_plan_{sid}"), obj.income_plan)
-            obj.save()
-
-        # veshoz / Boshqa Stansiya rows
-        for cfg in DISPLAY_GROUPS:
-            if not cfg.get("has_veshoz"):
-                continue
-
-            group_key = cfg["title"]
-            row_name = "Boshqa Stansiya"
-
-            obj, _ = KvartalniyGroupExtraPlan.objects.get_or_create(
-                monthly=monthly_obj,
-                group_key=group_key,
-                row_name=row_name,
-            )
-
-            # plan fields
-            obj.pogr_plan = _safe_int(
-                request.POST.get(f"veshoz_pogr_plan_{group_key}"),
-                obj.pogr_plan,
-            )
-            obj.vygr_plan = _safe_int(
-                request.POST.get(f"veshoz_vygr_plan_{group_key}"),
-                obj.vygr_plan,
-            )
-            obj.pogr_kont_plan = _safe_int(
-                request.POST.get(f"veshoz_pogr_kont_plan_{group_key}"),
-                obj.pogr_kont_plan,
-            )
-            obj.vygr_kont_plan = _safe_int(
-                request.POST.get(f"veshoz_vygr_kont_plan_{group_key}"),
-                obj.vygr_kont_plan,
-            )
-            obj.income_plan = _safe_int(
-                request.POST.get(f"veshoz_income_plan_{group_key}"),
-                obj.income_plan,
-            )
-
-            # manual fact fields for veshoz row
-            obj.pogr_this_year = _safe_int(
-                request.POST.get(f"veshoz_pogr_this_year_{group_key}"),
-                obj.pogr_this_year,
-            )
-            obj.pogr_last_year = _safe_int(
-                request.POST.get(f"veshoz_pogr_last_year_{group_key}"),
-                obj.pogr_last_year,
-            )
+        # KvartalniyMonthly faqat saqlashda yaratiladi - GET hech narsa yozmaydi
+        with transaction.atomic():
+            monthly_obj, _ = KvartalniyMonthly.objects.get_or_create(date=selected_month)
+            if _save_month_plans(monthly_obj, request.POST):
+                bump_versions([kvartalniy_plan_version_key(monthly_obj.date)])
 
-            obj.vygr_this_year = _safe_int(
-                request.POST.get(f"veshoz_vygr_this_year_{group_key}"),
-                obj.vygr_this_year,
-            )
-            obj.vygr_last_year = _safe_int(
-                request.POST.get(f"veshoz_vygr_last_year_{group_key}"),
-                obj.vygr_last_year,
-            )
+        messages.success(request, "Saved successfully.")
+        return _redirect_with_selection(request, selected_month, selected_days)
 
-            obj.pogr_kont_this_year = _safe_int(
-                request.POST.get(f"veshoz_pogr_kont_this_year_{group_key}"),
-                obj.pogr_kont_this_year,
-            )
-            obj.pogr_kont_last_year = _safe_int(
-                request.POST.get(f"veshoz_pogr_kont_last_year_{group_key}"),
-                obj.pogr_kont_last_year,
-            )
+    context = _kvartalniy_month_context(selected_month, selected_days, month_days, current_dates)
+    return render(request, "kvartalniy_umumlashgan.html", context)
 
-            obj.vygr_kont_this_year = _safe_int(
-                request.POST.get(f"veshoz_vygr_kont_this_year_{group_key}"),
-                obj.vygr_kont_this_year,
-            )
-            obj.vygr_kont_last_year = _safe_int(
-                request.POST.get(f"veshoz_vygr_kont_last_year_{group_key}"),
-                obj.vygr_kont_last_year,
-            )
 
-            obj.income_this_year = _safe_int(
-                request.POST.get(f"veshoz_income_this_year_{group_key}"),
-                obj.income_this_year,
-            )
-            obj.income_last_year = _safe_int(
-                request.POST.get(f"veshoz_income_last_year_{group_key}"),
-                obj.income_last_year,
-            )
+def _kvartalniy_month_context(selected_month, selected_days, month_days, current_dates):
+    """
+    _build_kvartalniy_month_context() natijasi cache dan. Kalit: oy, tanlangan kunlar va
+    shu kunlar + o'tgan yilning shu kunlari Table1 versiyalari, oy rejasi va stansiyalar
+    versiyasi - boshqa sana yoki oy tahrirlansa bu natija cache da qoladi.
+    """
+    current_intervals = date_intervals(current_dates)
+    versions = get_table1_versions_between(
+        current_intervals + last_year_intervals(current_intervals),
+        keys=[STATIONS_VERSION_KEY, kvartalniy_plan_version_key(selected_month)],
+    )
+    params = f"{selected_month:%Y-%m}:" + ",".join(str(d.day) for d in current_dates)
+    return cached_report(
+        "kvartalniy_month",
+        params,
+        versions,
+        lambda: _build_kvartalniy_month_context(selected_month, selected_days, month_days, current_dates),
+    )
 
-            obj.save()
 
-        messages.success(request, "Saved successfully.")
-        return _redirect_with_selection(request, selected_month, selected_days)
+def _build_kvartalniy_month_context(selected_month, selected_days, month_days, current_dates):
+    selected_count = len(current_dates)
+    all_selected = selected_count == month_days
 
     current_map, last_map, prev_dates = _current_and_last_maps_for_dates(current_dates)
-    plans_by_station = _group_plans_by_station(monthly_obj)
-    extras_by_key = _group_extra_plans_by_key(monthly_obj)
+    plans_by_station = _group_plans_by_station(selected_month)
+    extras_by_key = _group_extra_plans_by_key(selected_month)
 
-    stations_qs = StationProfile.objects.all().order_by("station_name")
-    stations_by_name = {_normalize_station_name(x.station_name): x for x in stations_qs}
+    station_index = get_station_group_index()
 
     groups = []
     grand_total = _make_zero_totals("ИТОГО")
-    known_station_names = set()
 
-    for idx, cfg in enumerate(DISPLAY_GROUPS, start=1):
+    for group in station_index.groups:
         group_rows = []
         subtotal = _make_zero_totals("ИТОГО")
 
-        for station_name in cfg["stations"]:
-            known_station_names.add(_normalize_station_name(station_name))
-            station = stations_by_name.get(_normalize_station_name(station_name))
+        for slot in group.slots:
+            station = slot.station
 
             if station:
                 row = _row_to_period_dict(
@@ -572,19 +446,19 @@ def kvartalniy(request, month_str=None):
                 )
             else:
                 row = _make_empty_period_row(
-                    station_name=station_name,
+                    station_name=slot.name,
                     selected_count=selected_count,
                     month_days=month_days,
                     all_selected=all_selected,
                 )
 
-            row["group_key"] = cfg["title"]
+            row["group_key"] = group.key
             group_rows.append(row)
             _add_to_totals(subtotal, row)
             _add_to_totals(grand_total, row)
 
-        if cfg.get("has_veshoz"):
-            extra_obj = extras_by_key.get(f"{cfg['title']}:Boshqa Stansiya")
+        if group.has_veshoz:
+            extra_obj = extras_by_key.get(f"{group.key}:Boshqa Stansiya")
 
             extra_row = _row_to_period_dict(
                 station=type("DummyStation", (), {"id": None, "station_name": "Boshqa Stansiya"})(),
@@ -627,7 +501,7 @@ def kvartalniy(request, month_str=None):
                 extra_row["income_last_year_raw"] = extra_obj.income_last_year
 
             extra_row["is_veshoz"] = True
-            extra_row["group_key"] = cfg["title"]
+            extra_row["group_key"] = group.key
             extra_row["is_editable"] = all_selected
 
             group_rows.append(extra_row)
@@ -635,8 +509,8 @@ def kvartalniy(request, month_str=None):
             _add_to_totals(grand_total, extra_row)
 
         groups.append({
-            "index": idx,
-            "title": cfg["title"],
+            "index": group.index,
+            "title": group.key,
             "rows": group_rows,
             "subtotal": subtotal,
         })
@@ -644,10 +518,7 @@ def kvartalniy(request, month_str=None):
     unmatched_rows = []
     unmatched_total = _make_zero_totals("ИТОГО")
 
-    for station_name_norm, station in stations_by_name.items():
-        if station_name_norm in known_station_names:
-            continue
-
+    for station in station_index.unmatched:
         row = _row_to_period_dict(
             station=station,
             fact_this=current_map.get(station.id),
@@ -690,8 +561,7 @@ def kvartalniy(request, month_str=None):
         "selected_days_count": selected_count,
         "month_days_count": month_days,
     }
-    print(context)
-    return render(request, "kvartalniy_umumlashgan.html", context)
+    return context
 
 
 def _read_int(value, default=None):
@@ -713,7 +583,45 @@ def _safe_month_param(month_str):
         return datetime.strptime(str(month_str).strip(), "%Y-%m").date().replace(day=1)
     except Exception:
         return None
-@transaction.atomic
+
+
+def _month_catalogue(year=None):
+    """
+    Table1 ma'lumoti bor oylar (yangisidan eskisiga), har biri uchun facts_count
+    (day/night qatorlar), plans_count va extras_count - bitta so'rovda.
+
+    facts_count Table1MonthlyRollup.rows_count dan olinadi, shuning uchun so'rov
+    narxi StationDailyTable1 hajmiga emas, stansiya x oy soniga bog'liq.
+    Paginator ga beriladi: count() va LIMIT/OFFSET bazada bajariladi.
+    """
+    def count_for_month(model):
+        return Coalesce(
+            Subquery(
+                model.objects
+                .filter(monthly__date=OuterRef("month"))
+                .order_by()
+                .values("monthly")
+                .annotate(n=Count("id"))
+                .values("n")[:1]
+            ),
+            0,
+        )
+
+    qs = Table1MonthlyRollup.objects.exclude(shift="total")
+    if year:
+        qs = qs.filter(month__year=year)
+
+    return (
+        qs.values("month")
+        .annotate(
+            facts_count=Sum("rows_count"),
+            plans_count=count_for_month(KvartalniyMonthlyPlan),
+            extras_count=count_for_month(KvartalniyGroupExtraPlan),
+        )
+        .order_by("-month")
+    )
+
+
 def kvartalniy_monthly_list(request):
     if not request.user.is_superuser:
         return redirect("station_table_1_list")
@@ -733,7 +641,6 @@ def kvartalniy_monthly_list(request):
     return render(request, "kvartalniy_monthly_list.html", context)
 
 
-@transaction.atomic
 def kvartalniy_monthly_list_json(request):
     if not request.user.is_superuser:
         return JsonResponse({"ok": False, "error": "Forbidden"}, status=403)
@@ -747,47 +654,25 @@ def kvartalniy_monthly_list_json(request):
     if not page_number or page_number < 1:
         page_number = 1
 
-    # months that actually exist in table1
-    raw_qs = (
-        StationDailyTable1.objects
-        .exclude(shift="total")
-        .dates("date", "month", order="DESC")
-    )
+    paginator = Paginator(_month_catalogue(selected_year), per_page)
+    page_obj = paginator.get_page(page_number)
 
     month_list = []
-    for dt in raw_qs:
-        if selected_year and dt.year != selected_year:
-            continue
-
-        month_start = dt.replace(day=1)
-
-        monthly_obj = KvartalniyMonthly.objects.filter(date=month_start).first()
-        plans_count = monthly_obj.plans.count() if monthly_obj else 0
-        extras_count = monthly_obj.group_extra_plans.count() if monthly_obj else 0
-
-        facts_count = (
-            StationDailyTable1.objects
-            .filter(date__year=dt.year, date__month=dt.month)
-            .exclude(shift="total")
-            .count()
-        )
-
+    for row in page_obj.object_list:
+        month_start = row["month"]
         month_list.append({
             "month": month_start.strftime("%Y-%m"),
             "month_label": month_start.strftime("%m.%Y"),
             "year": month_start.year,
-            "facts_count": facts_count,
-            "plans_count": plans_count,
-            "extras_count": extras_count,
+            "facts_count": row["facts_count"],
+            "plans_count": row["plans_count"],
+            "extras_count": row["extras_count"],
             "open_url": f"/kvartalniy/umumiy/{month_start.strftime('%Y-%m')}/",
         })
 
-    paginator = Paginator(month_list, per_page)
-    page_obj = paginator.get_page(page_number)
-
     return JsonResponse({
         "ok": True,
-        "rows": list(page_obj.object_list),
+        "rows": month_list,
         "pagination": {
             "page": page_obj.number,
             "pages": paginator.num_pages,
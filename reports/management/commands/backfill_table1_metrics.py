@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reports.models import TABLE1_METRIC_KEYS, StationDailyTable1
+from reports.versions import bump_versions, table1_version_key
+
+
+class Command(BaseCommand):
+    help = "StationDailyTable1 typed metrika ustunlarini data JSON dan to'ldiradi (tarix uchun)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = max(int(options["batch_size"] or 1000), 1)
+
+        qs = (
+            StationDailyTable1.objects
+            .only("pk", "date", "data", *TABLE1_METRIC_KEYS)
+            .order_by("pk")
+        )
+
+        last_pk = 0
+        scanned = 0
+        updated = 0
+
+        while True:
+            batch = list(qs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+
+            changed = []
+            for obj in batch:
+                before = [getattr(obj, key) for key in TABLE1_METRIC_KEYS]
+                obj.sync_metrics()
+                after = [getattr(obj, key) for key in TABLE1_METRIC_KEYS]
+                if before != after:
+                    changed.append((obj.pk, obj.date, dict(zip(TABLE1_METRIC_KEYS, after))))
+
+            # bulk_update() 19 ustun x N qator CASE WHEN quradi - oddiy UPDATE lar tezroq
+            with transaction.atomic():
+                for pk, _d, values in changed:
+                    StationDailyTable1.objects.filter(pk=pk).update(**values)
+                # shu sanalar hisobot cache lari eskirdi
+                bump_versions(table1_version_key(d) for _pk, d, _values in changed)
+
+            scanned += len(batch)
+            updated += len(changed)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} rows, updated {updated}."))
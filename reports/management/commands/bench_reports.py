@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.benchmarks import DEFAULT_TIME_THRESHOLD, compare_results, parse_scales, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Hisobot, JSON va Excel endpoint larining so'rovlar soni va vaqtini sintetik "
+        "ma'lumotda bir necha masshtabda o'lchaydi. Har masshtab alohida vaqtinchalik test "
+        "bazasida ishlaydi; natija JSON faylga yoziladi va --compare bilan solishtiriladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="10x1,30x2",
+            help="Masshtablar: stansiyalar x yillar, vergul bilan (default: 10x1,30x2).",
+        )
+        parser.add_argument("--runs", type=int, default=3, help="Har endpoint necha marta o'lchanadi (median).")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument(
+            "--only",
+            default="",
+            help="Faqat nomida shu qismlar bor endpoint lar, vergul bilan (masalan kvartalniy,excel).",
+        )
+        parser.add_argument("--output", default="bench_results.json", help="Natija fayli.")
+        parser.add_argument("--compare", default="", help="Oldingi natija fayli - farqlarni chiqaradi.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=DEFAULT_TIME_THRESHOLD,
+            help="Cold vaqt shu ulushdan ko'p o'ssa regressiya (default: 0.25).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="--compare da regressiya topilsa xato bilan tugaydi (CI uchun).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = parse_scales(options["scales"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        baseline = None
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text(encoding="utf-8"))
+
+        only = [x.strip() for x in options["only"].split(",") if x.strip()]
+        results = run_benchmarks(
+            scales,
+            runs=options["runs"],
+            seed=options["seed"],
+            only=only,
+            progress=self.stdout.write,
+        )
+        Path(options["output"]).write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+        for scale in results["scales"]:
+            self.stdout.write(f"\n== {scale['label']} ({scale['data']['table1_rows']} table1 rows) ==")
+            for name, r in scale["endpoints"].items():
+                self.stdout.write(
+                    f"{name:<40} {r['status']:>3}  q={r['queries']:<4} warm_q={r['warm_queries']:<4} "
+                    f"cold={r['cold_ms']:>9.1f}ms  warm={r['warm_ms']:>9.1f}ms"
+                )
+
+        if baseline is not None:
+            rows = compare_results(baseline, results, time_threshold=options["threshold"])
+            regressions = [row for row in rows if row["regression"]]
+            self.stdout.write("\n== compare ==")
+            for row in rows:
+                mark = "!!" if row["regression"] else "  "
+                self.stdout.write(
+                    f"{mark} {row['scale']:<8} {row['endpoint']:<40} "
+                    f"q {row['queries'][0]}->{row['queries'][1]}  "
+                    f"cold {row['cold_ms'][0]:.1f}->{row['cold_ms'][1]:.1f}ms ({row['cold_change']:+.0%})"
+                )
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} regressions.")
+
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
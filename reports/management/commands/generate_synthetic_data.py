@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.synthetic import SYNTH_PREFIX, clear_synthetic_data, generate_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark va sinov uchun sintetik tarix: DISPLAY_GROUPS stansiyalari, ko'p blokli "
+        "terminallar, kunduzgi/tungi smenalar, Table2, rejalar va habarnomalar. "
+        f"Userlar '{SYNTH_PREFIX}' bilan boshlanadi (parol yo'q, login qilinmaydi)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=30, help="Stansiyalar soni (default: 30).")
+        parser.add_argument("--years", type=float, default=2, help="Necha yillik tarix (default: 2).")
+        parser.add_argument("--seed", type=int, default=1, help="Tasodifiy son seed i (default: 1).")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Oldin mavjud sintetik userlar va ularning ma'lumotlarini o'chiradi.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="DEBUG=False bo'lsa ham bajaradi.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("DEBUG=False: production bazasiga sintetik ma'lumot yozilmaydi (--force).")
+
+        if options["clear"]:
+            deleted = clear_synthetic_data()
+            self.stdout.write(f"Deleted {deleted} synthetic objects.")
+
+        stats = generate_history(
+            stations=options["stations"],
+            years=options["years"],
+            seed=options["seed"],
+        )
+        summary = ", ".join(f"{key}: {value}" for key, value in stats.as_dict().items())
+        self.stdout.write(self.style.SUCCESS(f"Synthetic history generated ({summary})."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollups import rebuild_table1_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Table1DailyRollup/Table1MonthlyRollup ni StationDailyTable1 dan noldan quradi. "
+        "Oldin backfill_table1_metrics bajarilgan bo'lishi kerak."
+    )
+
+    def handle(self, *args, **options):
+        daily, monthly = rebuild_table1_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Daily rollups: {daily}, monthly rollups: {monthly}."))
@@ -0,0 +1,58 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reports.exports import claim_next_job, prune_exports, requeue_stale_jobs, run_export_job
+
+
+PRUNE_INTERVAL = 60 * 60  # sekund
+
+
+class Command(BaseCommand):
+    help = (
+        "ExportJob navbatini bajaradi: Excel fayllarni quradi va EXPORT_ROOT ga saqlaydi. "
+        "Gunicorn bilan yonma-yon alohida jarayon sifatida ishga tushiring (script.sh)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Navbatdagi barcha job larni bajarib chiqib ketadi.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Navbat bo'sh bo'lganda tekshirish oralig'i (sekund).",
+        )
+
+    def handle(self, *args, **options):
+        max_age = timedelta(days=settings.EXPORT_ARTIFACT_MAX_AGE_DAYS)
+        last_prune = 0.0
+
+        while True:
+            close_old_connections()
+
+            if time.monotonic() - last_prune > PRUNE_INTERVAL:
+                requeue_stale_jobs()
+                files, jobs = prune_exports(max_age)
+                if files or jobs:
+                    self.stdout.write(f"Pruned {files} files, {jobs} jobs.")
+                last_prune = time.monotonic()
+
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["interval"])
+                continue
+
+            started = time.monotonic()
+            ok = run_export_job(job)
+            self.stdout.write(
+                f"{job.kind} #{job.id}: {'done' if ok else 'failed'} in {time.monotonic() - started:.1f}s"
+            )
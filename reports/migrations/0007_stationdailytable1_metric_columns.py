@@ -0,0 +1,114 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_notification_avatar_alter_notification_message_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='income_daily',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pod_pogr_cont',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pod_pogr_itogo',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pod_vygr_cont',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pod_vygr_itogo',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_cont',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_ft',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_itogo',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_itogo_kon',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_kr',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_proch',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='pogr_pv',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_cont',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_ft',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_itogo',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_itogo_kon',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_kr',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_proch',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='stationdailytable1',
+            name='vygr_pv',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='stationdailytable1',
+            index=models.Index(fields=['date', 'shift'], name='reports_sta_date_079610_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_stationdailytable1_metric_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Table1DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vygr_ft', models.BigIntegerField(default=0)),
+                ('vygr_cont', models.BigIntegerField(default=0)),
+                ('vygr_kr', models.BigIntegerField(default=0)),
+                ('vygr_pv', models.BigIntegerField(default=0)),
+                ('vygr_proch', models.BigIntegerField(default=0)),
+                ('vygr_itogo', models.BigIntegerField(default=0)),
+                ('vygr_itogo_kon', models.BigIntegerField(default=0)),
+                ('pod_vygr_cont', models.BigIntegerField(default=0)),
+                ('pod_vygr_itogo', models.BigIntegerField(default=0)),
+                ('pogr_ft', models.BigIntegerField(default=0)),
+                ('pogr_cont', models.BigIntegerField(default=0)),
+                ('pogr_kr', models.BigIntegerField(default=0)),
+                ('pogr_pv', models.BigIntegerField(default=0)),
+                ('pogr_proch', models.BigIntegerField(default=0)),
+                ('pogr_itogo', models.BigIntegerField(default=0)),
+                ('pogr_itogo_kon', models.BigIntegerField(default=0)),
+                ('pod_pogr_cont', models.BigIntegerField(default=0)),
+                ('pod_pogr_itogo', models.BigIntegerField(default=0)),
+                ('income_daily', models.BigIntegerField(default=0)),
+                ('date', models.DateField()),
+                ('shift', models.CharField(choices=[('day', 'день'), ('night', 'ночь'), ('total', 'итог')], max_length=10)),
+                ('rows_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='table1_daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'shift'], name='reports_tab_date_bb1fe8_idx')],
+                'unique_together': {('station_user', 'date', 'shift')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Table1MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vygr_ft', models.BigIntegerField(default=0)),
+                ('vygr_cont', models.BigIntegerField(default=0)),
+                ('vygr_kr', models.BigIntegerField(default=0)),
+                ('vygr_pv', models.BigIntegerField(default=0)),
+                ('vygr_proch', models.BigIntegerField(default=0)),
+                ('vygr_itogo', models.BigIntegerField(default=0)),
+                ('vygr_itogo_kon', models.BigIntegerField(default=0)),
+                ('pod_vygr_cont', models.BigIntegerField(default=0)),
+                ('pod_vygr_itogo', models.BigIntegerField(default=0)),
+                ('pogr_ft', models.BigIntegerField(default=0)),
+                ('pogr_cont', models.BigIntegerField(default=0)),
+                ('pogr_kr', models.BigIntegerField(default=0)),
+                ('pogr_pv', models.BigIntegerField(default=0)),
+                ('pogr_proch', models.BigIntegerField(default=0)),
+                ('pogr_itogo', models.BigIntegerField(default=0)),
+                ('pogr_itogo_kon', models.BigIntegerField(default=0)),
+                ('pod_pogr_cont', models.BigIntegerField(default=0)),
+                ('pod_pogr_itogo', models.BigIntegerField(default=0)),
+                ('income_daily', models.BigIntegerField(default=0)),
+                ('month', models.DateField()),
+                ('shift', models.CharField(choices=[('day', 'день'), ('night', 'ночь'), ('total', 'итог')], max_length=10)),
+                ('rows_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('station_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='table1_monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month', 'shift'], name='reports_tab_month_38bc05_idx')],
+                'unique_together': {('station_user', 'month', 'shift')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-17 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def analyze_tables(apps, schema_editor):
+    # statistikasiz SQLite station_user_id IN (...) ni FK indeksi orqali yuritadi va
+    # sanadan boshlanadigan yangi indekslarni tanlamaydi
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        schema_editor.execute("ANALYZE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_export_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stationdailytable1',
+            index=models.Index(condition=models.Q(('shift', 'total')), fields=['date', 'station_user', 'submitted_at'], name='reports_t1_total_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stationdailytable1',
+            index=models.Index(condition=models.Q(('shift', 'total')), fields=['station_user', 'date', 'submitted_at'], name='reports_t1_total_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stationdailytable2',
+            index=models.Index(fields=['date', 'station_user', 'submitted_at'], name='reports_t2_date_user_idx'),
+        ),
+        migrations.RunPython(analyze_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 6.0.1 on 2026-10-17 21:05
+
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+
+# reports.table2_sectors dan muzlatilgan nusxa: keyinchalik modul o'zgarsa ham migratsiya bir xil ishlasin
+LEGACY_SECTORS = (
+    ("kp_fp_rows", "kp_fp", "ФТТ"),
+    ("kp_uus_rows", "kp_uus", "УЛС"),
+)
+
+
+def _int0(v):
+    try:
+        return int(v or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _clean(rows):
+    cleaned = [
+        {
+            "name": str(row.get("name") or "").strip(),
+            "capacity": _int0(row.get("capacity")),
+            "fact": _int0(row.get("fact")),
+            "free": _int0(row.get("free")),
+        }
+        for row in (r if isinstance(r, dict) else {} for r in (rows or []))
+    ]
+    return cleaned or [{"name": "", "capacity": 0, "fact": 0, "free": 0}]
+
+
+def _canonical_rows(data):
+    rows = data.get("kp_sector_rows")
+    if isinstance(rows, list) and rows:
+        return _clean(rows)
+
+    converted = []
+    for rows_key, _prefix, name in LEGACY_SECTORS:
+        old_rows = data.get(rows_key)
+        if isinstance(old_rows, list):
+            converted += [{**(row if isinstance(row, dict) else {}), "name": name} for row in old_rows]
+    if converted:
+        return _clean(converted)
+
+    summary = [
+        {
+            "name": name,
+            "capacity": data.get(f"{prefix}_capacity"),
+            "fact": data.get(f"{prefix}_fact"),
+            "free": data.get(f"{prefix}_free"),
+        }
+        for _rows_key, prefix, name in LEGACY_SECTORS
+    ]
+    if any(_int0(row[k]) != 0 for row in summary for k in ("capacity", "fact", "free")):
+        return _clean(summary)
+
+    return _clean([])
+
+
+def canonicalize_sector_rows(apps, schema_editor):
+    StationDailyTable2 = apps.get_model("reports", "StationDailyTable2")
+
+    changed = []
+    for obj in StationDailyTable2.objects.only("id", "data").iterator(chunk_size=BATCH_SIZE):
+        data = obj.data if isinstance(obj.data, dict) else {}
+        rows = _canonical_rows(data)
+
+        new_data = dict(data)
+        new_data["kp_sector_rows"] = rows
+        new_data["kp_sector_capacity_total"] = sum(r["capacity"] for r in rows)
+        new_data["kp_sector_fact_total"] = sum(r["fact"] for r in rows)
+        new_data["kp_sector_free_total"] = sum(r["free"] for r in rows)
+
+        if new_data != obj.data:
+            obj.data = new_data
+            changed.append(obj)
+        if len(changed) >= BATCH_SIZE:
+            StationDailyTable2.objects.bulk_update(changed, ["data"])
+            changed = []
+
+    if changed:
+        StationDailyTable2.objects.bulk_update(changed, ["data"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0011_report_indexes'),
+    ]
+
+    operations = [
+        # eski kalitlar (kp_fp_* / kp_uus_*) o'chirilmaydi, shuning uchun orqaga qaytarish - noop
+        migrations.RunPython(canonicalize_sector_rows, migrations.RunPython.noop),
+    ]
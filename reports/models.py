@@ -8,7 +8,57 @@ SHIFT_CHOICES = (
     ('total', 'итог'),
 )
 
-class StationDailyTable1(models.Model):
+# data JSON ichidan SQL da yig'iladigan (Sum) ko'rsatkichlar
+TABLE1_METRIC_KEYS = (
+    "vygr_ft", "vygr_cont", "vygr_kr", "vygr_pv", "vygr_proch", "vygr_itogo", "vygr_itogo_kon",
+    "pod_vygr_cont", "pod_vygr_itogo",
+    "pogr_ft", "pogr_cont", "pogr_kr", "pogr_pv", "pogr_proch", "pogr_itogo", "pogr_itogo_kon",
+    "pod_pogr_cont", "pod_pogr_itogo",
+    "income_daily",
+)
+
+
+def _metric_int(value) -> int:
+    try:
+        if value in (None, "", "None"):
+            return 0
+        if isinstance(value, str):
+            value = value.replace(" ", "").replace(",", "")
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class Table1Metrics(models.Model):
+    vygr_ft = models.BigIntegerField(default=0)
+    vygr_cont = models.BigIntegerField(default=0)
+    vygr_kr = models.BigIntegerField(default=0)
+    vygr_pv = models.BigIntegerField(default=0)
+    vygr_proch = models.BigIntegerField(default=0)
+    vygr_itogo = models.BigIntegerField(default=0)
+    vygr_itogo_kon = models.BigIntegerField(default=0)
+
+    pod_vygr_cont = models.BigIntegerField(default=0)
+    pod_vygr_itogo = models.BigIntegerField(default=0)
+
+    pogr_ft = models.BigIntegerField(default=0)
+    pogr_cont = models.BigIntegerField(default=0)
+    pogr_kr = models.BigIntegerField(default=0)
+    pogr_pv = models.BigIntegerField(default=0)
+    pogr_proch = models.BigIntegerField(default=0)
+    pogr_itogo = models.BigIntegerField(default=0)
+    pogr_itogo_kon = models.BigIntegerField(default=0)
+
+    pod_pogr_cont = models.BigIntegerField(default=0)
+    pod_pogr_itogo = models.BigIntegerField(default=0)
+
+    income_daily = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class StationDailyTable1(Table1Metrics):
     station_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_table1')
     date = models.DateField()
     shift = models.CharField(max_length=10, choices=SHIFT_CHOICES)
@@ -23,10 +73,142 @@ class StationDailyTable1(models.Model):
 
     class Meta:
         unique_together = ('station_user', 'date', 'shift',"block")
+        indexes = [
+            models.Index(fields=["date", "shift"]),
+            # admin_table1_reports_json: total qatorlar sana bo'yicha guruhlanadi (sana kamayishi bo'yicha)
+            models.Index(
+                fields=["date", "station_user", "submitted_at"],
+                condition=models.Q(shift="total"),
+                name="reports_t1_total_date_idx",
+            ),
+            # station_table_1_list va "total bormi" tekshiruvlari
+            models.Index(
+                fields=["station_user", "date", "submitted_at"],
+                condition=models.Q(shift="total"),
+                name="reports_t1_total_user_idx",
+            ),
+        ]
 
     def __str__(self):
         return f'{self.station_user.username} {self.date} {self.shift}'
 
+    def sync_metrics(self):
+        """
+        TABLE1_METRIC_KEYS ustunlarini data dan qayta to'ldiradi.
+        save() buni o'zi chaqiradi; bulk_create/bulk_update dan oldin qo'lda chaqiring.
+        """
+        data = self.data if isinstance(self.data, dict) else {}
+        for key in TABLE1_METRIC_KEYS:
+            setattr(self, key, _metric_int(data.get(key)))
+
+    def save(self, *args, **kwargs):
+        self.sync_metrics()
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *TABLE1_METRIC_KEYS}
+
+        super().save(*args, **kwargs)
+
+
+class Table1DailyRollup(Table1Metrics):
+    """
+    StationDailyTable1 ning stansiya x kun x smena bo'yicha yig'indisi (bloklar qo'shilgan).
+    reports.rollups.refresh_table1_rollups() orqali yangilanadi, qo'lda yozmang.
+    """
+    station_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='table1_daily_rollups')
+    date = models.DateField()
+    shift = models.CharField(max_length=10, choices=SHIFT_CHOICES)
+    rows_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('station_user', 'date', 'shift')
+        indexes = [
+            models.Index(fields=["date", "shift"]),
+        ]
+
+    def __str__(self):
+        return f'{self.station_user_id} {self.date} {self.shift}'
+
+
+class Table1MonthlyRollup(Table1Metrics):
+    """
+    Table1DailyRollup ning oylik yig'indisi. month - oyning 1-kuni.
+    """
+    station_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='table1_monthly_rollups')
+    month = models.DateField()
+    shift = models.CharField(max_length=10, choices=SHIFT_CHOICES)
+    rows_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('station_user', 'month', 'shift')
+        indexes = [
+            models.Index(fields=["month", "shift"]),
+        ]
+
+    def __str__(self):
+        return f'{self.station_user_id} {self.month:%Y-%m} {self.shift}'
+
+
+class ReportDataVersion(models.Model):
+    """
+    Hisobot cache lari uchun versiya hisoblagichi (masalan "table1:2024-02-10", "stations").
+    Ma'lumot o'zgargan tranzaksiya ichida reports.versions.bump_versions() bilan oshiriladi,
+    cache kalitlari versiyani o'z ichiga oladi.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.key} v{self.version}'
+
+
+class ExportJob(models.Model):
+    """
+    Navbatdagi Excel eksport. Fayl run_export_worker tomonidan yaratiladi va
+    EXPORT_ROOT ichida artifact sifatida saqlanadi (reports.exports ga qarang).
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'в очереди'),
+        (STATUS_RUNNING, 'выполняется'),
+        (STATUS_DONE, 'готово'),
+        (STATUS_FAILED, 'ошибка'),
+    )
+
+    kind = models.CharField(max_length=32)
+    params = models.JSONField(default=dict, blank=True)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    artifact = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["kind", "fingerprint"]),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} #{self.pk} {self.status}'
+
 
 class KPI(models.Model):
     code = models.CharField(max_length=20, unique=True)
@@ -70,6 +252,10 @@ class StationDailyTable2(models.Model):
     class Meta:
         unique_together = ('station_user', 'date')
         ordering = ['-date']
+        indexes = [
+            # admin Table2 sanalar ro'yxati va bitta sana sahifalari (date=..., submitted_at IS NOT NULL)
+            models.Index(fields=["date", "station_user", "submitted_at"], name="reports_t2_date_user_idx"),
+        ]
 
     def __str__(self):
         return f"Table №2 | {self.station_user.username}  "
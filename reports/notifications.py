@@ -0,0 +1,229 @@
+"""
+Habarnomalar: payload yig'ish va SSE (Server-Sent Events) push kanali.
+
+base.js avval notifications_latest ni har 12 sekundda so'rardi - har bir ochiq
+tab uchun Exists subquery + admin uchun 20 ta NotificationRead. Endi:
+
+- notifications_send / notifications_ack (va admin) publish() qiladi: umumiy
+  "events" cache ga topic bo'yicha yangi token yoziladi (bazaga tegmaydi);
+- notifications_stream (ASGI, bunker/asgi.py) har SSE_TICK da faqat shu
+  tokenlarni o'qiydi va ular o'zgargandagina bazadan payload yig'ib yuboradi;
+  staff uchun presence (online stansiyalar) o'zgarishini ham yuboradi;
+- WSGI (gunicorn sync worker) ostida stream 204 qaytaradi - base.js eski
+  polling ga (notifications_latest) qaytadi.
+"""
+import asyncio
+import json
+import time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Exists, OuterRef
+from django.http import HttpResponse, StreamingHttpResponse
+from django.templatetags.static import static
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from accounts.models import StationProfile
+from accounts.presence import online_user_ids
+from .models import Notification, NotificationRead
+
+
+EVENTS_CACHE_ALIAS = "events"
+
+NOTIFICATION_TOPIC = "notification"
+NOTIFICATION_READ_TOPIC = "notification_read"
+TOPICS = (NOTIFICATION_TOPIC, NOTIFICATION_READ_TOPIC)
+
+SSE_TICK = 1.0  # token tekshirish oralig'i, sekund
+SSE_PRESENCE_TICK = 5.0
+SSE_KEEPALIVE = 15.0
+SSE_MAX_AGE = 5 * 60  # keyin EventSource o'zi qayta ulanadi (Last-Event-ID bilan)
+SSE_RETRY_MS = 3000
+
+
+# ---------- payload ----------
+
+def _safe_user_name(user):
+    full_name = f"{getattr(user, 'first_name', '')} {getattr(user, 'last_name', '')}".strip()
+    if full_name:
+        return full_name
+    username = getattr(user, "username", "") or ""
+    if username:
+        return username
+    return f"User {user.id}"
+
+
+def _safe_avatar_url(notification):
+    try:
+        if notification.avatar and hasattr(notification.avatar, "url"):
+            return notification.avatar.url
+    except Exception:
+        pass
+
+    try:
+        creator = notification.created_by
+        if creator:
+            profile = getattr(creator, "profile", None)
+            if profile and getattr(profile, "photo", None) and hasattr(profile.photo, "url"):
+                return profile.photo.url
+    except Exception:
+        pass
+
+    return static("images/admin-bot.png")
+
+
+def latest_notification_payload(user) -> dict:
+    """
+    User/admin uchun oxirgi aktiv habarnoma (notifications_latest va stream uchun).
+    Admin uchun:
+      - xabar
+      - kimlar o'qiganini live ko'rsatish
+    User uchun:
+      - xabar
+      - unread holat
+    """
+    read_subq = NotificationRead.objects.filter(
+        user=user,
+        notification=OuterRef("pk")
+    )
+
+    notif = Notification.objects.filter(is_active=True).annotate(
+        user_has_read=Exists(read_subq)
+    ).order_by("-created_at").select_related("created_by").first()
+
+    if not notif:
+        return {"ok": True, "notification": None, "unread": False}
+
+    unread = not bool(getattr(notif, "user_has_read", False))
+
+    read_events = []
+    if user.is_staff or user.is_superuser:
+        latest_reads = (
+            NotificationRead.objects
+            .filter(notification=notif)
+            .select_related("user")
+            .order_by("-read_at")[:20]
+        )
+
+        read_events = [
+            {
+                "user_id": r.user_id,
+                "user_name": _safe_user_name(r.user),
+                "read_at": timezone.localtime(r.read_at).strftime("%d.%m.%Y %H:%M:%S"),
+            }
+            for r in latest_reads
+        ]
+
+    return {
+        "ok": True,
+        "notification": {
+            "id": notif.id,
+            "message": notif.message,
+            "created_at": timezone.localtime(notif.created_at).strftime("%d.%m.%Y %H:%M:%S"),
+            "created_by_name": _safe_user_name(notif.created_by) if notif.created_by else "Admin",
+            "avatar_url": _safe_avatar_url(notif),
+        },
+        "unread": unread,
+        "read_events": read_events,
+    }
+
+
+# ---------- o'zgarish signallari ----------
+
+def _topic_key(topic: str) -> str:
+    return f"events:{topic}"
+
+
+def publish(*topics):
+    """Topic(lar) o'zgardi: stream lar keyingi SSE_TICK da payload ni qayta yig'adi."""
+    token = time.time_ns()
+    caches[EVENTS_CACHE_ALIAS].set_many({_topic_key(t): token for t in topics}, timeout=None)
+
+
+def change_token(topics=TOPICS) -> str:
+    """Berilgan topic lar holati bitta satrda - SSE event id si sifatida ishlatiladi."""
+    found = caches[EVENTS_CACHE_ALIAS].get_many([_topic_key(t) for t in topics])
+    return ".".join(str(found.get(_topic_key(t), 0)) for t in topics)
+
+
+def stream_topics(user) -> tuple:
+    """Stansiya read receipt larni olmaydi - uning stream i ack larda uyg'onmasin."""
+    if user.is_staff or user.is_superuser:
+        return TOPICS
+    return (NOTIFICATION_TOPIC,)
+
+
+# ---------- SSE ----------
+
+def _sse(event: str, data, event_id: str | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _event_stream(user, last_event_id: str):
+    is_staff = user.is_staff or user.is_superuser
+    get_token = sync_to_async(partial(change_token, stream_topics(user)), thread_sensitive=False)
+    get_payload = sync_to_async(latest_notification_payload)
+
+    token = await get_token()
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    if last_event_id and last_event_id != token:
+        # qayta ulanish orasida o'zgargan
+        yield _sse("notification", await get_payload(user), token)
+    else:
+        yield _sse("ready", {}, token)
+
+    profiles, online = [], set()
+    if is_staff:
+        profiles = await sync_to_async(list)(StationProfile.objects.only("id", "user_id", "last_seen"))
+        online = await sync_to_async(online_user_ids, thread_sensitive=False)(profiles)
+
+    loop = asyncio.get_running_loop()
+    started = last_write = last_presence = loop.time()
+
+    while loop.time() - started < SSE_MAX_AGE:
+        await asyncio.sleep(SSE_TICK)
+        now = loop.time()
+
+        current = await get_token()
+        if current != token:
+            token = current
+            yield _sse("notification", await get_payload(user), token)
+            last_write = now
+
+        if is_staff and now - last_presence >= SSE_PRESENCE_TICK:
+            last_presence = now
+            current_online = await sync_to_async(online_user_ids, thread_sensitive=False)(profiles)
+            if current_online != online:
+                online = current_online
+                yield _sse("presence", {"online": sorted(online)})
+                last_write = now
+
+        if now - last_write >= SSE_KEEPALIVE:
+            yield ": ping\n\n"
+            last_write = now
+
+
+@require_GET
+@login_required
+async def notifications_stream(request):
+    if not isinstance(request, ASGIRequest):
+        # sync worker ni band qilib qo'ymaslik uchun - klient polling ga o'tadi
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    response = StreamingHttpResponse(
+        _event_stream(user, request.headers.get("Last-Event-ID", "")),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx buffer qilmasin
+    return response
@@ -0,0 +1,172 @@
+"""
+Sana bo'yicha keyset (cursor) sahifalash - hisobotlar ro'yxatlari uchun.
+
+Paginator har sahifada guruhlangan so'rov ustidan to'liq COUNT va OFFSET qiladi:
+tarix o'sgan sari oxirgi sahifalar sekinlashadi. Bu yerda sahifa - "shu sanadan
+eskiroq/yangiroq birinchi per_page ta", ya'ni date indeksidan chegaralangan oraliq:
+
+    ?after=2024-02-10   ->  date < 2024-02-10 ORDER BY date DESC LIMIT per_page + 1
+    ?before=2024-03-01  ->  date > 2024-03-01 ORDER BY date ASC  LIMIT per_page + 1
+
+pos - shu sahifadan oldingi qatorlar soni (faqat tartib raqamlari uchun, klient uzatadi).
+Jami soni ixtiyoriy (?total=): "approx" - eng yangi va eng eski sana orasidagi kunlar
+soni (ikkita chegaralangan so'rov), "exact" - COUNT.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+
+PER_PAGE_CHOICES = (5, 10, 20, 50)
+DEFAULT_PER_PAGE = 10
+
+TOTAL_APPROX = "approx"
+TOTAL_EXACT = "exact"
+
+
+def _read_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _read_cursor(value):
+    try:
+        return datetime.strptime((value or "").strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _row_date(row) -> date:
+    return row["date"] if isinstance(row, dict) else row.date
+
+
+def read_per_page(params) -> int:
+    per_page = _read_int(params.get("per_page")) or DEFAULT_PER_PAGE
+    return per_page if per_page in PER_PAGE_CHOICES else DEFAULT_PER_PAGE
+
+
+@dataclass
+class DatePage:
+    """Django Page ga o'xshash (shablonlar uchun), lekin page raqami o'rniga cursor lar bilan."""
+    object_list: list
+    per_page: int
+    offset: int
+    next_cursor: date | None
+    previous_cursor: date | None
+    count: int | None = None
+    count_is_approximate: bool = False
+
+    @property
+    def number(self) -> int:
+        return self.offset // self.per_page + 1
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max((self.count + self.per_page - 1) // self.per_page, self.number)
+
+    @property
+    def next_offset(self) -> int:
+        return self.offset + len(self.object_list)
+
+    @property
+    def previous_offset(self) -> int:
+        return max(self.offset - self.per_page, 0)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def start_index(self) -> int:
+        return self.offset + 1 if self.object_list else 0
+
+    def end_index(self) -> int:
+        return self.offset + len(self.object_list)
+
+    def as_json(self) -> dict:
+        return {
+            "mode": "keyset",
+            "page": self.number,
+            "per_page": self.per_page,
+            "num_pages": self.num_pages,
+            "total_items": self.count,
+            "total_is_approximate": self.count_is_approximate,
+            "has_previous": self.has_previous(),
+            "has_next": self.has_next(),
+            "previous_cursor": self.previous_cursor.isoformat() if self.previous_cursor else None,
+            "next_cursor": self.next_cursor.isoformat() if self.next_cursor else None,
+            "previous_pos": self.previous_offset,
+            "next_pos": self.next_offset,
+            "start_index": self.start_index(),
+            "end_index": self.end_index(),
+        }
+
+
+def _count(qs, total):
+    if total == TOTAL_EXACT:
+        return qs.count(), False
+
+    if total == TOTAL_APPROX:
+        newest = qs.order_by("-date")[:1]
+        oldest = qs.order_by("date")[:1]
+        if not newest or not oldest:
+            return 0, True
+        return (_row_date(newest[0]) - _row_date(oldest[0])).days + 1, True
+
+    return None, False
+
+
+def paginate_by_date(qs, params, per_page, total=None) -> DatePage:
+    """
+    qs - date maydoni bor queryset (order_by e'tiborga olinmaydi); values("date").annotate(...)
+    bilan guruhlangan bo'lishi ham mumkin - date filtri WHERE ga tushadi, GROUP BY dan oldin.
+    params - request.GET (after / before / pos).
+    """
+    after = _read_cursor(params.get("after"))
+    before = _read_cursor(params.get("before"))
+    offset = max(_read_int(params.get("pos")) or 0, 0)
+    count, approximate = _count(qs, total)
+
+    if before is not None:
+        newer = list(qs.filter(date__gt=before).order_by("date")[:per_page + 1])
+        if len(newer) > per_page:
+            rows = newer[:per_page][::-1]
+            return DatePage(
+                object_list=rows,
+                per_page=per_page,
+                offset=max(offset, per_page),
+                next_cursor=_row_date(rows[-1]),
+                previous_cursor=_row_date(rows[0]),
+                count=count,
+                count_is_approximate=approximate,
+            )
+        after = None  # boshiga yetdik - birinchi sahifa
+
+    page_qs = qs.order_by("-date")
+    if after is not None:
+        page_qs = page_qs.filter(date__lt=after)
+
+    rows = list(page_qs[:per_page + 1])
+    if after is not None and not rows:
+        # cursor dan keyin hech narsa qolmagan (o'chirilgan) - birinchi sahifa
+        after = None
+        rows = list(qs.order_by("-date")[:per_page + 1])
+
+    if after is None:
+        offset = 0
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return DatePage(
+        object_list=rows,
+        per_page=per_page,
+        offset=offset,
+        next_cursor=_row_date(rows[-1]) if has_next else None,
+        previous_cursor=_row_date(rows[0]) if after is not None else None,
+        count=count,
+        count_is_approximate=approximate,
+    )
@@ -0,0 +1,44 @@
+"""
+Hisobot natijalari cache i ("reports" alias, settings.CACHES).
+
+Kalit = hisobot turi + parametrlar + o'qilgan ma'lumot versiyalari (ReportDataVersion).
+Stansiya Table1/Table2 ni saqlasa yoki o'chirsa faqat o'sha sanalarning versiyasi
+oshadi (table1_rows_changed / bump_versions) - shu sanalarni o'z ichiga olgan kun, oy
+va oraliq natijalari yangi kalitga o'tadi, qolgan sana va oylar cache dan beriladi.
+Eski kalitlar o'chirilmaydi: timeout / MAX_ENTRIES bilan o'zi tushib ketadi.
+
+Default - LocMem (har worker o'z nusxasi, versiya kaliti tufayli baribir to'g'ri).
+Bir nechta worker bitta cache ni ko'rishi uchun REPORTS_CACHE_DIR (FileBasedCache).
+"""
+import hashlib
+
+from django.core.cache import caches
+
+
+REPORTS_CACHE_ALIAS = "reports"
+
+# kun/oy natijalari: ma'lumot o'zgarsa kalit o'zgaradi, vaqt faqat xotirani bo'shatish uchun
+REPORT_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def report_cache():
+    return caches[REPORTS_CACHE_ALIAS]
+
+
+def versions_digest(versions: dict) -> str:
+    payload = ",".join(f"{key}={version}" for key, version in sorted(versions.items()))
+    return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+
+def report_cache_key(kind: str, params: str, versions: dict) -> str:
+    return f"reports:{kind}:{params}:{versions_digest(versions)}"
+
+
+def cached_report(kind: str, params: str, versions: dict, build, timeout=REPORT_CACHE_TIMEOUT):
+    """build() natijasi - shu parametrlar va versiyalar uchun bir marta hisoblanadi."""
+    key = report_cache_key(kind, params, versions)
+    result = report_cache().get(key)
+    if result is None:
+        result = build()
+        report_cache().set(key, result, timeout)
+    return result
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import TABLE1_METRIC_KEYS, StationDailyTable1, Table1DailyRollup, Table1MonthlyRollup
+from .versions import bump_versions, table1_version_key
+
+
+BULK_BATCH_SIZE = 1000
+
+
+def _metric_sums(**extra) -> dict:
+    return {**{key: Coalesce(Sum(key), 0) for key in TABLE1_METRIC_KEYS}, **extra}
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    if d.month == 12:
+        return date(d.year + 1, 1, 1)
+    return date(d.year, d.month + 1, 1)
+
+
+def _refresh_monthly(user_ids, months) -> None:
+    month_set = set(months)
+    if not month_set:
+        return
+    months = sorted(month_set)
+
+    rows = (
+        Table1DailyRollup.objects
+        .filter(
+            station_user_id__in=user_ids,
+            date__gte=months[0],
+            date__lt=_next_month(months[-1]),
+        )
+        .annotate(month=TruncMonth("date"))
+        .values("station_user_id", "month", "shift")
+        .annotate(**_metric_sums(rows_count=Coalesce(Sum("rows_count"), 0)))
+        .order_by()
+    )
+
+    Table1MonthlyRollup.objects.filter(station_user_id__in=user_ids, month__in=months).delete()
+    Table1MonthlyRollup.objects.bulk_create(
+        [Table1MonthlyRollup(**row) for row in rows if row["month"] in month_set],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+@transaction.atomic
+def refresh_table1_rollups(user_id: int, dates) -> None:
+    """
+    Bitta stansiyaning berilgan sanalari uchun kunlik va oylik rollup larni qayta hisoblaydi.
+
+    StationDailyTable1 saqlangan/o'chirilgan joyda, o'sha tranzaksiya ichida chaqiriladi.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    rows = (
+        StationDailyTable1.objects
+        .filter(station_user_id=user_id, date__in=dates)
+        .values("date", "shift")
+        .annotate(**_metric_sums(rows_count=Count("id")))
+        .order_by()
+    )
+
+    Table1DailyRollup.objects.filter(station_user_id=user_id, date__in=dates).delete()
+    Table1DailyRollup.objects.bulk_create(
+        [Table1DailyRollup(station_user_id=user_id, **row) for row in rows],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+    _refresh_monthly([user_id], {_month_start(d) for d in dates})
+
+
+@transaction.atomic
+def table1_rows_changed(user_id: int, dates) -> None:
+    """
+    StationDailyTable1 qatorlari yozilgan/o'chirilgan joyda, o'sha tranzaksiya ichida chaqiriladi:
+    rollup larni yangilaydi va shu sanalar hisobot cache versiyasini oshiradi.
+    """
+    dates = set(dates)
+    refresh_table1_rollups(user_id, dates)
+    bump_versions(table1_version_key(d) for d in dates)
+
+
+@transaction.atomic
+def rebuild_table1_rollups() -> tuple[int, int]:
+    """
+    Barcha rollup larni StationDailyTable1 dan noldan quradi va eski hamda yangi rollup
+    sanalarining table1 versiyasini oshiradi - hisobot cache lari (closed period ham) yangilanadi.
+    Natija: (kunlik qatorlar soni, oylik qatorlar soni)
+    """
+    dates = set(Table1DailyRollup.objects.values_list("date", flat=True).distinct())
+
+    Table1MonthlyRollup.objects.all().delete()
+    Table1DailyRollup.objects.all().delete()
+
+    rows = (
+        StationDailyTable1.objects
+        .values("station_user_id", "date", "shift")
+        .annotate(**_metric_sums(rows_count=Count("id")))
+        .order_by()
+    )
+
+    daily_count = 0
+    months_by_user = defaultdict(set)
+    batch = []
+    for row in rows.iterator(chunk_size=BULK_BATCH_SIZE):
+        months_by_user[row["station_user_id"]].add(_month_start(row["date"]))
+        dates.add(row["date"])
+        batch.append(Table1DailyRollup(**row))
+        if len(batch) >= BULK_BATCH_SIZE:
+            Table1DailyRollup.objects.bulk_create(batch)
+            daily_count += len(batch)
+            batch = []
+
+    if batch:
+        Table1DailyRollup.objects.bulk_create(batch)
+        daily_count += len(batch)
+
+    all_months = set().union(*months_by_user.values()) if months_by_user else set()
+    _refresh_monthly(list(months_by_user), all_months)
+    bump_versions(table1_version_key(d) for d in dates)
+
+    return daily_count, Table1MonthlyRollup.objects.count()
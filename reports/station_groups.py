@@ -0,0 +1,218 @@
+"""
+Stansiya -> ko'rsatish guruhi reestri.
+
+DISPLAY_GROUPS faqat shu yerda: kvartalniy, umumiy, Table1 Excel va Table2 maket
+bir xil guruhlash va tartibni ishlatadi. Guruh kaliti (title, "group1"...)
+KvartalniyGroupExtraPlan.group_key sifatida bazada saqlanadi - o'zgartirmang.
+
+Har so'rovda nomlarni normallashtirib DISPLAY_GROUPS ni aylanish o'rniga
+get_station_group_index() StationProfile lardan bir marta indeks quradi
+(profile_id / user_id -> guruh va tartib) va uni cache da STATIONS versiyasi bilan
+saqlaydi. Stansiya qo'shilgan/o'zgargan/o'chirilgan joyda bump_versions([STATIONS_VERSION_KEY])
+chaqiriladi - boshqa worker lar ham keyingi so'rovda indeksni qayta quradi;
+shu jarayondagi StationProfile save/delete esa cache ni darhol tozalaydi (signal).
+"""
+from dataclasses import dataclass
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import StationProfile
+from .report_cache import report_cache
+from .table1_report import CACHE_TIMEOUT, FrozenDict
+from .versions import STATIONS_VERSION_KEY, get_versions
+
+
+DISPLAY_GROUPS = [
+    {
+        "title": "group1",
+        "stations": [
+            "Chuqursoy LM",
+            "Toshkent LM",
+            "Sergeli LM",
+            "Jaloir LM",
+            "Ohangaron LM",
+            "Nazarbek LM",
+            "Urtavul LM",
+            "Sirdaryo LM",
+            "Jizzax LM",
+            "Ablik LM",
+            "To'ytepa",
+        ],
+        "has_veshoz": True,
+    },
+    {
+        "title": "group2",
+        "stations": [
+            "Qo'qon LM",
+            "Rovuston LM",
+            "Marg'ilon LM",
+            "Axtachi LM",
+            "Asaka LM",
+        ],
+        "has_veshoz": True,
+    },
+    {
+        "title": "group3",
+        "stations": [
+            "Buxoro LM",
+            "Tinchlik LM",
+            "Karmana LM",
+            "Yangi-Zarafshon LM",
+            "Ulug'bek LM",
+            "Marokand LM",
+        ],
+        "has_veshoz": True,
+    },
+    {
+        "title": "group4",
+        "stations": [
+            "Qarshi LM",
+            "Dehqonobod LM",
+        ],
+        "has_veshoz": True,
+    },
+    {
+        "title": "group5",
+        "stations": [
+            "Termiz LM",
+        ],
+        "has_veshoz": True,
+    },
+    {
+        "title": "group6",
+        "stations": [
+            "Nukus LM",
+            "Kirkkiz LM",
+            "Urganch LM",
+            "Pitnyak LM",
+        ],
+        "has_veshoz": True,
+    },
+]
+
+VESHOZ_GROUP_KEYS = tuple(cfg["title"] for cfg in DISPLAY_GROUPS if cfg.get("has_veshoz"))
+
+CACHE_KEY = "reports:station_groups"
+
+_NAME_TRANSLATION = str.maketrans({
+    "‘": "'",
+    "’": "'",
+    "`": "'",
+    "ʼ": "'",
+    "ʻ": "'",
+    "ё": "е",
+    "–": "-",
+    "—": "-",
+})
+
+
+def normalize_station_name(value) -> str:
+    """
+    Station nomlarini solishtirish uchun normal holatga keltiradi.
+    Masalan: Qo'qon / Qo‘qon, bo'sh joylar, katta-kichik harflar farq qilmaydi.
+    """
+    return " ".join(str(value or "").lower().translate(_NAME_TRANSLATION).split())
+
+
+@dataclass(frozen=True)
+class StationRef:
+    """Hisobot qatorlari uchun StationProfile ning kerakli qismi (id, station_name)."""
+    id: int
+    user_id: int
+    station_name: str
+
+
+@dataclass(frozen=True)
+class StationPlacement:
+    group_key: str
+    group_index: int  # 1..len(DISPLAY_GROUPS)
+    order: int        # guruh ichidagi o'rni (0 dan)
+
+    @property
+    def sort_key(self) -> tuple:
+        return (self.group_index, self.order)
+
+
+@dataclass(frozen=True)
+class StationSlot:
+    name: str                   # DISPLAY_GROUPS dagi nom
+    station: StationRef | None  # bazada yo'q bo'lsa None (bo'sh qator chiqadi)
+
+
+@dataclass(frozen=True)
+class StationGroup:
+    key: str
+    index: int
+    has_veshoz: bool
+    slots: tuple
+
+
+@dataclass(frozen=True)
+class StationGroupIndex:
+    groups: tuple           # StationGroup lar, DISPLAY_GROUPS tartibida
+    unmatched: tuple        # hech bir guruhga kirmagan StationRef lar (station_name bo'yicha)
+    by_profile: FrozenDict  # {profile_id: StationPlacement}
+    by_user: FrozenDict     # {user_id: StationPlacement}
+
+
+def build_station_group_index() -> StationGroupIndex:
+    """1 ta query: barcha StationProfile lar (id, user_id, station_name)."""
+    latest_by_name = {}
+    all_by_name = {}
+    for pk, user_id, station_name in (
+        StationProfile.objects.order_by("station_name", "id").values_list("id", "user_id", "station_name")
+    ):
+        ref = StationRef(id=pk, user_id=user_id, station_name=station_name)
+        norm = normalize_station_name(station_name)
+        # bir xil nomli profillardan guruh qatori uchun oxirgisi olinadi (oldingi hisobotlardagidek)
+        latest_by_name[norm] = ref
+        all_by_name.setdefault(norm, []).append(ref)
+
+    groups = []
+    by_profile, by_user = {}, {}
+    known = set()
+    for group_index, cfg in enumerate(DISPLAY_GROUPS, start=1):
+        slots = []
+        for order, name in enumerate(cfg["stations"]):
+            norm = normalize_station_name(name)
+            slots.append(StationSlot(name=name, station=latest_by_name.get(norm)))
+
+            placement = StationPlacement(group_key=cfg["title"], group_index=group_index, order=order)
+            for ref in all_by_name.get(norm, ()):
+                by_profile.setdefault(ref.id, placement)
+                by_user.setdefault(ref.user_id, placement)
+            known.add(norm)
+
+        groups.append(StationGroup(
+            key=cfg["title"],
+            index=group_index,
+            has_veshoz=bool(cfg.get("has_veshoz")),
+            slots=tuple(slots),
+        ))
+
+    return StationGroupIndex(
+        groups=tuple(groups),
+        unmatched=tuple(ref for norm, ref in latest_by_name.items() if norm not in known),
+        by_profile=FrozenDict(by_profile),
+        by_user=FrozenDict(by_user),
+    )
+
+
+def get_station_group_index() -> StationGroupIndex:
+    """build_station_group_index() natijasi cache dan; stansiyalar versiyasi o'zgarsa qayta quriladi."""
+    version = get_versions([STATIONS_VERSION_KEY])[STATIONS_VERSION_KEY]
+
+    hit = report_cache().get(CACHE_KEY)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+
+    index = build_station_group_index()
+    report_cache().set(CACHE_KEY, (version, index), CACHE_TIMEOUT)
+    return index
+
+
+@receiver(post_save, sender=StationProfile)
+@receiver(post_delete, sender=StationProfile)
+def _station_profile_changed(sender, **kwargs):
+    report_cache().delete(CACHE_KEY)
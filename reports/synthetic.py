@@ -0,0 +1,305 @@
+"""
+Benchmark va qo'lda sinash uchun sintetik tarix (manage.py generate_synthetic_data).
+
+Stansiyalar DISPLAY_GROUPS nomlari bilan yaratiladi (keyin "Synth N LM" lar), shuning
+uchun kvartalniy/umumiy guruhlari to'la chiqadi. Har stansiya uchun har kuni:
+- StationDailyTable1: 1-3 blok (terminal), day (+ tunli stansiyada night) va total;
+- StationDailyTable2: TABLE2_ROWS ning barcha kalitlari, TABLE2_BOTTOM_FIELDS, KP sektorlari;
+oylar bo'yicha KvartalniyMonthly rejalari va habarnomalar (o'qilganlari bilan).
+
+Barcha userlar SYNTH_PREFIX bilan boshlanadi - clear_synthetic_data() faqat ularni o'chiradi.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import KvartalniyGroupExtraPlan, KvartalniyMonthly, KvartalniyMonthlyPlan, StationProfile
+from .forms import TABLE1_FIELDS, TERMINAL_NAME_KEY
+from .kvartalniy import STATION_PLAN_FIELDS, VESHOZ_PLAN_FIELDS, VESHOZ_ROW_NAME
+from .models import Notification, NotificationRead, StationDailyTable1, StationDailyTable2
+from .rollups import rebuild_table1_rollups
+from .station_groups import DISPLAY_GROUPS, VESHOZ_GROUP_KEYS
+from .table2_sectors import with_canonical_sectors
+from .versions import (
+    STATIONS_VERSION_KEY,
+    bump_versions,
+    kvartalniy_plan_version_key,
+    table1_version_key,
+    table2_version_key,
+)
+
+
+SYNTH_PREFIX = "synth_"
+SYNTH_ADMIN = f"{SYNTH_PREFIX}admin"
+
+BULK_BATCH_SIZE = 2000
+
+# Table1 dagi "ИТОГО" ustunlari - qismlar yig'indisi
+TABLE1_PARTS = ("ft", "cont", "kr", "pv", "proch")
+TABLE1_GROUPS = ("vygr", "pod_vygr", "pogr", "pod_pogr")
+
+TABLE2_INT_BOTTOM = (
+    "vygr_wag_total", "vygr_wag_ktk", "vygr_tonn", "vygr_income",
+    "pogr_wag_total", "pogr_wag_ktk", "pogr_tonn", "pogr_income",
+    "os_wag_total", "os_wag_ktk", "os_tonn", "os_income",
+    "cargo_volume", "cargo_income",
+    "kp_ready_send", "kp_ready_autocar",
+    "kp_ready_send_capacity", "kp_ready_send_fact", "kp_ready_send_free",
+    "kp_ready_autocar_capacity", "kp_ready_autocar_fact", "kp_ready_autocar_free",
+)
+CARGO_NAMES = ("Пахта", "Цемент", "Зерно", "Уголь", "Металл", "Удобрения")
+SECTOR_NAMES = ("ФТТ", "УЛС", "Сектор А", "Сектор Б")
+
+
+@dataclass
+class SyntheticStats:
+    stations: int = 0
+    table1_rows: int = 0
+    table2_rows: int = 0
+    months: int = 0
+    notifications: int = 0
+    rollups: tuple = (0, 0)
+    dates: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return {
+            "stations": self.stations,
+            "table1_rows": self.table1_rows,
+            "table2_rows": self.table2_rows,
+            "months": self.months,
+            "notifications": self.notifications,
+            "daily_rollups": self.rollups[0],
+            "monthly_rollups": self.rollups[1],
+            "first_date": self.dates[0].isoformat() if self.dates else None,
+            "last_date": self.dates[-1].isoformat() if self.dates else None,
+        }
+
+
+def station_names(count: int) -> list[str]:
+    names = [name for group in DISPLAY_GROUPS for name in group["stations"]]
+    names += [f"Synth {i} LM" for i in range(1, max(count - len(names), 0) + 1)]
+    return names[:count]
+
+
+def _month_starts(d_from: date, d_to: date) -> list[date]:
+    months = []
+    cur = d_from.replace(day=1)
+    while cur <= d_to:
+        months.append(cur)
+        cur = (cur.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return months
+
+
+def _aware(d: date, hour: int):
+    return timezone.make_aware(datetime.combine(d, time(hour)), timezone.get_current_timezone())
+
+
+def _table1_shift_data(rng: random.Random, scale: float) -> dict:
+    data = {key: 0 for key, _label in TABLE1_FIELDS}
+    for group in TABLE1_GROUPS:
+        parts = {part: int(rng.randint(0, 40) * scale) for part in TABLE1_PARTS}
+        for part, value in parts.items():
+            data[f"{group}_{part}"] = value
+        data[f"{group}_itogo"] = sum(parts.values())
+        data[f"{group}_itogo_kon"] = parts["cont"] * 2
+    data["podano_lc"] = int(rng.randint(0, 60) * scale)
+    data["uborka"] = int(rng.randint(0, 60) * scale)
+    data["spc_lc"] = rng.randint(0, 10)
+    data["spc_station"] = rng.randint(0, 10)
+    data["income_daily"] = int(rng.randint(0, 900_000) * scale)
+    return data
+
+
+def _table1_rows(rng, user, d, blocks, has_night, submitted_at) -> list:
+    rows = []
+    for b in range(1, blocks + 1):
+        term_name = f"Terminal {b}"
+        day = _table1_shift_data(rng, 0.6 if has_night else 1.0)
+        night = _table1_shift_data(rng, 0.4) if has_night else {key: 0 for key, _label in TABLE1_FIELDS}
+        day["k_podache_so_st"] = rng.randint(0, 20)
+        night["k_podache_so_st"] = 0
+        total = {key: day[key] + night[key] for key, _label in TABLE1_FIELDS}
+        total["k_podache_so_st"] = day["k_podache_so_st"]
+
+        shifts = [("day", day), ("total", total)]
+        if has_night:
+            shifts.insert(1, ("night", night))
+        for shift, data in shifts:
+            data[TERMINAL_NAME_KEY] = term_name
+            obj = StationDailyTable1(
+                station_user=user,
+                date=d,
+                shift=shift,
+                block=b,
+                data=data,
+                submitted_at=submitted_at if shift == "total" else None,
+            )
+            obj.sync_metrics()  # bulk_create save() ni chaqirmaydi
+            rows.append(obj)
+    return rows
+
+
+def _table2_data(rng: random.Random) -> dict:
+    from .views import R22_P_KTK, R22_P_TOTAL, TABLE2_BOTTOM_FIELDS, TABLE2_ROWS
+
+    data = {}
+    for _n, _label, _code, k_total, k_ktk in TABLE2_ROWS:
+        total = rng.randint(0, 120)
+        data[k_total] = total
+        data[k_ktk] = rng.randint(0, total)
+    data[R22_P_TOTAL] = rng.randint(0, 50)
+    data[R22_P_KTK] = rng.randint(0, data[R22_P_TOTAL])
+
+    data[TABLE2_BOTTOM_FIELDS["income"]] = rng.randint(0, 900_000)
+    for key in TABLE2_INT_BOTTOM:
+        data[TABLE2_BOTTOM_FIELDS[key]] = rng.randint(0, 500)
+    data[TABLE2_BOTTOM_FIELDS["cargo_name"]] = rng.choice(CARGO_NAMES)
+
+    sector_rows = []
+    for name in rng.sample(SECTOR_NAMES, rng.randint(1, 3)):
+        capacity = rng.randint(50, 300)
+        fact = rng.randint(0, capacity)
+        sector_rows.append({"name": name, "capacity": capacity, "fact": fact, "free": capacity - fact})
+    return with_canonical_sectors(data, sector_rows)
+
+
+def _plan_values(rng: random.Random, fields) -> dict:
+    return {name: rng.randint(500, 20_000) for name in fields}
+
+
+def clear_synthetic_data() -> int:
+    """
+    SYNTH_PREFIX li userlar, ularning hisobotlari/rejalari (CASCADE) va sintetik admin
+    habarnomalari. KvartalniyMonthly va guruh rejalari qoladi - keyingi generatsiya ularni ishlatadi.
+    """
+    with transaction.atomic():
+        notifs, _ = Notification.objects.filter(created_by__username=SYNTH_ADMIN).delete()
+        users, _ = User.objects.filter(username__startswith=SYNTH_PREFIX).delete()
+    return notifs + users
+
+
+@transaction.atomic
+def generate_history(
+    stations: int = 30,
+    years: float = 2,
+    end: date | None = None,
+    seed: int = 1,
+    missing_ratio: float = 0.03,
+    notifications_per_month: int = 2,
+) -> SyntheticStats:
+    """
+    [end - years yil, end] oralig'i uchun sintetik tarix. Bir xil seed - bir xil ma'lumot
+    (benchmark natijalari solishtiriladigan bo'lishi uchun).
+    missing_ratio - stansiya kunni topshirmagan (qator yo'q) bo'lish ehtimoli.
+    """
+    rng = random.Random(seed)
+    end = end or timezone.localdate() - timedelta(days=1)
+    start = end - timedelta(days=max(round(365.25 * years), 1) - 1)
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    stats = SyntheticStats(dates=dates)
+
+    admin, _ = User.objects.get_or_create(
+        username=SYNTH_ADMIN,
+        defaults={"is_staff": True, "is_superuser": True},
+    )
+
+    profiles = []
+    for i, name in enumerate(station_names(stations), start=1):
+        user = User.objects.create(username=f"{SYNTH_PREFIX}{i:03d}")
+        profiles.append(StationProfile(
+            user=user,
+            station_name=name,
+            status=rng.random() < 0.6,  # tungi smenasi bor
+        ))
+    StationProfile.objects.bulk_create(profiles)
+    stats.stations = len(profiles)
+    blocks = {sp.user_id: rng.choice((1, 1, 1, 2, 2, 3)) for sp in profiles}
+
+    t1_batch, t2_batch = [], []
+    for d in dates:
+        for sp in profiles:
+            if rng.random() < missing_ratio:
+                continue
+            # oxirgi kunlar hali topshirilmagan bo'lishi mumkin
+            submitted = (end - d).days > 2 or rng.random() < 0.5
+            submitted_at = _aware(d, 20) if submitted else None
+            t1_batch += _table1_rows(rng, sp.user, d, blocks[sp.user_id], sp.status, submitted_at)
+            t2_batch.append(StationDailyTable2(station_user=sp.user, date=d, data=_table2_data(rng)))
+
+        if len(t1_batch) >= BULK_BATCH_SIZE:
+            StationDailyTable1.objects.bulk_create(t1_batch, batch_size=BULK_BATCH_SIZE)
+            stats.table1_rows += len(t1_batch)
+            t1_batch = []
+        if len(t2_batch) >= BULK_BATCH_SIZE:
+            StationDailyTable2.objects.bulk_create(t2_batch, batch_size=BULK_BATCH_SIZE)
+            stats.table2_rows += len(t2_batch)
+            t2_batch = []
+
+    StationDailyTable1.objects.bulk_create(t1_batch, batch_size=BULK_BATCH_SIZE)
+    StationDailyTable2.objects.bulk_create(t2_batch, batch_size=BULK_BATCH_SIZE)
+    stats.table1_rows += len(t1_batch)
+    stats.table2_rows += len(t2_batch)
+
+    # rejalar: shu oylar uchun mavjud KvartalniyMonthly ham ishlatiladi
+    months = _month_starts(start, end)
+    for month in months:
+        KvartalniyMonthly.objects.get_or_create(date=month)
+    monthly_by_date = {m.date: m for m in KvartalniyMonthly.objects.filter(date__in=months)}
+
+    veshoz_groups = list(VESHOZ_GROUP_KEYS)
+    KvartalniyMonthlyPlan.objects.bulk_create(
+        [
+            KvartalniyMonthlyPlan(monthly=monthly_by_date[month], station=sp, **_plan_values(rng, STATION_PLAN_FIELDS))
+            for month in months
+            for sp in profiles
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    KvartalniyGroupExtraPlan.objects.bulk_create(
+        [
+            KvartalniyGroupExtraPlan(
+                monthly=monthly_by_date[month],
+                group_key=group_key,
+                row_name=VESHOZ_ROW_NAME,
+                **_plan_values(rng, VESHOZ_PLAN_FIELDS),
+            )
+            for month in months
+            for group_key in veshoz_groups
+        ],
+        ignore_conflicts=True,
+    )
+    stats.months = len(months)
+
+    # habarnomalar: created_at auto_now_add - bulk_create dan keyin to'g'rilanadi
+    notifs = Notification.objects.bulk_create([
+        Notification(message=f"Sintetik habarnoma {month:%Y-%m} #{n}", created_by=admin, is_active=True)
+        for month in months
+        for n in range(1, notifications_per_month + 1)
+    ])
+    for i, notif in enumerate(notifs):
+        notif.created_at = _aware(months[i // notifications_per_month] + timedelta(days=i % 28), 9)
+    Notification.objects.bulk_update(notifs, ["created_at"], batch_size=BULK_BATCH_SIZE)
+    NotificationRead.objects.bulk_create(
+        [
+            NotificationRead(user_id=sp.user_id, notification=notif)
+            for notif in notifs
+            for sp in profiles
+            if rng.random() < 0.7
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    stats.notifications = len(notifs)
+
+    stats.rollups = rebuild_table1_rollups()
+    # oldin shu sanalar uchun cache langan hisobotlar eskirsin
+    bump_versions([
+        STATIONS_VERSION_KEY,
+        *(table1_version_key(d) for d in dates),
+        *(table2_version_key(d) for d in dates),
+        *(kvartalniy_plan_version_key(m) for m in months),
+    ])
+    return stats
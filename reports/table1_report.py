@@ -0,0 +1,271 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from accounts.models import StationProfile
+from .forms import TABLE1_FIELDS, TERMINAL_NAME_KEY
+from .models import StationDailyTable1
+from .report_cache import REPORT_CACHE_TIMEOUT, cached_report
+from .versions import STATIONS_VERSION_KEY, get_versions, table1_version_key
+
+
+FIELD_KEYS = tuple(key for key, _label in TABLE1_FIELDS)
+
+CACHE_TIMEOUT = REPORT_CACHE_TIMEOUT
+
+
+class FrozenDict(dict):
+    """
+    O'zgarmas dict: shablonlarda (get_item, .get) oddiy dict kabi ishlaydi,
+    cache uchun pickle qilinadi. O'zgartirish kerak bo'lsa .copy() oling.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenDict is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+EMPTY = FrozenDict()
+
+
+def _to_int(v):
+    if v in (None, "", "—", "-", "–"):
+        return 0
+    if isinstance(v, str):
+        v = v.replace("\xa0", "").replace(" ", "").replace(",", "")
+    try:
+        return int(float(v))
+    except Exception:
+        return 0
+
+
+def _int0(v):
+    try:
+        return int(v or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _apply_itogo_rules(data: dict, status=False) -> dict:
+    d = dict(data or {})
+    if status:
+        d['k_podache_so_st'] = 0
+    blocks = [
+        ("vygr",      "ft", "cont", "kr", "pv", "proch"),
+        ("pod_vygr",  "ft", "cont", "kr", "pv", "proch"),
+        ("pogr",      "ft", "cont", "kr", "pv", "proch"),
+        ("pod_pogr",  "ft", "cont", "kr", "pv", "proch"),
+    ]
+
+    for prefix, k_ft, k_cont, k_kr, k_pv, k_proch in blocks:
+        ft = _int0(d.get(f"{prefix}_{k_ft}"))
+        kr = _int0(d.get(f"{prefix}_{k_kr}"))
+        pv = _int0(d.get(f"{prefix}_{k_pv}"))
+        proch = _int0(d.get(f"{prefix}_{k_proch}"))
+        cont = _int0(d.get(f"{prefix}_{k_cont}"))
+
+        d[f"{prefix}_itogo"] = ft + kr + pv + proch
+        d[f"{prefix}_itogo_kon"] = cont
+
+    return d
+
+
+def _sum_dicts(dicts):
+    out = {}
+    if not dicts:
+        return out
+
+    keys = set()
+    for d in dicts:
+        keys |= set((d or {}).keys())
+
+    for k in keys:
+        if k in ("k_podache_so_st", TERMINAL_NAME_KEY):
+            val = ""
+            for d in dicts:
+                v = (d or {}).get(k, "")
+                if v not in ("", None):
+                    val = v
+                    break
+            out[k] = val
+            continue
+
+        s = 0
+        for d in dicts:
+            s += _int0((d or {}).get(k))
+        out[k] = s
+
+    return out
+
+
+def _sum_into(dst: dict, src: dict):
+    for k in FIELD_KEYS:
+        dst[k] = dst.get(k, 0) + _to_int(src.get(k, 0))
+
+
+@dataclass(frozen=True)
+class Table1Row:
+    data: FrozenDict
+    submitted_at: datetime | None
+
+
+@dataclass(frozen=True)
+class Table1Terminal:
+    block: int
+    terminal_name: str
+    day_row: Table1Row | None
+    night_row: Table1Row | None
+    total_row: Table1Row | None
+    day_data: FrozenDict
+    night_data: FrozenDict
+    total_data: FrozenDict
+
+
+@dataclass(frozen=True)
+class Table1StationDay:
+    user_id: int
+    login: str
+    name: str
+    status: bool            # tungi smena bormi
+    submitted: bool
+    terminals: tuple
+    sum_total: FrozenDict   # terminallar bo'yicha kun (+ tun)
+    day_sum: FrozenDict     # smena qatorlari bloklar bo'yicha yig'indisi
+    night_sum: FrozenDict
+    total_sum: FrozenDict
+
+
+@dataclass(frozen=True)
+class Table1DayReport:
+    date: date
+    stations: tuple         # barcha stansiyalar (username bo'yicha)
+    grand_total: FrozenDict  # faqat yuborganlar
+
+    @property
+    def submitted_stations(self) -> list:
+        return [st for st in self.stations if st.submitted]
+
+    def station(self, user_id: int):
+        for st in self.stations:
+            if st.user_id == user_id:
+                return st
+        return None
+
+
+def _build_station(sp, rows) -> Table1StationDay:
+    has_night = bool(sp.status)
+
+    by_shift_block = {}
+    for o in rows:
+        by_shift_block.setdefault((o.shift, o.block), Table1Row(
+            data=FrozenDict(o.data or {}),
+            submitted_at=o.submitted_at,
+        ))
+
+    blocks = sorted({o.block for o in rows}) or [1]
+
+    terminals = []
+    sum_total = {k: 0 for k in FIELD_KEYS}
+    for b in blocks:
+        day_row = by_shift_block.get(("day", b))
+        night_row = by_shift_block.get(("night", b))
+
+        day_raw = day_row.data if day_row else {}
+        night_raw = night_row.data if (night_row and has_night) else {}
+        day_data = _apply_itogo_rules(day_raw)
+        night_data = _apply_itogo_rules(night_raw, status=True) if has_night else {}
+
+        total_data = {k: 0 for k in FIELD_KEYS}
+        _sum_into(total_data, day_data)
+        _sum_into(sum_total, day_data)
+        if has_night:
+            _sum_into(total_data, night_data)
+            _sum_into(sum_total, night_data)
+
+        terminals.append(Table1Terminal(
+            block=b,
+            terminal_name=day_raw.get(TERMINAL_NAME_KEY) or night_raw.get(TERMINAL_NAME_KEY) or "",
+            day_row=day_row,
+            night_row=night_row,
+            total_row=by_shift_block.get(("total", b)),
+            day_data=FrozenDict(day_data),
+            night_data=FrozenDict(night_data),
+            total_data=FrozenDict(_apply_itogo_rules(total_data)),
+        ))
+
+    def shift_sum(shift):
+        return _apply_itogo_rules(_sum_dicts([
+            by_shift_block[(shift, b)].data
+            for b in blocks
+            if (shift, b) in by_shift_block
+        ]))
+
+    day_sum = shift_sum("day")
+    night_sum = shift_sum("night") if has_night else {}
+    total_sum = shift_sum("total")
+    total_sum["income_daily"] = _int0(day_sum.get("income_daily")) + (
+        _int0(night_sum.get("income_daily")) if has_night else 0
+    )
+
+    return Table1StationDay(
+        user_id=sp.user_id,
+        login=sp.user.username,
+        name=sp.station_name or sp.user.username,
+        status=has_night,
+        submitted=any(o.submitted_at is not None for o in rows),
+        terminals=tuple(terminals),
+        sum_total=FrozenDict(_apply_itogo_rules(sum_total)),
+        day_sum=FrozenDict(day_sum),
+        night_sum=FrozenDict(night_sum),
+        total_sum=FrozenDict(total_sum),
+    )
+
+
+def build_table1_day_report(d: date) -> Table1DayReport:
+    """
+    Bir kunlik Table1 (admin) hisobot: stansiya -> terminal (blok) -> kun/tun/jami.
+    2 ta query: profillar va shu sanadagi barcha qatorlar.
+    """
+    profiles = list(
+        StationProfile.objects
+        .select_related("user")
+        .filter(user__is_staff=False, user__is_superuser=False)
+        .order_by("user__username")
+    )
+
+    rows_by_user = {}
+    for obj in (
+        StationDailyTable1.objects
+        .filter(date=d, station_user_id__in=[sp.user_id for sp in profiles])
+        .only("id", "station_user_id", "shift", "block", "data", "submitted_at")
+        .order_by("id")
+    ):
+        rows_by_user.setdefault(obj.station_user_id, []).append(obj)
+
+    stations = tuple(_build_station(sp, rows_by_user.get(sp.user_id, [])) for sp in profiles)
+
+    grand_total = {k: 0 for k in FIELD_KEYS}
+    for st in stations:
+        if st.submitted:
+            _sum_into(grand_total, st.sum_total)
+
+    return Table1DayReport(
+        date=d,
+        stations=stations,
+        grand_total=FrozenDict(_apply_itogo_rules(grand_total)),
+    )
+
+
+def get_table1_day_report(d: date) -> Table1DayReport:
+    """
+    build_table1_day_report() natijasi cache dan. Kalit shu sana Table1 versiyasi va
+    stansiyalar versiyasini o'z ichiga oladi, shuning uchun yozuvdan keyin eski natija qaytmaydi.
+    """
+    versions = get_versions([table1_version_key(d), STATIONS_VERSION_KEY])
+    return cached_report("table1_day", d.isoformat(), versions, lambda: build_table1_day_report(d))
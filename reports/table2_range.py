@@ -0,0 +1,200 @@
+from datetime import timedelta
+
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from .exports import export_or_enqueue
+from .table2_report import TABLE2_RANGE_MAX_DAYS, build_table2_range_report
+from .umumiy import _safe_date
+from .views import TABLE2_ROWS, staff_required
+from .xlsx import StreamingWorkbook
+
+
+# sahifa / JSON da tanlanmagan bo'lsa - "Наличие на КП"
+DEFAULT_ROW = 24
+
+TABLE2_ROWS_BY_N = {row[0]: row for row in TABLE2_ROWS}
+
+
+def _read_range(params):
+    """?from_date=&to_date= (YYYY-MM-DD); default - joriy oy boshidan bugungacha, eng ko'pi TABLE2_RANGE_MAX_DAYS kun."""
+    today = timezone.localdate()
+    d_from = _safe_date(params.get("from_date"), today.replace(day=1))
+    d_to = _safe_date(params.get("to_date"), today)
+    d_from, d_to = sorted((d_from, d_to))
+
+    if (d_to - d_from).days >= TABLE2_RANGE_MAX_DAYS:
+        d_from = d_to - timedelta(days=TABLE2_RANGE_MAX_DAYS - 1)
+    return d_from, d_to
+
+
+def _read_row(params):
+    try:
+        n = int(params.get("row") or DEFAULT_ROW)
+    except (TypeError, ValueError):
+        n = DEFAULT_ROW
+    return TABLE2_ROWS_BY_N.get(n) or TABLE2_ROWS_BY_N[DEFAULT_ROW]
+
+
+def _metric_rows(dates, series, k_total, k_ktk) -> list:
+    """Sahifa jadvali: har sana uchun qator, har seriya uchun {total, ktk} (yubormagan - None)."""
+    columns = [s.metric(k_total, k_ktk) for s in series]
+    return [
+        {
+            "date": d,
+            "cells": [
+                None if col[i] is None else {"total": col[i][0], "ktk": col[i][1]}
+                for col in columns
+            ],
+        }
+        for i, d in enumerate(dates)
+    ]
+
+
+def _series_json(series, k_total, k_ktk) -> dict:
+    values = series.metric(k_total, k_ktk)
+    return {
+        "key": series.key,
+        "name": series.name,
+        "kind": series.kind,
+        "total": [None if v is None else v[0] for v in values],
+        "ktk": [None if v is None else v[1] for v in values],
+    }
+
+
+@staff_required
+def admin_table2_range(request):
+    d_from, d_to = _read_range(request.GET)
+    n, label, code, k_total, k_ktk = _read_row(request.GET)
+    report = build_table2_range_report(d_from, d_to)
+
+    return render(request, "admin_table2_range.html", {
+        "from_date": d_from,
+        "to_date": d_to,
+        "max_days": TABLE2_RANGE_MAX_DAYS,
+        "row": {"n": n, "label": label, "code": code},
+        "row_choices": [{"n": r[0], "label": r[1], "code": r[2]} for r in TABLE2_ROWS],
+        "groups": report.groups,
+        "stations": report.stations,
+        "group_rows": _metric_rows(report.dates, report.groups, k_total, k_ktk),
+        "station_rows": _metric_rows(report.dates, report.stations, k_total, k_ktk),
+    })
+
+
+@staff_required
+def admin_table2_range_json(request):
+    d_from, d_to = _read_range(request.GET)
+    n, label, code, k_total, k_ktk = _read_row(request.GET)
+    report = build_table2_range_report(d_from, d_to)
+
+    return JsonResponse({
+        "from_date": d_from.isoformat(),
+        "to_date": d_to.isoformat(),
+        "row": {"n": n, "label": label, "code": code},
+        "dates": [d.isoformat() for d in report.dates],
+        "groups": [_series_json(s, k_total, k_ktk) for s in report.groups],
+        "stations": [_series_json(s, k_total, k_ktk) for s in report.stations],
+    })
+
+
+@staff_required
+def admin_table2_range_export_excel(request):
+    d_from, d_to = _read_range(request.GET)
+    return export_or_enqueue(request, "table2_range", {"from_date": d_from, "to_date": d_to})
+
+
+def table2_range_workbook(from_date, to_date) -> StreamingWorkbook:
+    """
+    Oraliq uchun barcha TABLE2_ROWS ko'rsatkichlari: "Отделения" (guruhlar + Дорога) va
+    "Филиалы" (stansiyalar) varaqlari. Har ko'rsatkich - sanalar bo'yicha blok.
+    """
+    report = build_table2_range_report(from_date, to_date)
+
+    book = StreamingWorkbook()
+    _write_range_sheet(book.sheet("Отделения"), report, report.groups)
+    _write_range_sheet(book.sheet("Филиалы"), report, report.stations)
+    return book
+
+
+def _write_range_sheet(ws, report, series):
+    thin = Side(style="thin", color="000000")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    center = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    left = Alignment(horizontal="left", vertical="center", wrap_text=True)
+
+    font_title = Font(name="Times New Roman", size=14, bold=True)
+    font_header = Font(name="Times New Roman", size=11, bold=True)
+    font_body = Font(name="Times New Roman", size=11)
+    font_road = Font(name="Times New Roman", size=11, bold=True)
+    fill_header = PatternFill("solid", fgColor="F2F2F2")
+
+    first_value_col = 5
+    last_col = first_value_col + 2 * len(series) - 1 if series else first_value_col - 1
+
+    ws.column_width("A", 6)
+    ws.column_width("B", 28)
+    ws.column_width("C", 8)
+    ws.column_width("D", 12)
+    for col in range(first_value_col, last_col + 1):
+        ws.column_width(get_column_letter(col), 9)
+    ws.freeze_panes = f"{get_column_letter(first_value_col)}4"
+
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=max(last_col, 4))
+    ws.cell(
+        1, 1,
+        f"Суточный отчёт о движении контейнеров — "
+        f"{report.date_from.strftime('%d.%m.%Y')} — {report.date_to.strftime('%d.%m.%Y')}",
+        font=font_title, alignment=center,
+    )
+    ws.row_height(1, 30)
+
+    for col, title in enumerate(("№", "Наименование показателя", "Код", "Дата"), start=1):
+        ws.merge_cells(start_row=2, start_column=col, end_row=3, end_column=col)
+        ws.cell(2, col, title)
+        ws.cell(3, col)
+
+    for i, s in enumerate(series):
+        col = first_value_col + 2 * i
+        ws.merge_cells(start_row=2, start_column=col, end_row=2, end_column=col + 1)
+        ws.cell(2, col, s.name)
+        ws.cell(2, col + 1)
+        ws.cell(3, col, "всего")
+        ws.cell(3, col + 1, "ктк")
+
+    for row in (2, 3):
+        for col in range(1, last_col + 1):
+            ws.cell(row, col, font=font_header, fill=fill_header, border=border, alignment=center)
+    ws.row_height(2, 30)
+
+    ws.flush(4)
+
+    r = 4
+    days = len(report.dates)
+    for n, label, code, k_total, k_ktk in TABLE2_ROWS:
+        columns = [s.metric(k_total, k_ktk) for s in series]
+
+        if days > 1:
+            for col in (1, 2, 3):
+                ws.merge_cells(start_row=r, start_column=col, end_row=r + days - 1, end_column=col)
+        ws.cell(r, 1, n, font=font_header)
+        ws.cell(r, 2, label, font=font_header)
+        ws.cell(r, 3, code, font=font_header)
+
+        for i, d in enumerate(report.dates):
+            ws.cell(r, 4, d.strftime("%d.%m.%Y"), font=font_body)
+            for j, (s, values) in enumerate(zip(series, columns)):
+                col = first_value_col + 2 * j
+                font = font_road if s.kind == "road" else font_body
+                value = values[i]
+                ws.cell(r, col, "" if value is None else value[0], font=font)
+                ws.cell(r, col + 1, "" if value is None else value[1], font=font)
+
+            for col in range(1, last_col + 1):
+                ws.cell(r, col, border=border, alignment=left if col == 2 else center)
+            r += 1
+
+        ws.flush(r)
@@ -0,0 +1,258 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import groupby
+
+from django.db.models import Q
+
+from accounts.models import StationProfile
+from .aggregates import date_intervals
+from .models import StationDailyTable2
+from .report_cache import cached_report, report_cache, report_cache_key
+from .station_groups import DISPLAY_GROUPS, get_station_group_index
+from .table1_report import CACHE_TIMEOUT, FrozenDict
+from .versions import STATIONS_VERSION_KEY, get_table2_versions_between, get_versions, table2_version_key
+
+
+def _dget(d: dict, key: str, default=0) -> int:
+    try:
+        return int((d or {}).get(key) or default)
+    except (TypeError, ValueError):
+        return int(default)
+
+
+@lru_cache(maxsize=1)
+def table2_row_keys() -> tuple:
+    """TABLE2_ROWS dagi barcha rNN_total / rNN_ktk kalitlari (jadval tartibida)."""
+    from .views import TABLE2_ROWS  # views bu moduldan import qiladi
+
+    keys = []
+    for _n, _label, _code, k_total, k_ktk in TABLE2_ROWS:
+        keys += [k_total, k_ktk]
+    return tuple(keys)
+
+
+def table2_group_keys() -> tuple:
+    return tuple(group["title"] for group in DISPLAY_GROUPS)
+
+
+def _empty_sums() -> dict:
+    return {k: 0 for k in table2_row_keys()}
+
+
+def _add_into(dst: dict, src: dict):
+    for k in table2_row_keys():
+        dst[k] += src[k]
+
+
+@dataclass(frozen=True)
+class Table2StationDay:
+    user_id: int
+    login: str
+    profile_name: str | None  # StationProfile yo'q bo'lsa None
+    group_key: str | None     # DISPLAY_GROUPS da topilmasa None
+    data: FrozenDict          # TABLE2_ROWS kalitlari, int
+
+    @property
+    def name(self) -> str:
+        return self.profile_name or self.login
+
+
+@dataclass(frozen=True)
+class Table2DayReport:
+    date: date
+    stations: tuple          # yuborgan stansiyalar (username bo'yicha)
+    group_sums: FrozenDict   # {"groupN": yig'indi}, barcha guruhlar (bo'sh bo'lsa 0)
+    groups_total: FrozenDict  # guruhlardagi stansiyalar yig'indisi
+    other_sum: FrozenDict    # hech bir guruhga kirmaganlar
+    road_sum: FrozenDict     # barcha stansiyalar ("Дорога")
+
+    @property
+    def has_other(self) -> bool:
+        return any(st.group_key is None for st in self.stations)
+
+
+def _submitted_rows():
+    return (
+        StationDailyTable2.objects
+        .filter(submitted_at__isnull=False)
+        .select_related("station_user__station_profile")
+        .exclude(station_user__is_staff=True)
+        .exclude(station_user__is_superuser=True)
+    )
+
+
+def _build_day(d: date, objs, station_index) -> Table2DayReport:
+    """objs - shu sananing qatorlari (username bo'yicha)."""
+    group_sums = {key: _empty_sums() for key in table2_group_keys()}
+    other_sum = _empty_sums()
+    stations = []
+
+    for o in objs:
+        u = o.station_user
+        try:
+            profile_name = u.station_profile.station_name
+        except StationProfile.DoesNotExist:
+            profile_name = None
+
+        raw = o.data or {}
+        data = {k: _dget(raw, k, 0) for k in table2_row_keys()}
+        placement = station_index.by_user.get(u.id)
+        group_key = placement.group_key if placement else None
+
+        _add_into(group_sums[group_key] if group_key else other_sum, data)
+        stations.append(Table2StationDay(
+            user_id=u.id,
+            login=u.username,
+            profile_name=profile_name,
+            group_key=group_key,
+            data=FrozenDict(data),
+        ))
+
+    groups_total = _empty_sums()
+    for sums in group_sums.values():
+        _add_into(groups_total, sums)
+
+    road_sum = dict(groups_total)
+    _add_into(road_sum, other_sum)
+
+    return Table2DayReport(
+        date=d,
+        stations=tuple(stations),
+        group_sums=FrozenDict({key: FrozenDict(sums) for key, sums in group_sums.items()}),
+        groups_total=FrozenDict(groups_total),
+        other_sum=FrozenDict(other_sum),
+        road_sum=FrozenDict(road_sum),
+    )
+
+
+def build_table2_day_report(d: date) -> Table2DayReport:
+    """
+    Bir kunlik Table2 (admin) yig'indisi: layout, graph va Excel maket uchun umumiy.
+    1 ta query: yuborilgan qatorlar user va profil bilan (guruh - station_groups indeksidan).
+    """
+    objs = _submitted_rows().filter(date=d).order_by("station_user__username")
+    return _build_day(d, objs, get_station_group_index())
+
+
+def get_table2_day_report(d: date) -> Table2DayReport:
+    """build_table2_day_report() natijasi cache dan (kalit: shu sana Table2 va stansiyalar versiyasi)."""
+    versions = get_versions([table2_version_key(d), STATIONS_VERSION_KEY])
+    return cached_report("table2_day", d.isoformat(), versions, lambda: build_table2_day_report(d))
+
+
+def get_table2_day_reports(d_from: date, d_to: date) -> list[Table2DayReport]:
+    """
+    [d_from, d_to] dagi har kun uchun Table2DayReport (sana tartibida).
+
+    Kunlik natijalar get_table2_day_report() bilan bir xil cache kalitlarida: versiyalar bitta
+    BETWEEN so'rov, cache dagilar get_many bilan olinadi. Qolgan (yangi yoki o'zgargan) kunlar
+    uzluksiz oraliqlar bo'yicha bitta date indeksli so'rovda o'qiladi va shu yerning o'zida
+    kunlarga bo'lib yig'iladi - oy hisobotini qayta ochganda faqat o'zgargan kunlar quriladi.
+    """
+    d_from, d_to = sorted((d_from, d_to))
+    dates = [d_from + timedelta(days=i) for i in range((d_to - d_from).days + 1)]
+
+    versions = get_table2_versions_between([(d_from, d_to)], keys=[STATIONS_VERSION_KEY])
+    stations_version = versions[STATIONS_VERSION_KEY]
+    cache_keys = {
+        d: report_cache_key("table2_day", d.isoformat(), {
+            table2_version_key(d): versions.get(table2_version_key(d), 0),
+            STATIONS_VERSION_KEY: stations_version,
+        })
+        for d in dates
+    }
+
+    found = report_cache().get_many(list(cache_keys.values()))
+    reports = {d: found[key] for d, key in cache_keys.items() if key in found}
+    missing = [d for d in dates if d not in reports]
+
+    if missing:
+        cond = Q()
+        for start, end in date_intervals(missing):
+            cond |= Q(date__range=(start, end))
+        objs = _submitted_rows().filter(cond).order_by("date", "station_user__username")
+
+        station_index = get_station_group_index()
+        rows_by_date = {d: list(rows) for d, rows in groupby(objs, key=lambda o: o.date)}
+        built = {d: _build_day(d, rows_by_date.get(d, ()), station_index) for d in missing}
+
+        report_cache().set_many({cache_keys[d]: report for d, report in built.items()}, CACHE_TIMEOUT)
+        reports.update(built)
+
+    return [reports[d] for d in dates]
+
+
+# =========================
+# TABLE 2: sana oralig'i (time series)
+# =========================
+
+# bitta sahifa / eksport uchun eng uzun oraliq (kunlar)
+TABLE2_RANGE_MAX_DAYS = 93
+
+
+@dataclass(frozen=True)
+class Table2Series:
+    key: str     # "group1".., "other", "road" yoki stansiya user_id
+    name: str
+    kind: str    # "group" | "road" | "station"
+    values: tuple  # har kun uchun FrozenDict (TABLE2_ROWS kalitlari); stansiya yubormagan kun - None
+
+    def metric(self, k_total: str, k_ktk: str) -> tuple:
+        """[(total, ktk) | None, ...] - bitta TABLE2_ROWS qatori bo'yicha."""
+        return tuple(None if v is None else (v[k_total], v[k_ktk]) for v in self.values)
+
+
+@dataclass(frozen=True)
+class Table2RangeReport:
+    date_from: date
+    date_to: date
+    dates: tuple
+    groups: tuple    # guruhlar (DISPLAY_GROUPS tartibida), "Boshqa" (bo'lsa) va Дорога
+    stations: tuple  # yuborgan stansiyalar, guruh va guruh ichidagi tartib bo'yicha
+
+
+def build_table2_range_report(d_from: date, d_to: date) -> Table2RangeReport:
+    days = get_table2_day_reports(d_from, d_to)
+    station_index = get_station_group_index()
+    n = len(days)
+
+    groups = [
+        Table2Series(
+            key=key,
+            name=str(idx),
+            kind="group",
+            values=tuple(day.group_sums[key] for day in days),
+        )
+        for idx, key in enumerate(table2_group_keys(), start=1)
+    ]
+    if any(day.has_other for day in days):
+        groups.append(Table2Series("other", "Boshqa", "group", tuple(day.other_sum for day in days)))
+    groups.append(Table2Series("road", "Дорога", "road", tuple(day.road_sum for day in days)))
+
+    # stansiya qatorlari: bir marta o'tish, har stansiyaga kunlar bo'yicha joy
+    values_by_user, name_by_user = {}, {}
+    for i, day in enumerate(days):
+        for st in day.stations:
+            values_by_user.setdefault(st.user_id, [None] * n)[i] = st.data
+            name_by_user[st.user_id] = st.name  # oxirgi kundagi nom
+
+    def _order(user_id):
+        placement = station_index.by_user.get(user_id)
+        if placement:
+            return placement.sort_key
+        return (999, name_by_user[user_id].lower())
+
+    stations = tuple(
+        Table2Series(key=str(user_id), name=name_by_user[user_id], kind="station", values=tuple(values_by_user[user_id]))
+        for user_id in sorted(values_by_user, key=_order)
+    )
+
+    d_from, d_to = sorted((d_from, d_to))
+    return Table2RangeReport(
+        date_from=d_from,
+        date_to=d_to,
+        dates=tuple(day.date for day in days),
+        groups=tuple(groups),
+        stations=stations,
+    )
@@ -0,0 +1,106 @@
+"""
+Table2 KP sektorlari - StationDailyTable2.data dagi yagona (kanonik) shakl:
+
+    data["kp_sector_rows"] = [{"name": str, "capacity": int, "fact": int, "free": int}, ...]  # kamida 1 ta
+    data["kp_sector_capacity_total"] / ["kp_sector_fact_total"] / ["kp_sector_free_total"]
+
+Eski yozuvlar (kp_fp_rows / kp_uus_rows yoki kp_fp_capacity ... kp_uus_free) yozish paytida
+with_canonical_sectors() bilan, bazadagilari esa 0012 migratsiyasi bilan shu shaklga o'tkaziladi.
+Ko'rsatish (view) kodi kp_sector_rows ni tayyor holda o'qiydi.
+"""
+EMPTY_SECTOR_ROW = {"name": "", "capacity": 0, "fact": 0, "free": 0}
+
+LEGACY_SECTORS = (
+    # (eski qatorlar kaliti, eski yig'indi prefiksi, sektor nomi)
+    ("kp_fp_rows", "kp_fp", "ФТТ"),
+    ("kp_uus_rows", "kp_uus", "УЛС"),
+)
+
+
+def _int0(v):
+    try:
+        return int(v or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def empty_sector_rows() -> list:
+    return [dict(EMPTY_SECTOR_ROW)]
+
+
+def clean_sector_rows(rows) -> list:
+    """Har qatorni {name, capacity, fact, free} ga keltiradi; bo'sh bo'lsa bitta bo'sh qator."""
+    cleaned = [
+        {
+            "name": str(row.get("name") or "").strip(),
+            "capacity": _int0(row.get("capacity")),
+            "fact": _int0(row.get("fact")),
+            "free": _int0(row.get("free")),
+        }
+        for row in (r if isinstance(r, dict) else {} for r in (rows or []))
+    ]
+    return cleaned or empty_sector_rows()
+
+
+def sum_sector_rows(rows) -> dict:
+    return {
+        "capacity": sum(_int0(r.get("capacity")) for r in rows),
+        "fact": sum(_int0(r.get("fact")) for r in rows),
+        "free": sum(_int0(r.get("free")) for r in rows),
+    }
+
+
+def legacy_sector_rows(data: dict) -> list:
+    """
+    kp_sector_rows bo'lmagan eski yozuvlar: avval kp_fp_rows / kp_uus_rows ro'yxatlari,
+    ular yo'q bo'lsa kp_fp_* / kp_uus_* yig'indilari (biri to'ldirilgan bo'lsa ikkala sektor).
+    """
+    converted = []
+    for rows_key, _prefix, name in LEGACY_SECTORS:
+        old_rows = data.get(rows_key)
+        if isinstance(old_rows, list):
+            converted += [{**(row if isinstance(row, dict) else {}), "name": name} for row in old_rows]
+    if converted:
+        return clean_sector_rows(converted)
+
+    summary = [
+        {
+            "name": name,
+            "capacity": data.get(f"{prefix}_capacity"),
+            "fact": data.get(f"{prefix}_fact"),
+            "free": data.get(f"{prefix}_free"),
+        }
+        for _rows_key, prefix, name in LEGACY_SECTORS
+    ]
+    if any(_int0(row[k]) != 0 for row in summary for k in ("capacity", "fact", "free")):
+        return clean_sector_rows(summary)
+
+    return empty_sector_rows()
+
+
+def canonical_sector_rows(data: dict) -> list:
+    rows = (data or {}).get("kp_sector_rows")
+    if isinstance(rows, list) and rows:
+        return clean_sector_rows(rows)
+    return legacy_sector_rows(data or {})
+
+
+def with_canonical_sectors(data: dict, rows=None) -> dict:
+    """
+    data ga kanonik kp_sector_rows va yig'indilarni yozadi (rows berilmasa data dagi
+    yangi yoki eski kalitlardan). Eski kalitlar tegilmaydi - faqat arxiv uchun qoladi.
+    """
+    data = dict(data or {})
+    rows = clean_sector_rows(rows) if rows is not None else canonical_sector_rows(data)
+    totals = sum_sector_rows(rows)
+
+    data["kp_sector_rows"] = rows
+    data["kp_sector_capacity_total"] = totals["capacity"]
+    data["kp_sector_fact_total"] = totals["fact"]
+    data["kp_sector_free_total"] = totals["free"]
+    return data
+
+
+def stored_sector_rows(data: dict) -> list:
+    """Ko'rsatish uchun: saqlangan kanonik qatorlar, hech qanday moslashtirishsiz."""
+    return (data or {}).get("kp_sector_rows") or empty_sector_rows()
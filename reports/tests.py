@@ -1,3 +1,1097 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from datetime import date, timedelta
+from importlib import import_module
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+
+from accounts.models import KvartalniyGroupExtraPlan, KvartalniyMonthly, KvartalniyMonthlyPlan, StationProfile
+from . import notifications
+from .aggregates import _same_day_last_year, aggregate_table1_closed_period, date_intervals, last_year_intervals
+from .benchmarks import compare_results, measure_endpoints
+from .exports import export_fingerprint, export_or_enqueue
+from .models import TABLE1_METRIC_KEYS, ExportJob, StationDailyTable1, StationDailyTable2, Table1DailyRollup, Table1MonthlyRollup
+from .report_cache import report_cache
+from .rollups import rebuild_table1_rollups, table1_rows_changed
+from .station_groups import CACHE_KEY as STATION_GROUPS_CACHE_KEY, get_station_group_index
+from .table2_range import table2_range_workbook
+from .table2_report import get_table2_day_report, get_table2_day_reports
+from .synthetic import clear_synthetic_data, generate_history
+from .umumiy import _sum_scaled_plans_between
+from .versions import (
+    STATIONS_VERSION_KEY,
+    bump_versions,
+    get_versions,
+    kvartalniy_plan_version_key,
+    table1_version_key,
+    table2_version_key,
+)
+from .views import TABLE2_ROWS, table1_export_workbook, table2_layout_workbook
+from .xlsx import StreamingWorkbook
+
+
+class AdminTable1ReportViewQueriesTests(TestCase):
+    report_date = date(2024, 2, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.station_count = 0
+
+    def _add_station(self, has_night: bool, blocks: int = 1):
+        self.station_count += 1
+        user = User.objects.create(username=f"st{self.station_count}")
+        StationProfile.objects.create(user=user, station_name=f"Stansiya {self.station_count}", status=has_night)
+        bump_versions([STATIONS_VERSION_KEY])
+
+        shifts = ["day", "night", "total"] if has_night else ["day", "total"]
+        for b in range(1, blocks + 1):
+            for shift in shifts:
+                StationDailyTable1.objects.create(
+                    station_user=user,
+                    date=self.report_date,
+                    shift=shift,
+                    block=b,
+                    data={"k_podache_so_st": 1, "vygr_ft": 2, "pogr_kr": 3, "income_daily": 100},
+                    submitted_at=timezone.now() if shift == "total" else None,
+                )
+        table1_rows_changed(user.id, [self.report_date])
+
+    def _get_report(self):
+        url = reverse("admin_table1_report_view", kwargs={"date_str": self.report_date.isoformat()})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx)
+
+    def test_query_count_does_not_grow_with_stations(self):
+        self.client.force_login(self.admin)
+
+        self._add_station(has_night=True, blocks=2)
+        self._add_station(has_night=False)
+        response, small = self._get_report()
+        self.assertEqual(len(response.context["stations"]), 2)
+
+        for i in range(6):
+            self._add_station(has_night=bool(i % 2), blocks=1 + i % 3)
+        response, large = self._get_report()
+        self.assertEqual(len(response.context["stations"]), 8)
+
+        self.assertEqual(small, large)
+
+    def test_totals(self):
+        self.client.force_login(self.admin)
+
+        self._add_station(has_night=True, blocks=2)
+        self._add_station(has_night=False)
+        response, _ = self._get_report()
+
+        # night: 2 blok x 2 smena, kunduzgi: 1 blok x 1 smena
+        grand_total = response.context["grand_total"]
+        self.assertEqual(grand_total["vygr_ft"], 2 * 5)
+        self.assertEqual(grand_total["vygr_itogo"], 2 * 5)
+        self.assertEqual(grand_total["pogr_kr"], 3 * 5)
+        self.assertEqual(grand_total["income_daily"], 100 * 5)
+
+    def test_export_rows_keep_day_night_total_values(self):
+        self._add_station(has_night=True, blocks=2)
+
+        out = io.BytesIO()
+        table1_export_workbook(self.report_date).save(out)
+        ws = load_workbook(out).active
+
+        def row(r):
+            # 3: podano_lc, 4: k_podache_so_st, 5: vygr_ft, 10: vygr_itogo, 22: pogr_kr, 32: income_daily
+            return [ws.cell(r, c).value for c in (2, 3, 4, 5, 10, 22, 32)]
+
+        self.assertEqual(ws.max_column, 32)  # spc_* ustunlari eksportga kirmaydi
+        self.assertEqual(row(4), ["kun", 0, 0, 4, 4, 6, 200])
+        self.assertEqual(row(5), ["tun", 0, 1, 4, 4, 6, 200])
+        self.assertEqual(row(6), ["jami", 0, 1, 4, 4, 6, 400])
+
+
+
+class StationTable1EditSaveTests(TestCase):
+    report_date = date(2024, 2, 10)
+
+    def setUp(self):
+        self.user = User.objects.create(username="st1")
+        StationProfile.objects.create(user=self.user, station_name="Stansiya 1", status=False)
+        self.client.force_login(self.user)
+        self.url = reverse("station_table_1_edit", kwargs={"date_str": self.report_date.isoformat()})
+
+    def _rows(self):
+        return {
+            (r.block, r.shift): r
+            for r in StationDailyTable1.objects.filter(station_user=self.user, date=self.report_date)
+        }
+
+    def test_save_upserts_and_removes_blocks(self):
+        self.client.post(self.url, {
+            "b1__day__vygr_ft": "4", "b1__night__vygr_ft": "9", "b1__terminal__name": "A",
+            "b2__day__pogr_kr": "3", "b2__terminal__name": "B",
+        })
+        rows = self._rows()
+        # tunsiz stansiya: night qatorlari yozilmaydi
+        self.assertEqual(sorted(rows), [(1, "day"), (1, "total"), (2, "day"), (2, "total")])
+        self.assertEqual(rows[(1, "total")].vygr_ft, 4)
+        self.assertEqual(rows[(2, "total")].pogr_kr, 3)
+        total_id = rows[(1, "total")].id
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {
+                "b1__day__vygr_ft": "6", "b1__terminal__name": "A", "submit_report": "1",
+            })
+        table = StationDailyTable1._meta.db_table
+        writes = [
+            q["sql"].split()[0] for q in ctx
+            if q["sql"].startswith(("INSERT", "UPDATE", "DELETE")) and f'"{table}"' in q["sql"].split(" (")[0]
+        ]
+        # bitta DELETE (2-blok), bitta upsert, submitted_at uchun bitta UPDATE
+        self.assertEqual(writes, ["DELETE", "INSERT", "UPDATE"])
+
+        rows = self._rows()
+        self.assertEqual(sorted(rows), [(1, "day"), (1, "total")])
+        self.assertEqual(rows[(1, "total")].id, total_id)
+        self.assertEqual(rows[(1, "total")].vygr_ft, 6)
+        self.assertEqual(rows[(1, "total")].data["terminal_name"], "A")
+        self.assertIsNotNone(rows[(1, "total")].submitted_at)
+        self.assertIsNone(rows[(1, "day")].submitted_at)
+
+
+class StreamingWorkbookTests(SimpleTestCase):
+    def test_cells_styles_and_merges_survive_streaming(self):
+        bold = Font(bold=True)
+        book = StreamingWorkbook()
+        ws = book.sheet("S")
+        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=3)
+        ws.cell(1, 1, "Sarlavha", font=bold)
+        ws.cell(2, 2, 5)
+        ws.cell(2, 2, font=bold)  # flush gacha stil keyin ham qo'shiladi
+        ws.row_height(2, 30)
+        ws.flush(3)
+        with self.assertRaises(ValueError):
+            ws.cell(2, 1, "kech")
+        ws.cell(3, 3, 7, font=Font(bold=True))
+        ws.flush()
+
+        # bir xil stil to'plami - bitta NamedStyle
+        self.assertEqual(len(book._style_names), 1)
+
+        out = io.BytesIO()
+        book.save(out)
+        sheet = load_workbook(out)["S"]
+        self.assertEqual([str(r) for r in sheet.merged_cells.ranges], ["A1:C1"])
+        self.assertEqual((sheet["A1"].value, sheet["B2"].value, sheet["C3"].value), ("Sarlavha", 5, 7))
+        self.assertTrue(sheet["B2"].font.bold and sheet["C3"].font.bold)
+        self.assertIsNone(sheet["A2"].value)
+        self.assertEqual(sheet.row_dimensions[2].height, 30)
+
+
+class Table1MetricColumnsTests(TestCase):
+    def test_save_syncs_typed_columns_from_data(self):
+        user = User.objects.create(username="st1")
+        row = StationDailyTable1.objects.create(
+            station_user=user, date=date(2024, 2, 10), shift="day",
+            data={"vygr_ft": "1 200", "pogr_itogo": 3, "income_daily": "x"},
+        )
+        row.refresh_from_db()
+        self.assertEqual((row.vygr_ft, row.pogr_itogo, row.income_daily), (1200, 3, 0))
+
+        # update_fields=["data"] bo'lsa ham typed ustunlar birga yoziladi
+        row.data = {"vygr_ft": 7, "income_daily": "2,500"}
+        row.save(update_fields=["data"])
+        row.refresh_from_db()
+        self.assertEqual((row.vygr_ft, row.pogr_itogo, row.income_daily), (7, 0, 2500))
+
+
+class Table1RollupTests(TestCase):
+    feb10, feb11 = date(2024, 2, 10), date(2024, 2, 11)
+
+    def setUp(self):
+        self.user = User.objects.create(username="st1")
+        StationProfile.objects.create(user=self.user, station_name="Stansiya 1", status=True)
+        self.client.force_login(self.user)
+
+    def _edit(self, d, blocks):
+        data = {}
+        for b, (vygr, income) in blocks.items():
+            data.update({
+                f"b{b}__day__vygr_ft": str(vygr), f"b{b}__night__vygr_ft": str(vygr + 1),
+                f"b{b}__day__income_daily": str(income), f"b{b}__terminal__name": f"T{b}",
+            })
+        self.client.post(reverse("station_table_1_edit", kwargs={"date_str": d.isoformat()}), data)
+
+    def _expected(self):
+        """Rollup siz: StationDailyTable1 qatorlari ustidan to'g'ridan-to'g'ri yig'indi."""
+        daily, monthly = {}, {}
+        for row in StationDailyTable1.objects.all():
+            for out, key in (
+                (daily, (row.station_user_id, row.date, row.shift)),
+                (monthly, (row.station_user_id, row.date.replace(day=1), row.shift)),
+            ):
+                sums = out.setdefault(key, {k: 0 for k in (*TABLE1_METRIC_KEYS, "rows_count")})
+                for k in TABLE1_METRIC_KEYS:
+                    sums[k] += getattr(row, k)
+                sums["rows_count"] += 1
+        return daily, monthly
+
+    def _rollups(self):
+        fields = (*TABLE1_METRIC_KEYS, "rows_count")
+        daily = {
+            (r["station_user_id"], r["date"], r["shift"]): {k: r[k] for k in fields}
+            for r in Table1DailyRollup.objects.values("station_user_id", "date", "shift", *fields)
+        }
+        monthly = {
+            (r["station_user_id"], r["month"], r["shift"]): {k: r[k] for k in fields}
+            for r in Table1MonthlyRollup.objects.values("station_user_id", "month", "shift", *fields)
+        }
+        return daily, monthly
+
+    def test_rollups_follow_edits_block_removal_delete_and_rebuild(self):
+        self._edit(self.feb10, {1: (2, 100), 2: (3, 50)})
+        self._edit(self.feb11, {1: (5, 10)})
+        self.assertEqual(self._rollups(), self._expected())
+        daily, monthly = self._rollups()
+        self.assertEqual(daily[(self.user.id, self.feb10, "day")]["vygr_ft"], 5)
+        self.assertEqual(monthly[(self.user.id, date(2024, 2, 1), "night")]["vygr_ft"], 3 + 4 + 6)
+
+        # qiymat o'zgardi va 2-blok olib tashlandi
+        self._edit(self.feb10, {1: (7, 100)})
+        self.assertEqual(self._rollups(), self._expected())
+        self.assertEqual(self._rollups()[0][(self.user.id, self.feb10, "total")]["rows_count"], 1)
+
+        self.client.post(reverse("station_table_1_delete", kwargs={"date_str": self.feb10.isoformat()}))
+        self.assertEqual(self._rollups(), self._expected())
+        self.assertNotIn((self.user.id, self.feb10, "day"), self._rollups()[0])
+
+        before = self._rollups()
+        Table1DailyRollup.objects.all().delete()
+        Table1MonthlyRollup.objects.all().delete()
+        self.assertEqual(rebuild_table1_rollups(), (len(before[0]), len(before[1])))
+        self.assertEqual(self._rollups(), before)
+
+
+class KvartalniyPlanSaveTests(TestCase):
+    month = date(2024, 2, 1)
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.client.force_login(self.admin)
+        self.stations = [
+            StationProfile.objects.create(user=User.objects.create(username=f"st{i}"), station_name=f"Stansiya {i}")
+            for i in (1, 2)
+        ]
+        self.url = reverse("kvartalniy_month_by_date", kwargs={"month_str": "2024-02"})
+        report_cache().clear()
+
+    def _post(self, **values):
+        data = {"save": "1", "station_ids": [str(st.id) for st in self.stations]}
+        for st in self.stations:
+            data[f"pogr_plan_{st.id}"] = str(values.get(st.station_name, 10))
+        data["veshoz_income_plan_group1"] = "5"
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, data)
+        tables = (KvartalniyMonthlyPlan._meta.db_table, KvartalniyGroupExtraPlan._meta.db_table)
+        return [
+            q["sql"].split()[0] for q in ctx
+            if q["sql"].startswith(("INSERT", "UPDATE", "DELETE")) and q["sql"].split('"')[1] in tables
+        ]
+
+    def test_only_changed_plans_are_written(self):
+        self.assertEqual(self._post(), ["INSERT", "INSERT"])
+        self.assertEqual(KvartalniyMonthlyPlan.objects.count(), 2)
+        self.assertEqual(KvartalniyGroupExtraPlan.objects.get(group_key="group1").income_plan, 5)
+        version = get_versions([kvartalniy_plan_version_key(self.month)])
+
+        # o'zgarishsiz qayta saqlash - hech narsa yozilmaydi, versiya ham oshmaydi
+        self.assertEqual(self._post(), [])
+        self.assertEqual(get_versions([kvartalniy_plan_version_key(self.month)]), version)
+
+        self.assertEqual(self._post(**{"Stansiya 2": 7}), ["UPDATE"])
+        plans = dict(KvartalniyMonthlyPlan.objects.values_list("station__station_name", "pogr_plan"))
+        self.assertEqual(plans, {"Stansiya 1": 10, "Stansiya 2": 7})
+
+    def test_monthly_catalogue(self):
+        for i, st in enumerate(self.stations):
+            for d in (date(2023, 12, 5), date(2024, 1, 9), date(2024, 2, 1 + i)):
+                for shift in ("day", "night", "total"):
+                    StationDailyTable1.objects.create(station_user=st.user, date=d, shift=shift, block=1)
+                table1_rows_changed(st.user_id, [d])
+        self._post()
+
+        url = reverse("kvartalniy_monthly_list_json")
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(url, {"year": "2024", "per_page": "6"}).json()
+        self.assertEqual(
+            [(r["month"], r["facts_count"], r["plans_count"], r["extras_count"]) for r in data["rows"]],
+            [("2024-02", 4, 2, 6), ("2024-01", 4, 0, 0)],
+        )
+        self.assertEqual(data["pagination"]["total"], 2)
+
+        with CaptureQueriesContext(connection) as ctx_all:
+            data = self.client.get(url).json()
+        self.assertEqual([r["month"] for r in data["rows"]], ["2024-02", "2024-01", "2023-12"])
+        self.assertEqual(len(ctx_all), len(ctx))
+
+    def test_report_gets_do_not_write(self):
+        self._post()  # 2024-02 rejasi bor, boshqa oylar yo'q
+        urls = [
+            self.url,
+            reverse("kvartalniy_month_by_date", kwargs={"month_str": "2024-05"}),
+            reverse("kvartalniy_um") + "?from_date=2023-11-15&to_date=2024-06-10",
+            reverse("kvartalniy_monthly_list_json"),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            writes = [q["sql"] for q in ctx if not q["sql"].startswith("SELECT")]
+            self.assertEqual(writes, [], url)
+        self.assertEqual(list(KvartalniyMonthly.objects.values_list("date", flat=True)), [self.month])
+
+        response = self.client.get(urls[2])
+        rows = [r for g in response.context["groups"] for r in g["rows"] if r.get("station_id")]
+        # 2024-02 rejasi 10, qolgan oylar - 0: 10 ni faqat fevral qismi beradi
+        self.assertEqual({r["station_name"]: r["pogr_plan"] for r in rows}, {"Stansiya 1": 10, "Stansiya 2": 10})
+
+    def test_range_plans_are_prorated_per_month(self):
+        st = self.stations[0]
+        for month, value in ((date(2024, 2, 1), 290), (date(2024, 3, 1), 310)):
+            monthly = KvartalniyMonthly.objects.create(date=month)
+            KvartalniyMonthlyPlan.objects.create(monthly=monthly, station=st, pogr_plan=value, vygr_plan=7)
+
+        with self.assertNumQueries(1):
+            plans, month_info, all_full = _sum_scaled_plans_between(date(2024, 2, 20), date(2024, 3, 10))
+        # fevral 10/29 kun, mart 10/31 kun: 290 -> 100 + 310 -> 100; 7 -> 2 + 2
+        self.assertEqual((plans[st.id]["pogr_plan"], plans[st.id]["vygr_plan"]), (200, 4))
+        self.assertEqual(len(month_info), 2)
+        self.assertFalse(all_full)
+
+
+    def test_last_year_facts_are_cached_until_edited(self):
+        report_cache().clear()
+        st = self.stations[0]
+        last_year = [(date(2023, 2, 1), date(2023, 2, 28))]
+        row = StationDailyTable1.objects.create(
+            station_user=st.user, date=date(2023, 2, 5), shift="day", block=1, data={"pogr_itogo": 5},
+        )
+        table1_rows_changed(st.user_id, [row.date])
+
+        self.assertEqual(aggregate_table1_closed_period(last_year)[st.id]["pogr"], 5)
+        with self.assertNumQueries(1):  # faqat versiyalar
+            self.assertEqual(aggregate_table1_closed_period(last_year)[st.id]["pogr"], 5)
+
+        row.data = {"pogr_itogo": 8}
+        row.save()
+        table1_rows_changed(st.user_id, [row.date])
+        self.assertEqual(aggregate_table1_closed_period(last_year)[st.id]["pogr"], 8)
+
+    def test_rollup_rebuild_and_backfill_invalidate_cached_facts(self):
+        report_cache().clear()
+        st = self.stations[0]
+        last_year = [(date(2023, 2, 1), date(2023, 2, 28))]
+        row = StationDailyTable1.objects.create(
+            station_user=st.user, date=date(2023, 2, 5), shift="day", block=1, data={"pogr_itogo": 5},
+        )
+        table1_rows_changed(st.user_id, [row.date])
+        self.assertEqual(aggregate_table1_closed_period(last_year)[st.id]["pogr"], 5)
+
+        # tarix to'g'ridan-to'g'ri o'zgardi (rollup ham, versiya ham yangilanmagan)
+        StationDailyTable1.objects.filter(pk=row.pk).update(data={"pogr_itogo": 8})
+        key = table1_version_key(row.date)
+        version = get_versions([key])[key]
+        call_command("backfill_table1_metrics", stdout=io.StringIO())
+        self.assertEqual(get_versions([key])[key], version + 1)
+
+        call_command("rebuild_table1_rollups", stdout=io.StringIO())
+        self.assertEqual(aggregate_table1_closed_period(last_year)[st.id]["pogr"], 8)
+
+
+    def test_last_year_intervals_match_day_by_day_mapping(self):
+        ranges = [
+            (date(2025, 1, 1), date(2025, 12, 31)),  # o'tgan yil kabisa: 2024-02-29 tushmaydi
+            (date(2024, 2, 20), date(2024, 3, 5)),  # 29-fevral -> 28-fevral
+            (date(2024, 2, 29), date(2024, 2, 29)),
+            (date(2021, 6, 1), date(2026, 3, 1)),
+        ]
+        for start, end in ranges:
+            days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+            expected = date_intervals(_same_day_last_year(d) for d in days)
+            self.assertEqual(last_year_intervals([(start, end)]), expected, (start, end))
+
+        with CaptureQueriesContext(connection) as ctx:
+            aggregate_table1_closed_period(last_year_intervals([(date(2021, 1, 1), date(2025, 12, 31))]))
+        self.assertTrue(all("BETWEEN" in q["sql"] for q in ctx))
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN formati SQLite ga xos")
+class ReportQueryPlanTests(TestCase):
+    """Hisobot sahifalari so'rovlari hisobot jadvallarini indekssiz to'liq SCAN qilmasligi kerak."""
+    report_date = date(2024, 2, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        cls.stations = []
+        for i in (1, 2, 3):
+            user = User.objects.create(username=f"st{i}")
+            StationProfile.objects.create(user=user, station_name=f"Stansiya {i}")
+            cls.stations.append(user)
+            for d in (date(2023, 2, 10), cls.report_date):
+                for shift in ("day", "night", "total"):
+                    StationDailyTable1.objects.create(
+                        station_user=user, date=d, shift=shift, block=1, data={"pogr_itogo": i},
+                        submitted_at=timezone.now() if shift == "total" else None,
+                    )
+                table1_rows_changed(user.id, [d])
+                StationDailyTable2.objects.create(station_user=user, date=d, data={})
+
+    def _query_plans(self, url, user):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        self.client.force_login(user)
+        with connection.execute_wrapper(record):
+            self.assertEqual(self.client.get(url).status_code, 200, url)
+
+        with connection.cursor() as cursor:
+            for sql, params in queries:
+                if sql.startswith("SELECT"):
+                    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                    yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def test_report_queries_do_not_scan_report_tables(self):
+        tables = {
+            model._meta.db_table
+            for model in (StationDailyTable1, StationDailyTable2, Table1DailyRollup, Table1MonthlyRollup)
+        }
+        day = self.report_date.isoformat()
+        pages = [
+            (self.admin, reverse("admin_table1_reports_json")),
+            (self.admin, reverse("admin_table1_reports_json") + "?total=approx&per_page=5"),
+            (self.admin, reverse("admin_table1_reports_json") + "?after=2024-02-10&pos=10"),
+            (self.admin, reverse("admin_table1_reports_json") + "?from_date=2024-01-01&to_date=2024-03-01"),
+            (self.admin, reverse("admin_table1_report_view", kwargs={"date_str": day})),
+            (self.admin, reverse("admin_table1_status_detail", kwargs={"date_str": day})),
+            (self.admin, reverse("admin_table2_reports_json")),
+            (self.admin, reverse("admin_table2_reports_json") + "?from_date=2024-01-01&to_date=2024-03-01"),
+            (self.admin, reverse("admin_table2_status_detail", kwargs={"date_str": day})),
+            (self.admin, reverse("admin_table2_layout", kwargs={"date_str": day})),
+            (self.admin, reverse("admin_table2_station_pick", kwargs={"date_str": day})),
+            (self.admin, reverse("kvartalniy_month_by_date", kwargs={"month_str": "2024-02"})),
+            (self.admin, reverse("kvartalniy_um") + "?from_date=2024-01-01&to_date=2024-12-31"),
+            (self.admin, reverse("kvartalniy_monthly_list_json")),
+            (self.stations[0], reverse("station_table_1_list")),
+            (self.stations[0], reverse("station_table_2_list")),
+        ]
+        for user, url in pages:
+            for sql, plan in self._query_plans(url, user):
+                for step in plan:
+                    words = step.split()
+                    # "SCAN <jadval>" - indekssiz to'liq o'qish; "SCAN ... USING (COVERING) INDEX" mumkin
+                    if words[0] == "SCAN" and words[1] in tables and "INDEX" not in step:
+                        self.fail(f"{url}: {step}\n{sql}")
+
+
+class ReportDateKeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.station = User.objects.create(username="st1")
+        StationProfile.objects.create(user=cls.station, station_name="Stansiya 1")
+        # 25 ta sana, 2024-01-02 tushib qolgan (approx jami - oraliqdagi kunlar soni)
+        cls.dates = [date(2024, 1, 1)] + [date(2024, 1, d) for d in range(3, 27)]
+        StationDailyTable1.objects.bulk_create([
+            StationDailyTable1(station_user=cls.station, date=d, shift="total", block=1, submitted_at=timezone.now())
+            for d in cls.dates
+        ])
+
+    def _json(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse("admin_table1_reports_json"), params).json()
+        return data, [q["sql"] for q in ctx]
+
+    def test_admin_json_walks_pages_by_date_cursor(self):
+        self.client.force_login(self.admin)
+        newest_first = [d.isoformat() for d in reversed(self.dates)]
+
+        data, _ = self._json(per_page=10, total="approx")
+        p = data["pagination"]
+        self.assertEqual([i["date"] for i in data["items"]], newest_first[:10])
+        self.assertEqual((p["total_items"], p["total_is_approximate"], p["num_pages"]), (26, True, 3))
+        self.assertEqual((p["has_previous"], p["next_cursor"], p["next_pos"]), (False, newest_first[9], 10))
+
+        data, queries = self._json(per_page=10, after=p["next_cursor"], pos=p["next_pos"])
+        p = data["pagination"]
+        self.assertEqual([i["date"] for i in data["items"]], newest_first[10:20])
+        self.assertEqual((p["page"], p["start_index"], p["total_items"]), (2, 11, None))
+        self.assertFalse(any("COUNT(*)" in sql or "OFFSET" in sql for sql in queries))
+
+        last, _ = self._json(per_page=10, after=p["next_cursor"], pos=p["next_pos"])
+        self.assertEqual([i["date"] for i in last["items"]], newest_first[20:])
+        self.assertFalse(last["pagination"]["has_next"])
+
+        back, _ = self._json(per_page=10, before=p["previous_cursor"], pos=p["previous_pos"])
+        self.assertEqual([i["date"] for i in back["items"]], newest_first[:10])
+        self.assertFalse(back["pagination"]["has_previous"])
+
+        # eski ?page= rejimi o'zgarmagan
+        legacy, _ = self._json(per_page=10, page=2)
+        self.assertEqual([i["date"] for i in legacy["items"]], newest_first[10:20])
+        self.assertEqual(legacy["pagination"]["total_items"], 25)
+
+    def test_station_list_uses_cursor_links(self):
+        self.client.force_login(self.station)
+        response = self.client.get(reverse("station_table_1_list"), {"per_page": 10, "after": "2024-01-12", "pos": 10})
+        page = response.context["page_obj"]
+        self.assertEqual([r["date"] for r in response.context["rows"]], self.dates[::-1][15:25])
+        self.assertEqual((page.number, page.count, page.has_next()), (2, 25, False))
+        self.assertContains(response, "?before=2024-01-11&pos=0")
+
+
+class SyntheticBenchmarkTests(TestCase):
+    end = date(2024, 2, 12)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.stats = generate_history(stations=6, years=0.05, end=cls.end, seed=3)
+
+    def test_history_looks_like_real_submissions(self):
+        self.assertEqual(self.stats.dates[-1], self.end)
+        self.assertTrue(StationDailyTable1.objects.filter(block__gt=1).exists())
+        self.assertTrue(StationDailyTable1.objects.filter(shift="night").exists())
+        self.assertEqual(Table1DailyRollup.objects.count(), self.stats.rollups[0])
+
+        data = StationDailyTable2.objects.first().data
+        for _n, _label, _code, k_total, k_ktk in TABLE2_ROWS:
+            self.assertIn(k_total, data)
+            self.assertIn(k_ktk, data)
+
+        station = StationProfile.objects.get(station_name="Chuqursoy LM")
+        self.assertEqual(KvartalniyMonthlyPlan.objects.filter(station=station).count(), self.stats.months)
+
+        clear_synthetic_data()
+        self.assertFalse(StationDailyTable1.objects.exists())
+        self.assertFalse(StationProfile.objects.exists())
+
+    def test_every_endpoint_is_measured(self):
+        results = measure_endpoints(self.end - timedelta(days=3), runs=1)
+
+        self.assertIn("excel:kvartalniy_range", results)
+        for name, result in results.items():
+            self.assertEqual(result["status"], 200, name)
+            self.assertGreater(result["queries"], 0, name)
+
+        baseline = {"scales": [{"label": "6x0.05", "endpoints": results}]}
+        slower = {
+            "scales": [{
+                "label": "6x0.05",
+                "endpoints": {
+                    **results,
+                    "kvartalniy_month": {**results["kvartalniy_month"], "queries": results["kvartalniy_month"]["queries"] + 1},
+                },
+            }],
+        }
+        regressions = [row["endpoint"] for row in compare_results(baseline, slower) if row["regression"]]
+        self.assertEqual(regressions, ["kvartalniy_month"])
+
+
+class Table2DayReportTests(TestCase):
+    report_date = date(2024, 2, 10)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        rows = (
+            ("st1", "Toshkent LM", {"r24_total": 5, "r24_ktk": 2, "r01_total": 4}),
+            ("st2", "Qo‘qon  LM", {"r24_total": "3", "r12_ktk": 1, "r01_total": 1}),
+            ("st3", "Noma'lum", {"r24_total": 7, "r01_total": 10, "r12_ktk": "x"}),
+        )
+        for username, name, data in rows:
+            user = User.objects.create(username=username)
+            StationProfile.objects.create(user=user, station_name=name)
+            StationDailyTable2.objects.create(station_user=user, date=cls.report_date, data=data)
+
+    def test_layout_graph_and_excel_share_cached_aggregation(self):
+        self.client.force_login(self.admin)
+        day = self.report_date.isoformat()
+
+        response = self.client.get(reverse("admin_table2_layout", kwargs={"date_str": day}))
+        buckets = response.context["buckets"]
+        self.assertEqual((buckets["group1"]["work_cont"], buckets["group1"]["work_kr"]), (5, 2))
+        self.assertEqual((buckets["group2"]["work_cont"], buckets["group2"]["pogr_kr"]), (3, 1))
+        self.assertEqual(buckets["other"]["work_cont"], 7)
+        self.assertEqual((buckets["road"]["work_cont"], buckets["road"]["vygr_tuk"]), (15, 15))
+        self.assertEqual(response.context["cols"][-2]["key"], "other")
+
+        # aggregatsiya cache da: graph faqat session/user/versiyalarni o'qiydi
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("admin_table2_graph", kwargs={"date_str": day}))
+        self.assertEqual([st["name"] for st in response.context["stations"]], ["Toshkent LM", "Qo‘qon  LM", "Noma'lum", "Дорога"])
+        work_row = next(row for row in response.context["grid"] if row["n"] == 24)
+        self.assertEqual(work_row["cells"][-1], {"total": 15, "ktk": 2})
+
+        # Excel da "Boshqa" yo'q: guruhsiz stansiya faqat Дорога ТУК ga kiradi
+        out = io.BytesIO()
+        table2_layout_workbook(self.report_date).save(out)
+        ws = load_workbook(out).active
+        self.assertEqual(ws.cell(7, 9).value, "Дорога")
+        self.assertEqual(ws.cell(8, 9).value, 8)  # work_cont
+        self.assertEqual(ws.cell(14, 9).value, 15)  # vygr_tuk
+
+        station = User.objects.get(username="st1")
+        self.client.force_login(station)
+        self.client.post(
+            reverse("station_table_2_edit", kwargs={"date_str": day}),
+            {"r24_total": "50", "r24_ktk": "2", "r01_total": "4"},
+        )
+        StationDailyTable2.objects.filter(station_user=station).update(submitted_at=timezone.now())
+
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse("admin_table2_layout", kwargs={"date_str": day}))
+        self.assertEqual(response.context["buckets"]["group1"]["work_cont"], 50)
+
+
+class Table2RangeReportTests(TestCase):
+    d1, d2, d3 = date(2024, 2, 10), date(2024, 2, 11), date(2024, 2, 12)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+        cls.st1 = User.objects.create(username="st1")
+        cls.st2 = User.objects.create(username="st2")
+        StationProfile.objects.create(user=cls.st1, station_name="Toshkent LM")
+        StationProfile.objects.create(user=cls.st2, station_name="Qo'qon LM")
+
+        for user, d, work in (
+            (cls.st1, cls.d1, 5),
+            (cls.st2, cls.d1, 3),
+            (cls.st1, cls.d2, 7),
+            (cls.st2, cls.d3, 4),
+        ):
+            StationDailyTable2.objects.create(station_user=user, date=d, data={"r24_total": work, "r24_ktk": 1})
+
+    def setUp(self):
+        report_cache().clear()
+
+    def test_range_series_and_incremental_day_cache(self):
+        self.client.force_login(self.admin)
+        url = reverse("admin_table2_range_json")
+        params = {"from_date": self.d1.isoformat(), "to_date": self.d3.isoformat(), "row": "24"}
+
+        data = self.client.get(url, params).json()
+        self.assertEqual(data["dates"], ["2024-02-10", "2024-02-11", "2024-02-12"])
+        series = {s["key"]: s for s in data["groups"] + data["stations"]}
+        self.assertEqual(series["group1"]["total"], [5, 7, 0])
+        self.assertEqual(series["road"]["total"], [8, 7, 4])
+        self.assertEqual(series["road"]["ktk"], [2, 1, 1])
+        self.assertEqual(series[str(self.st2.id)]["total"], [3, None, 4])
+        self.assertEqual([s["name"] for s in data["stations"]], ["Toshkent LM", "Qo'qon LM"])
+
+        # kunlik natijalar bitta kunlik hisobot bilan umumiy cache da
+        with self.assertNumQueries(1):
+            self.assertEqual(get_table2_day_report(self.d2).road_sum["r24_total"], 7)
+
+        # faqat o'zgargan kun qayta o'qiladi: versiyalar, shu kun qatorlari va indeks versiyasi
+        StationDailyTable2.objects.filter(station_user=self.st1, date=self.d2).update(data={"r24_total": 9})
+        bump_versions([table2_version_key(self.d2)])
+        with CaptureQueriesContext(connection) as ctx:
+            reports = get_table2_day_reports(self.d1, self.d3)
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertIn("BETWEEN '2024-02-11' AND '2024-02-11'", ctx.captured_queries[-1]["sql"])
+        self.assertEqual([r.road_sum["r24_total"] for r in reports], [8, 9, 4])
+
+        response = self.client.get(reverse("admin_table2_range"), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["group_rows"][1]["cells"][-1], {"total": 9, "ktk": 0})
+
+        out = io.BytesIO()
+        table2_range_workbook(self.d1, self.d3).save(out)
+        book = load_workbook(out)
+        self.assertEqual(book.sheetnames, ["Отделения", "Филиалы"])
+        ws = book["Филиалы"]
+        self.assertEqual((ws.cell(2, 5).value, ws.cell(2, 7).value), ("Toshkent LM", "Qo'qon LM"))
+        self.assertEqual([ws.cell(r, 7).value for r in (4, 5, 6)], [0, None, 0])  # П: r01 yuborilmagan
+        start = 4 + 3 * [row[0] for row in TABLE2_ROWS].index(24)
+        self.assertEqual(ws.cell(start, 1).value, 24)
+        self.assertEqual([ws.cell(r, 7).value for r in range(start, start + 3)], [3, None, 4])
+
+
+class Table2SectorRowsTests(TestCase):
+    report_date = date(2024, 2, 10)
+
+    def setUp(self):
+        self.user = User.objects.create(username="st1")
+        StationProfile.objects.create(user=self.user, station_name="Toshkent LM")
+        self.client.force_login(self.user)
+        self.view_url = reverse("station_table_2_view", kwargs={"date_str": self.report_date.isoformat()})
+
+    def test_save_stores_canonical_rows(self):
+        self.client.post(
+            reverse("station_table_2_edit", kwargs={"date_str": self.report_date.isoformat()}),
+            {
+                "kp_sector_name[]": [" ФТТ ", "", "УЛС"],
+                "kp_sector_capacity[]": ["10", "", "5"],
+                "kp_sector_fact[]": ["4", "", "x"],
+                "kp_sector_free[]": ["6", "", "5"],
+            },
+        )
+        data = StationDailyTable2.objects.get(station_user=self.user).data
+        self.assertEqual(data["kp_sector_rows"], [
+            {"name": "ФТТ", "capacity": 10, "fact": 4, "free": 6},
+            {"name": "УЛС", "capacity": 5, "fact": 0, "free": 5},
+        ])
+        self.assertEqual(
+            (data["kp_sector_capacity_total"], data["kp_sector_fact_total"], data["kp_sector_free_total"]),
+            (15, 4, 11),
+        )
+        self.assertEqual(self.client.get(self.view_url).context["sector_rows"], data["kp_sector_rows"])
+
+    def test_migration_converts_legacy_payloads(self):
+        legacy = {
+            "r24_total": 3,
+            "kp_fp_capacity": 0, "kp_fp_fact": "789", "kp_fp_free": 789,
+            "kp_uus_capacity": 978, "kp_uus_fact": 7899, "kp_uus_free": 453,
+        }
+        obj = StationDailyTable2.objects.create(station_user=self.user, date=self.report_date, data=legacy)
+        other = StationDailyTable2.objects.create(
+            station_user=self.user, date=self.report_date + timedelta(days=1),
+            data={"kp_uus_rows": [{"capacity": 2, "fact": 1, "free": 1}]},
+        )
+
+        migration = import_module("reports.migrations.0012_table2_canonical_sector_rows")
+        migration.canonicalize_sector_rows(apps, None)
+
+        obj.refresh_from_db()
+        self.assertEqual(obj.data["kp_sector_rows"], [
+            {"name": "ФТТ", "capacity": 0, "fact": 789, "free": 789},
+            {"name": "УЛС", "capacity": 978, "fact": 7899, "free": 453},
+        ])
+        self.assertEqual(obj.data["kp_sector_fact_total"], 8688)
+        self.assertEqual(obj.data["kp_fp_fact"], "789")  # eski kalitlar o'z joyida
+        other.refresh_from_db()
+        self.assertEqual(other.data["kp_sector_rows"], [{"name": "УЛС", "capacity": 2, "fact": 1, "free": 1}])
+
+        # view endi faqat saqlangan qatorlarni o'qiydi
+        self.assertEqual(self.client.get(self.view_url).context["sector_rows"], obj.data["kp_sector_rows"])
+
+
+class StationGroupIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.profiles = {}
+        for username, name in (
+            ("st1", "Toshkent LM"),
+            ("st2", "qo‘qon  lm"),
+            ("st3", "Ulug`bek LM"),
+            ("st4", "Noma'lum"),
+        ):
+            user = User.objects.create(username=username)
+            cls.profiles[username] = StationProfile.objects.create(user=user, station_name=name)
+
+    def setUp(self):
+        report_cache().delete(STATION_GROUPS_CACHE_KEY)
+
+    def test_index_matches_normalized_names_and_keeps_display_order(self):
+        with self.assertNumQueries(2):  # versiya + profillar
+            index = get_station_group_index()
+        with self.assertNumQueries(1):  # faqat versiya
+            self.assertEqual(get_station_group_index(), index)
+
+        st1, st2, st3, st4 = (self.profiles[k] for k in ("st1", "st2", "st3", "st4"))
+        self.assertEqual([g.key for g in index.groups], ["group1", "group2", "group3", "group4", "group5", "group6"])
+        self.assertEqual(index.by_profile[st1.id].sort_key, (1, 1))
+        self.assertEqual(index.by_user[st2.user_id].group_key, "group2")
+        self.assertEqual(index.by_user[st3.user_id].group_key, "group3")
+        self.assertNotIn(st4.id, index.by_profile)
+        self.assertEqual([st.id for st in index.unmatched], [st4.id])
+
+        group1 = index.groups[0]
+        self.assertEqual(group1.slots[1].station.id, st1.id)
+        self.assertIsNone(group1.slots[0].station)  # Chuqursoy LM bazada yo'q
+
+    def test_rename_and_version_bump_rebuild_index(self):
+        st4 = self.profiles["st4"]
+        get_station_group_index()
+
+        st4.station_name = "Termiz LM"
+        st4.save(update_fields=["station_name"])
+        self.assertEqual(get_station_group_index().by_profile[st4.id].group_key, "group5")
+
+        # boshqa worker dagi o'zgarish: signal yo'q, faqat versiya
+        StationProfile.objects.filter(pk=st4.pk).update(station_name="Nukus LM")
+        self.assertEqual(get_station_group_index().by_profile[st4.id].group_key, "group5")
+        bump_versions([STATIONS_VERSION_KEY])
+        self.assertEqual(get_station_group_index().by_profile[st4.id].group_key, "group6")
+
+
+class ReportResultCacheTests(TestCase):
+    feb, mar = date(2024, 2, 10), date(2024, 3, 5)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        cls.user = User.objects.create(username="st1")
+        StationProfile.objects.create(user=cls.user, station_name="Stansiya 1", status=False)
+
+    def setUp(self):
+        report_cache().clear()
+        self.station = Client()
+        self.station.force_login(self.user)
+        self.client.force_login(self.admin)
+        for d, value in ((self.feb, 4), (self.mar, 6)):
+            self._save_table1(d, value)
+
+    def _save_table1(self, d, vygr):
+        self.station.post(
+            reverse("station_table_1_edit", kwargs={"date_str": d.isoformat()}),
+            {"b1__day__vygr_itogo": str(vygr), "b1__terminal__name": "A"},
+        )
+
+    def _vygr(self, url, params=None):
+        """(Stansiya 1 vygr, hisobot jadvallari o'qildimi)"""
+        tables = (Table1DailyRollup._meta.db_table, Table1MonthlyRollup._meta.db_table)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        rows = [r for g in response.context["groups"] for r in g["rows"] if r.get("station_id")]
+        read = any(f'"{t}"' in q["sql"] for q in ctx for t in tables)
+        return {r["station_name"]: r["vygr_this_year"] for r in rows}["Stansiya 1"], read
+
+    def test_edit_and_delete_invalidate_only_affected_dates(self):
+        feb_url = reverse("kvartalniy_month_by_date", kwargs={"month_str": "2024-02"})
+        mar_url = reverse("kvartalniy_month_by_date", kwargs={"month_str": "2024-03"})
+        range_url = reverse("kvartalniy_um")
+        feb_range = {"from_date": "2024-02-01", "to_date": "2024-02-29"}
+        mar_range = {"from_date": "2024-03-01", "to_date": "2024-03-31"}
+
+        self.assertEqual(self._vygr(feb_url), (4, True))
+        self.assertEqual(self._vygr(mar_url), (6, True))
+        self.assertEqual(self._vygr(range_url, feb_range), (4, True))
+        self.assertEqual(self._vygr(range_url, mar_range), (6, True))
+        self.assertEqual(self._vygr(feb_url), (4, False))
+        self.assertEqual(self._vygr(range_url, mar_range), (6, False))
+
+        # fevral tahriri faqat fevral natijalarini yangilaydi
+        self._save_table1(self.feb, 9)
+        self.assertEqual(self._vygr(feb_url), (9, True))
+        self.assertEqual(self._vygr(range_url, feb_range), (9, True))
+        self.assertEqual(self._vygr(mar_url), (6, False))
+        self.assertEqual(self._vygr(range_url, mar_range), (6, False))
+
+        # mart o'chirilsa - aksincha
+        self.station.post(reverse("station_table_1_delete", kwargs={"date_str": self.mar.isoformat()}))
+        self.assertEqual(self._vygr(mar_url), (0, True))
+        self.assertEqual(self._vygr(range_url, mar_range), (0, True))
+        self.assertEqual(self._vygr(feb_url), (9, False))
+        self.assertEqual(self._vygr(range_url, feb_range), (9, False))
+
+    def test_table2_edit_refreshes_only_its_day(self):
+        d1, d2 = self.feb, self.feb + timedelta(days=1)
+        for d in (d1, d2):
+            self.station.post(reverse("station_table_2_edit", kwargs={"date_str": d.isoformat()}), {"r24_total": "5"})
+        self.assertEqual([r.road_sum["r24_total"] for r in get_table2_day_reports(d1, d2)], [5, 5])
+        with self.assertNumQueries(1):  # faqat versiyalar
+            get_table2_day_reports(d1, d2)
+
+        self.station.post(reverse("station_table_2_edit", kwargs={"date_str": d2.isoformat()}), {"r24_total": "8"})
+        with CaptureQueriesContext(connection) as ctx:
+            reports = get_table2_day_reports(d1, d2)
+        self.assertIn("BETWEEN '2024-02-11' AND '2024-02-11'", ctx.captured_queries[-1]["sql"])
+        self.assertEqual([r.road_sum["r24_total"] for r in reports], [5, 8])
+
+
+class ExportJobTests(TestCase):
+    report_date = date(2024, 2, 10)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(EXPORT_ROOT=tmp.name))
+
+        self.admin = User.objects.create(username="admin", is_staff=True)
+        self.station = User.objects.create(username="st1")
+        StationProfile.objects.create(user=self.station, station_name="Stansiya 1", status=False)
+        bump_versions([STATIONS_VERSION_KEY])
+        self._write_rows(vygr_ft=2)
+
+        self.client.force_login(self.admin)
+        self.url = reverse("admin_table1_report_excel_view", kwargs={"date_str": self.report_date.isoformat()})
+
+    def _write_rows(self, **data):
+        for shift in ("day", "total"):
+            StationDailyTable1.objects.update_or_create(
+                station_user=self.station,
+                date=self.report_date,
+                shift=shift,
+                block=1,
+                defaults={"data": data, "submitted_at": timezone.now()},
+            )
+        table1_rows_changed(self.station.id, [self.report_date])
+
+    def _run_worker(self):
+        call_command("run_export_worker", "--once", stdout=open("/dev/null", "w"))
+
+    def test_export_is_queued_then_served_from_artifact(self):
+        response = self.client.get(self.url)
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, reverse("export_job_page", kwargs={"job_id": job.id}))
+        self.assertEqual(job.status, ExportJob.STATUS_QUEUED)
+
+        # takroriy so'rov yangi job qo'shmaydi
+        self.client.get(self.url)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        self._run_worker()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.STATUS_DONE, job.error)
+
+        status = self.client.get(reverse("export_job_status", kwargs={"job_id": job.id})).json()
+        self.assertEqual(status["status"], "done")
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertTrue(b"".join(download.streaming_content).startswith(b"PK"))
+
+        # ma'lumot o'zgarmagan - fayl darhol beriladi
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("admin_table1_2024_02_10.xlsx", response["Content-Disposition"])
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_data_change_invalidates_artifact(self):
+        self.client.get(self.url)
+        self._run_worker()
+
+        self._write_rows(vygr_ft=5)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ExportJob.objects.filter(status=ExportJob.STATUS_QUEUED).count(), 1)
+
+    def test_legacy_export_urls_need_export_permission(self):
+        urls = [
+            self.url,
+            reverse("admin_table1_export_excel", kwargs={"date_str": "2024-02-10"}),
+            reverse("admin_table2_layout_export_excel", kwargs={"date_str": "2024-02-10"}),
+            reverse("admin_table2_range_export_excel") + "?from_date=2024-02-01&to_date=2024-02-10",
+            reverse("kvartalniy_range_export_excel") + "?from_date=2024-02-01&to_date=2024-02-10",
+        ]
+        # tayyor artifact bo'lsa ham begonaga berilmaydi
+        self.client.get(self.url)
+        self._run_worker()
+        ExportJob.objects.all().delete()
+
+        station = Client()
+        station.force_login(self.station)
+        for client in (Client(), station):
+            for url in urls:
+                response = client.get(url)
+                self.assertNotEqual(response.status_code, 200, url)
+                self.assertNotIn("Content-Disposition", response, url)
+        self.assertFalse(ExportJob.objects.exists())
+
+        # dekoratorsiz chaqirilsa ham export_or_enqueue o'zi rad etadi
+        request = RequestFactory().get("/")
+        request.user = self.station
+        self.assertEqual(export_or_enqueue(request, "table1_report", {"date": self.report_date}).status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_range_fingerprint_reads_versions_by_interval(self):
+        params = {"from_date": date(2023, 3, 1), "to_date": date(2024, 2, 29)}
+        with CaptureQueriesContext(connection) as ctx:
+            before = export_fingerprint("kvartalniy_range", params)
+        self.assertEqual(len(ctx), 1)
+        # yil oralig'i: ~730 ta kun kaliti emas, oraliqlar + stansiya/reja kalitlari
+        self.assertIn("BETWEEN", ctx[0]["sql"])
+        self.assertLess(ctx[0]["sql"].count("'table1:"), 10)
+
+        self.assertEqual(export_fingerprint("kvartalniy_range", params), before)
+        self._write_rows(vygr_ft=5)
+        self.assertNotEqual(export_fingerprint("kvartalniy_range", params), before)
+
+        with CaptureQueriesContext(connection) as ctx:
+            before = export_fingerprint("table2_range", params)
+        self.assertEqual(len(ctx), 1)
+        self.assertLess(ctx[0]["sql"].count("'table2:"), 3)
+        bump_versions([table2_version_key(date(2023, 6, 1))])
+        self.assertNotEqual(export_fingerprint("table2_range", params), before)
+
+    def test_superuser_only_kind(self):
+        response = self.client.post(reverse("export_job_create"), {
+            "kind": "kvartalniy_range", "from_date": "2024-02-01", "to_date": "2024-02-10",
+        })
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(reverse("export_job_create"), {
+            "kind": "table1_day", "date": "2024-02-10",
+        })
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status"], "queued")
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "presence": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "presence-tests"},
+    "events": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "events-tests"},
+    "reports": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "reports-tests"},
+})
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user("boss", password="x", is_staff=True)
+        self.url = reverse("notifications_stream")
+
+    def test_wsgi_falls_back_to_polling(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(self.url).status_code, 204)
+
+    async def test_reconnect_gets_missed_notification(self):
+        await self.async_client.aforce_login(self.admin)
+        stale_id = await sync_to_async(notifications.change_token)()
+
+        await sync_to_async(self.client.force_login)(self.admin)
+        response = await sync_to_async(self.client.post)(
+            reverse("notifications_send"),
+            data=json.dumps({"message": "Hisobot 18:00 gacha"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch.object(notifications, "SSE_MAX_AGE", 0):
+            response = await self.async_client.get(self.url, headers={"Last-Event-ID": stale_id})
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        self.assertIn("event: notification", body)
+        self.assertIn("Hisobot 18:00 gacha", body)
+        self.assertNotIn(f"id: {stale_id}", body)
+
+    async def test_station_stream_ignores_read_receipts(self):
+        station = await sync_to_async(User.objects.create_user)("st1", password="x")
+        await self.async_client.aforce_login(station)
+        stale_id = await sync_to_async(notifications.change_token)(notifications.stream_topics(station))
+
+        # boshqa stansiyaning ack i - faqat staff stream lari uchun o'zgarish
+        await sync_to_async(notifications.publish)(notifications.NOTIFICATION_READ_TOPIC)
+        self.assertEqual(notifications.stream_topics(self.admin), notifications.TOPICS)
+
+        with mock.patch.object(notifications, "SSE_MAX_AGE", 0), \
+                mock.patch.object(notifications, "latest_notification_payload") as payload:
+            response = await self.async_client.get(self.url, headers={"Last-Event-ID": stale_id})
+            body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+        self.assertIn("event: ready", body)
+        self.assertIn(f"id: {stale_id}", body)
+        payload.assert_not_called()
@@ -1,23 +1,28 @@
 from calendar import monthrange
 from datetime import date, datetime, timedelta
 
-from django.db import transaction
-from django.http import HttpResponse
 from django.shortcuts import redirect, render
 from django.utils import timezone
 
-from openpyxl import Workbook
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
 
-from .models import StationDailyTable1
+from .aggregates import (
+    _same_day_last_year,
+    aggregate_table1_between,
+    aggregate_table1_closed_period,
+    last_year_intervals,
+)
+from .exports import export_or_enqueue
+from .report_cache import cached_report
+from .versions import STATIONS_VERSION_KEY, get_table1_versions_between, kvartalniy_plan_version_key
+from .xlsx import StreamingWorkbook
 from accounts.models import (
     KvartalniyGroupExtraPlan,
-    KvartalniyMonthly,
     KvartalniyMonthlyPlan,
-    StationProfile,
 )
-from reports.kvartalniy import DISPLAY_GROUPS, _safe_int
+from reports.kvartalniy import STATION_PLAN_FIELDS, VESHOZ_PLAN_FIELDS, VESHOZ_ROW_NAME
+from reports.station_groups import get_station_group_index
 
 
 def _safe_date(date_str, fallback):
@@ -35,13 +40,6 @@ def _month_end(dt: date) -> date:
     return dt.replace(day=monthrange(dt.year, dt.month)[1])
 
 
-def _same_day_last_year(dt: date) -> date:
-    try:
-        return dt.replace(year=dt.year - 1)
-    except ValueError:
-        return dt.replace(year=dt.year - 1, day=28)
-
-
 def _iter_month_starts(from_date: date, to_date: date):
     cur = from_date.replace(day=1)
     last = to_date.replace(day=1)
@@ -63,79 +61,8 @@ def _build_date_range(from_date: date, to_date: date) -> list[date]:
     return days
 
 
-def _get_station_profile_from_user(user):
-    return StationProfile.objects.get(user=user)
-
-
-def _normalize_station_name(value: str) -> str:
-    if not value:
-        return ""
-    return (
-        str(value)
-        .strip()
-        .replace("’", "'")
-        .replace("‘", "'")
-        .replace("`", "'")
-        .replace("ʻ", "'")
-        .replace("ʼ", "'")
-        .replace("  ", " ")
-        .lower()
-    )
-
-
-def _payload_to_metrics(payload: dict) -> dict:
-    payload = payload or {}
-    return {
-        "pogr": _safe_int(payload.get("pogr_itogo", 0)),
-        "vygr": _safe_int(payload.get("vygr_itogo", 0)),
-        "pogr_kont": _safe_int(payload.get("pogr_itogo_kon", 0)),
-        "vygr_kont": _safe_int(payload.get("vygr_itogo_kon", 0)),
-        "income": _safe_int(payload.get("income_daily", 0)),
-    }
-
-
-def _aggregate_table1_by_station(date_list: list[date]) -> dict:
-    if not date_list:
-        return {}
-
-    qs = (
-        StationDailyTable1.objects
-        .filter(date__in=date_list)
-        .select_related("station_user")
-        .exclude(shift="total")
-    )
-
-    station_map = {}
-
-    for obj in qs:
-        try:
-            station = _get_station_profile_from_user(obj.station_user)
-        except StationProfile.DoesNotExist:
-            continue
-
-        metrics = _payload_to_metrics(obj.data or {})
-
-        if station.id not in station_map:
-            station_map[station.id] = {
-                "station": station,
-                "pogr": 0,
-                "vygr": 0,
-                "pogr_kont": 0,
-                "vygr_kont": 0,
-                "income": 0,
-            }
-
-        station_map[station.id]["pogr"] += metrics["pogr"]
-        station_map[station.id]["vygr"] += metrics["vygr"]
-        station_map[station.id]["pogr_kont"] += metrics["pogr_kont"]
-        station_map[station.id]["vygr_kont"] += metrics["vygr_kont"]
-        station_map[station.id]["income"] += metrics["income"]
-
-    return station_map
-
-
-def _sum_scaled_plans_between(from_date: date, to_date: date):
-    result = {}
+def _month_pieces(from_date: date, to_date: date):
+    """[from_date, to_date] ning har bir oyga tushgan qismi (month_info) va hammasi to'liq oymi."""
     month_info = []
     all_full_months = True
 
@@ -153,14 +80,6 @@ def _sum_scaled_plans_between(from_date: date, to_date: date):
         if not is_full_month:
             all_full_months = False
 
-        monthly_obj, _ = KvartalniyMonthly.objects.get_or_create(date=m_start)
-
-        plans = (
-            KvartalniyMonthlyPlan.objects
-            .filter(monthly=monthly_obj)
-            .select_related("station")
-        )
-
         month_info.append({
             "month": m_start,
             "piece_start": piece_start,
@@ -170,24 +89,52 @@ def _sum_scaled_plans_between(from_date: date, to_date: date):
             "is_full_month": is_full_month,
         })
 
-        for p in plans:
-            station = p.station
-
-            if station.id not in result:
-                result[station.id] = {
-                    "station": station,
-                    "pogr_plan": 0,
-                    "vygr_plan": 0,
-                    "pogr_kont_plan": 0,
-                    "vygr_kont_plan": 0,
-                    "income_plan": 0,
-                }
-
-            result[station.id]["pogr_plan"] += round((p.pogr_plan or 0) / days_in_month * selected_days)
-            result[station.id]["vygr_plan"] += round((p.vygr_plan or 0) / days_in_month * selected_days)
-            result[station.id]["pogr_kont_plan"] += round((p.pogr_kont_plan or 0) / days_in_month * selected_days)
-            result[station.id]["vygr_kont_plan"] += round((p.vygr_kont_plan or 0) / days_in_month * selected_days)
-            result[station.id]["income_plan"] += round((p.income_plan or 0) / days_in_month * selected_days)
+    return month_info, all_full_months
+
+
+def _prorate_plans(model, month_info, key, fields, **filters):
+    """
+    Oraliqdagi barcha oylar rejalarini bitta so'rovda (values_list, model obyektisiz)
+    o'qib, key (stansiya / group_key) x oy x ko'rsatkich bo'yicha prorate qiladi.
+
+    Har bir oy qiymati round(x / days_in_month * selected_days) - oyma-oy hisob bilan
+    bir xil (float amallar tartibi ham). KvartalniyMonthly yozuvi yo'q oy - reja 0.
+
+    Natija: (scaled, raw)
+      scaled - {key: [fields bo'yicha yig'indilar]}
+      raw    - {(key, oy): (fields qiymatlari)} - prorate qilinmagan
+    """
+    if not month_info:
+        return {}, {}
+
+    ratios = {info["month"]: (info["days_in_month"], info["selected_days"]) for info in month_info}
+    rows = (
+        model.objects
+        .filter(monthly__date__range=(month_info[0]["month"], month_info[-1]["month"]), **filters)
+        .order_by()
+        .values_list("monthly__date", key, *fields)
+    )
+
+    scaled, raw = {}, {}
+    width = len(fields)
+    for month, k, *values in rows:
+        days_in_month, selected_days = ratios[month]
+        acc = scaled.get(k)
+        if acc is None:
+            acc = scaled[k] = [0] * width
+        for i, value in enumerate(values):
+            acc[i] += round((value or 0) / days_in_month * selected_days)
+        raw[(k, month)] = values
+
+    return scaled, raw
+
+
+def _sum_scaled_plans_between(from_date: date, to_date: date, station_ids=None):
+    month_info, all_full_months = _month_pieces(from_date, to_date)
+
+    filters = {"station_id__in": station_ids} if station_ids is not None else {}
+    scaled, _ = _prorate_plans(KvartalniyMonthlyPlan, month_info, "station_id", STATION_PLAN_FIELDS, **filters)
+    result = {station_id: dict(zip(STATION_PLAN_FIELDS, sums)) for station_id, sums in scaled.items()}
 
     return result, month_info, all_full_months
 
@@ -294,6 +241,34 @@ def _add_to_totals(target, row):
     target["income_diff"] = target["income_this_year"] - target["income_last_year"]
 
 
+def kvartalniy_range_versions(from_date, to_date) -> dict:
+    """
+    Oraliq hisoboti o'qiydigan ma'lumot versiyalari: oraliq va o'tgan yilning shu
+    kunlaridagi Table1, oraliq oylarining rejalari va stansiyalar. Sahifa cache i va
+    eksport fingerprint i uchun.
+    """
+    from_date, to_date = sorted((from_date, to_date))
+    selected_interval = [(from_date, to_date)]
+    return get_table1_versions_between(
+        selected_interval + last_year_intervals(selected_interval),
+        keys=[
+            STATIONS_VERSION_KEY,
+            *(kvartalniy_plan_version_key(m) for m in _iter_month_starts(from_date, to_date)),
+        ],
+    )
+
+
+def _kvartalniy_range_context(from_date, to_date):
+    """_build_kvartalniy_range_context() natijasi cache dan (kalit: kvartalniy_range_versions())."""
+    from_date, to_date = sorted((from_date, to_date))
+    return cached_report(
+        "kvartalniy_range",
+        f"{from_date.isoformat()}:{to_date.isoformat()}",
+        kvartalniy_range_versions(from_date, to_date),
+        lambda: _build_kvartalniy_range_context(from_date, to_date),
+    )
+
+
 def _build_kvartalniy_range_context(from_date, to_date):
     if from_date > to_date:
         from_date, to_date = to_date, from_date
@@ -301,11 +276,9 @@ def _build_kvartalniy_range_context(from_date, to_date):
     prev_from_date = _same_day_last_year(from_date)
     prev_to_date = _same_day_last_year(to_date)
 
-    selected_dates = _build_date_range(from_date, to_date)
-    prev_selected_dates = [_same_day_last_year(d) for d in selected_dates]
-
-    current_data = _aggregate_table1_by_station(selected_dates)
-    last_year_data = _aggregate_table1_by_station(prev_selected_dates)
+    selected_interval = [(from_date, to_date)]
+    current_data = aggregate_table1_between(selected_interval)
+    last_year_data = aggregate_table1_closed_period(last_year_intervals(selected_interval))
 
     scaled_plans, month_info, all_full_months = _sum_scaled_plans_between(from_date, to_date)
 
@@ -313,136 +286,48 @@ def _build_kvartalniy_range_context(from_date, to_date):
     target_month = month_info[0]["month"] if single_full_month else None
 
     def _sum_veshoz_between():
+        scaled, raw = _prorate_plans(
+            KvartalniyGroupExtraPlan, month_info, "group_key", VESHOZ_PLAN_FIELDS, row_name=VESHOZ_ROW_NAME,
+        )
+        no_values = (0,) * len(VESHOZ_PLAN_FIELDS)
+
         result = {}
+        for group_key, sums in scaled.items():
+            row = {
+                "station_id": None,
+                "station_name": VESHOZ_ROW_NAME,
+                "is_other": False,
+                "is_veshoz": True,
+                "group_key": group_key,
+                "is_editable": bool(single_full_month),
+            }
+            row.update(zip(VESHOZ_PLAN_FIELDS, sums))
+
+            # tahrirlash uchun: bitta to'liq oy tanlanganda o'sha oyning asl qiymatlari
+            target_values = raw.get((group_key, target_month)) if single_full_month else None
+            for field, value in zip(VESHOZ_PLAN_FIELDS, target_values or no_values):
+                row[f"{field}_raw"] = value or 0
+
+            for metric in ("pogr", "vygr", "pogr_kont", "vygr_kont", "income"):
+                row[f"{metric}_diff"] = row[f"{metric}_this_year"] - row[f"{metric}_last_year"]
 
-        for info in month_info:
-            month_date = info["month"]
-            selected_days = info["selected_days"]
-            days_in_month = info["days_in_month"]
-
-            monthly_obj, _ = KvartalniyMonthly.objects.get_or_create(date=month_date)
-
-            extra_qs = KvartalniyGroupExtraPlan.objects.filter(
-                monthly=monthly_obj,
-                row_name="Boshqa Stansiya",
-            )
-
-            for extra_obj in extra_qs:
-                group_key = extra_obj.group_key
-
-                if group_key not in result:
-                    result[group_key] = {
-                        "station_id": None,
-                        "station_name": "Boshqa Stansiya",
-                        "is_other": False,
-                        "is_veshoz": True,
-                        "group_key": group_key,
-                        "is_editable": bool(single_full_month),
-
-                        "pogr_plan": 0,
-                        "vygr_plan": 0,
-                        "pogr_kont_plan": 0,
-                        "vygr_kont_plan": 0,
-
-                        "pogr_plan_raw": 0,
-                        "vygr_plan_raw": 0,
-                        "pogr_kont_plan_raw": 0,
-                        "vygr_kont_plan_raw": 0,
-
-                        "pogr_this_year": 0,
-                        "pogr_last_year": 0,
-                        "pogr_diff": 0,
-
-                        "vygr_this_year": 0,
-                        "vygr_last_year": 0,
-                        "vygr_diff": 0,
-
-                        "pogr_kont_this_year": 0,
-                        "pogr_kont_last_year": 0,
-                        "pogr_kont_diff": 0,
-
-                        "vygr_kont_this_year": 0,
-                        "vygr_kont_last_year": 0,
-                        "vygr_kont_diff": 0,
-
-                        "pogr_this_year_raw": 0,
-                        "pogr_last_year_raw": 0,
-                        "vygr_this_year_raw": 0,
-                        "vygr_last_year_raw": 0,
-                        "pogr_kont_this_year_raw": 0,
-                        "pogr_kont_last_year_raw": 0,
-                        "vygr_kont_this_year_raw": 0,
-                        "vygr_kont_last_year_raw": 0,
-
-                        "income_plan": 0,
-                        "income_this_year": 0,
-                        "income_last_year": 0,
-                        "income_diff": 0,
-
-                        "income_plan_raw": 0,
-                        "income_this_year_raw": 0,
-                        "income_last_year_raw": 0,
-                    }
-
-                if single_full_month and month_date == target_month:
-                    result[group_key]["pogr_plan_raw"] = getattr(extra_obj, "pogr_plan", 0) or 0
-                    result[group_key]["vygr_plan_raw"] = getattr(extra_obj, "vygr_plan", 0) or 0
-                    result[group_key]["pogr_kont_plan_raw"] = getattr(extra_obj, "pogr_kont_plan", 0) or 0
-                    result[group_key]["vygr_kont_plan_raw"] = getattr(extra_obj, "vygr_kont_plan", 0) or 0
-                    result[group_key]["income_plan_raw"] = getattr(extra_obj, "income_plan", 0) or 0
-
-                    result[group_key]["pogr_this_year_raw"] = getattr(extra_obj, "pogr_this_year", 0) or 0
-                    result[group_key]["pogr_last_year_raw"] = getattr(extra_obj, "pogr_last_year", 0) or 0
-                    result[group_key]["vygr_this_year_raw"] = getattr(extra_obj, "vygr_this_year", 0) or 0
-                    result[group_key]["vygr_last_year_raw"] = getattr(extra_obj, "vygr_last_year", 0) or 0
-                    result[group_key]["pogr_kont_this_year_raw"] = getattr(extra_obj, "pogr_kont_this_year", 0) or 0
-                    result[group_key]["pogr_kont_last_year_raw"] = getattr(extra_obj, "pogr_kont_last_year", 0) or 0
-                    result[group_key]["vygr_kont_this_year_raw"] = getattr(extra_obj, "vygr_kont_this_year", 0) or 0
-                    result[group_key]["vygr_kont_last_year_raw"] = getattr(extra_obj, "vygr_kont_last_year", 0) or 0
-                    result[group_key]["income_this_year_raw"] = getattr(extra_obj, "income_this_year", 0) or 0
-                    result[group_key]["income_last_year_raw"] = getattr(extra_obj, "income_last_year", 0) or 0
-
-                result[group_key]["pogr_plan"] += round((getattr(extra_obj, "pogr_plan", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_plan"] += round((getattr(extra_obj, "vygr_plan", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["pogr_kont_plan"] += round((getattr(extra_obj, "pogr_kont_plan", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_kont_plan"] += round((getattr(extra_obj, "vygr_kont_plan", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["income_plan"] += round((getattr(extra_obj, "income_plan", 0) or 0) / days_in_month * selected_days)
-
-                result[group_key]["pogr_this_year"] += round((getattr(extra_obj, "pogr_this_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["pogr_last_year"] += round((getattr(extra_obj, "pogr_last_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_this_year"] += round((getattr(extra_obj, "vygr_this_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_last_year"] += round((getattr(extra_obj, "vygr_last_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["pogr_kont_this_year"] += round((getattr(extra_obj, "pogr_kont_this_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["pogr_kont_last_year"] += round((getattr(extra_obj, "pogr_kont_last_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_kont_this_year"] += round((getattr(extra_obj, "vygr_kont_this_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["vygr_kont_last_year"] += round((getattr(extra_obj, "vygr_kont_last_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["income_this_year"] += round((getattr(extra_obj, "income_this_year", 0) or 0) / days_in_month * selected_days)
-                result[group_key]["income_last_year"] += round((getattr(extra_obj, "income_last_year", 0) or 0) / days_in_month * selected_days)
-
-                result[group_key]["pogr_diff"] = result[group_key]["pogr_this_year"] - result[group_key]["pogr_last_year"]
-                result[group_key]["vygr_diff"] = result[group_key]["vygr_this_year"] - result[group_key]["vygr_last_year"]
-                result[group_key]["pogr_kont_diff"] = result[group_key]["pogr_kont_this_year"] - result[group_key]["pogr_kont_last_year"]
-                result[group_key]["vygr_kont_diff"] = result[group_key]["vygr_kont_this_year"] - result[group_key]["vygr_kont_last_year"]
-                result[group_key]["income_diff"] = result[group_key]["income_this_year"] - result[group_key]["income_last_year"]
+            result[group_key] = row
 
         return result
 
     veshoz_data = _sum_veshoz_between()
 
-    stations_qs = StationProfile.objects.all().order_by("station_name")
-    stations_by_name = {_normalize_station_name(x.station_name): x for x in stations_qs}
+    station_index = get_station_group_index()
 
     groups = []
     grand_total = _make_zero_totals("ИТОГО")
-    known_station_names = set()
 
-    for idx, cfg in enumerate(DISPLAY_GROUPS, start=1):
+    for group in station_index.groups:
         group_rows = []
         subtotal = _make_zero_totals("ИТОГО")
 
-        for station_name in cfg["stations"]:
-            known_station_names.add(_normalize_station_name(station_name))
-            station = stations_by_name.get(_normalize_station_name(station_name))
+        for slot in group.slots:
+            station = slot.station
 
             if station:
                 row = _row_to_range_dict(
@@ -452,25 +337,25 @@ def _build_kvartalniy_range_context(from_date, to_date):
                     plan_data=scaled_plans.get(station.id),
                 )
             else:
-                row = _make_empty_range_row(station_name)
+                row = _make_empty_range_row(slot.name)
 
             row["is_other"] = False
             row["is_veshoz"] = False
-            row["group_key"] = cfg["title"]
+            row["group_key"] = group.key
             row["is_editable"] = bool(single_full_month and row.get("station_id"))
 
             group_rows.append(row)
             _add_to_totals(subtotal, row)
             _add_to_totals(grand_total, row)
 
-        if cfg.get("has_veshoz"):
-            extra_row = veshoz_data.get(cfg["title"])
+        if group.has_veshoz:
+            extra_row = veshoz_data.get(group.key)
             if not extra_row:
                 extra_row = _make_empty_range_row("Boshqa Stansiya")
                 extra_row.update({
                     "is_other": False,
                     "is_veshoz": True,
-                    "group_key": cfg["title"],
+                    "group_key": group.key,
                     "is_editable": bool(single_full_month),
                 })
             group_rows.append(extra_row)
@@ -478,8 +363,8 @@ def _build_kvartalniy_range_context(from_date, to_date):
             _add_to_totals(grand_total, extra_row)
 
         groups.append({
-            "index": idx,
-            "title": cfg["title"],
+            "index": group.index,
+            "title": group.key,
             "rows": group_rows,
             "subtotal": subtotal,
         })
@@ -487,22 +372,21 @@ def _build_kvartalniy_range_context(from_date, to_date):
     unmatched_rows = []
     unmatched_total = _make_zero_totals("ИТОГО")
 
-    for station_name, station in stations_by_name.items():
-        if station_name not in known_station_names:
-            row = _row_to_range_dict(
-                station=station,
-                fact_this=current_data.get(station.id),
-                fact_last=last_year_data.get(station.id),
-                plan_data=scaled_plans.get(station.id),
-            )
-            row["is_other"] = True
-            row["is_veshoz"] = False
-            row["group_key"] = None
-            row["is_editable"] = bool(single_full_month and row.get("station_id"))
+    for station in station_index.unmatched:
+        row = _row_to_range_dict(
+            station=station,
+            fact_this=current_data.get(station.id),
+            fact_last=last_year_data.get(station.id),
+            plan_data=scaled_plans.get(station.id),
+        )
+        row["is_other"] = True
+        row["is_veshoz"] = False
+        row["group_key"] = None
+        row["is_editable"] = bool(single_full_month and row.get("station_id"))
 
-            unmatched_rows.append(row)
-            _add_to_totals(unmatched_total, row)
-            _add_to_totals(grand_total, row)
+        unmatched_rows.append(row)
+        _add_to_totals(unmatched_total, row)
+        _add_to_totals(grand_total, row)
 
     unmatched_rows.sort(key=lambda x: x["station_name"].lower())
 
@@ -528,7 +412,6 @@ def _build_kvartalniy_range_context(from_date, to_date):
     }
 
 
-@transaction.atomic
 def kvartalniy_range(request):
     if not request.user.is_superuser:
         return redirect("station_table_1_list")
@@ -547,7 +430,7 @@ def kvartalniy_range(request):
     from_date = _safe_date(from_date_str, default_from)
     to_date = _safe_date(to_date_str, default_to)
 
-    context = _build_kvartalniy_range_context(from_date, to_date)
+    context = _kvartalniy_range_context(from_date, to_date)
     return render(request, "kvartalniy_range.html", context)
 
 
@@ -565,11 +448,14 @@ def kvartalniy_range_export_excel(request):
     from_date = _safe_date(from_date_str, default_from)
     to_date = _safe_date(to_date_str, default_to)
 
-    context = _build_kvartalniy_range_context(from_date, to_date)
+    return export_or_enqueue(request, "kvartalniy_range", {"from_date": from_date, "to_date": to_date})
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Kvartalniy Range"
+
+def kvartalniy_range_workbook(from_date, to_date) -> StreamingWorkbook:
+    context = _kvartalniy_range_context(from_date, to_date)
+
+    book = StreamingWorkbook()
+    ws = book.sheet("Kvartalniy Range")
     ws.freeze_panes = "B4"
 
     # ===== styles =====
@@ -620,12 +506,13 @@ def kvartalniy_range_export_excel(request):
         return font_bold if bold else font_normal
 
     def set_cell(row, col, value, font=None, fill=None, border=None, alignment=None):
-        c = ws.cell(row=row, column=col, value=value)
-        c.font = font or font_normal
-        c.fill = fill or PatternFill(fill_type=None)
-        c.border = border or border_thin
-        c.alignment = alignment or center
-        return c
+        return ws.cell(
+            row, col, value,
+            font=font or font_normal,
+            fill=fill or PatternFill(fill_type=None),
+            border=border or border_thin,
+            alignment=alignment or center,
+        )
 
     # ===== widths =====
     widths = {
@@ -637,11 +524,11 @@ def kvartalniy_range_export_excel(request):
         "U": 12, "V": 12, "W": 12, "X": 10,
     }
     for col_letter, width in widths.items():
-        ws.column_dimensions[col_letter].width = width
+        ws.column_width(col_letter, width)
 
-    ws.row_dimensions[1].height = 36
-    ws.row_dimensions[2].height = 22
-    ws.row_dimensions[3].height = 22
+    ws.row_height(1, 36)
+    ws.row_height(2, 22)
+    ws.row_height(3, 22)
 
     # ===== title =====
     title = (
@@ -650,34 +537,33 @@ def kvartalniy_range_export_excel(request):
         f"{from_date.strftime('%d.%m.%Y')} — {to_date.strftime('%d.%m.%Y')}  "
         f"taqqoslash: {context['prev_from_date'].strftime('%d.%m.%Y')} — {context['prev_to_date'].strftime('%d.%m.%Y')}"
     )
-    ws.merge_cells("A1:X1")
-    c = ws["A1"]
-    c.value = title
-    c.font = font_title
-    c.alignment = center
-    c.fill = fill_title
-    c.border = border_medium
+    ws.merge_cells(1, 1, 1, 24)
+    ws.cell(1, 1, title, font=font_title, alignment=center, fill=fill_title)
+
+    # medium border around title
+    for col in range(1, 25):
+        ws.cell(1, col, border=Border(
+            left=medium if col == 1 else thin,
+            right=medium if col == 24 else thin,
+            top=medium,
+            bottom=medium,
+        ))
 
     # ===== headers =====
-    ws.merge_cells("A2:A3")
+    ws.merge_cells(2, 1, 3, 1)
     set_cell(2, 1, "LM nomlari", font=font_bold, fill=fill_group_header, border=border_thin, alignment=center)
-    ws["A3"].border = border_thin
+    ws.cell(3, 1, border=border_thin)
 
     headers_merged = [
-        ("B2:F2", "Ortish vagonda (dona)"),
-        ("G2:K2", "Tushirish vagonda (dona)"),
-        ("L2:P2", "Ortish konteyner (dona)"),
-        ("Q2:T2", "Tushirish konteyner (dona)"),
-        ("U2:X2", "Daromad"),
+        (2, 6, "Ortish vagonda (dona)"),
+        (7, 11, "Tushirish vagonda (dona)"),
+        (12, 16, "Ortish konteyner (dona)"),
+        (17, 20, "Tushirish konteyner (dona)"),
+        (21, 24, "Daromad"),
     ]
-    for rng, label in headers_merged:
-        ws.merge_cells(rng)
-        cell = ws[rng.split(":")[0]]
-        cell.value = label
-        cell.font = font_bold
-        cell.alignment = center
-        cell.fill = fill_group_header
-        cell.border = border_thin
+    for c1, c2, label in headers_merged:
+        ws.merge_cells(2, c1, 2, c2)
+        ws.cell(2, c1, label, font=font_bold, alignment=center, fill=fill_group_header, border=border_thin)
 
     subheaders = [
         "Reja", "Joriy", "Oldingi", "Farq", "%",
@@ -824,6 +710,7 @@ def kvartalniy_range_export_excel(request):
             set_cell(row_num, col_idx, value, font=font, fill=fill_total, border=border_thin, alignment=align)
 
         row_num += 1
+        ws.flush(row_num)
 
     # grand total
     grand = context["grand_total"]
@@ -882,19 +769,6 @@ def kvartalniy_range_export_excel(request):
 
         set_cell(row_num, col_idx, value, font=font, fill=fill_total, border=border_thin, alignment=align)
 
-    # medium border around title
-    for col in range(1, 25):
-        ws.cell(1, col).border = Border(
-            left=medium if col == 1 else thin,
-            right=medium if col == 24 else thin,
-            top=medium,
-            bottom=medium,
-        )
+    ws.flush()
 
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    filename = f"kvartalniy_range_{from_date}_{to_date}.xlsx"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
-    return response
\ No newline at end of file
+    return book
\ No newline at end of file
@@ -1,11 +1,14 @@
 from django.urls import path
 
 from reports.excel_view import admin_table1_report_excel_view
+from reports.exports import export_job_create, export_job_download, export_job_page, export_job_status
 from reports.kvartalniy import kvartalniy
+from reports.table2_range import admin_table2_range, admin_table2_range_export_excel, admin_table2_range_json
 from reports.umumiy import kvartalniy_range, kvartalniy_range_export_excel
 from reports.user_kvartalniy import kvartalniy_station_detail
 from .views import *
 from .views import notifications_latest, notifications_ack, notifications_send
+from .notifications import notifications_stream
 from reports.kvartalniy import (
     kvartalniy,
     kvartalniy_monthly_list,
@@ -33,6 +36,9 @@ urlpatterns = [
 
     path("admin-panel/table-2/", admin_table2_reports, name="admin_table2_reports"),
     path("admin-panel/table-2/json/", admin_table2_reports_json, name="admin_table2_reports_json"),
+    path("admin-panel/table-2/range/", admin_table2_range, name="admin_table2_range"),
+    path("admin-panel/table-2/range/json/", admin_table2_range_json, name="admin_table2_range_json"),
+    path("admin-panel/table-2/range/export-excel/", admin_table2_range_export_excel, name="admin_table2_range_export_excel"),
     path("admin-panel/table-2/<str:date_str>/", admin_table2_day, name="admin_table2_day"),
     path("admin-panel/table-2/<str:date_str>/view/", admin_table2_view, name="admin_table2_view"),
     path("admin-panel/table-2/<str:date_str>/graph/", admin_table2_graph, name="admin_table2_graph"),
@@ -52,10 +58,17 @@ urlpatterns = [
         name="admin_table1_station_blocks",
     ),
 
+    # Excel eksport navbati
+    path("exports/<int:job_id>/", export_job_page, name="export_job_page"),
+    path("exports/<int:job_id>/download/", export_job_download, name="export_job_download"),
+    path("api/exports/", export_job_create, name="export_job_create"),
+    path("api/exports/<int:job_id>/", export_job_status, name="export_job_status"),
+
     # Notifications API
     path("api/notifications/latest/", notifications_latest, name="notifications_latest"),
     path("api/notifications/ack/", notifications_ack, name="notifications_ack"),
     path("api/notifications/send/", notifications_send, name="notifications_send"),
+    path("api/notifications/stream/", notifications_stream, name="notifications_stream"),
 
     
     path("kvartalniy/umumiy/", kvartalniy, name="kvartalniy_umumiy"),
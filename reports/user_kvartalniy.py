@@ -1,18 +1,15 @@
-from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
 from accounts.models import StationProfile
+from reports.aggregates import aggregate_table1_between, aggregate_table1_closed_period, last_year_intervals
 from reports.kvartalniy import _safe_date, _same_day_last_year
 from reports.umumiy import (
-    _aggregate_table1_by_station,
-    _build_date_range,
     _row_to_range_dict,
     _sum_scaled_plans_between,
 )
 
 
-@transaction.atomic
 def kvartalniy_station_detail(request):
     if request.user.is_superuser:
         return redirect("station_table_1_list")
@@ -42,12 +39,14 @@ def kvartalniy_station_detail(request):
     prev_from_date = _same_day_last_year(from_date)
     prev_to_date = _same_day_last_year(to_date)
 
-    selected_dates = _build_date_range(from_date, to_date)
-    prev_selected_dates = [_same_day_last_year(d) for d in selected_dates]
-
-    current_data = _aggregate_table1_by_station(selected_dates)
-    last_year_data = _aggregate_table1_by_station(prev_selected_dates)
-    scaled_plans, month_info, all_full_months = _sum_scaled_plans_between(from_date, to_date)
+    selected_interval = [(from_date, to_date)]
+    current_data = aggregate_table1_between(selected_interval, station_ids=[station.id])
+    last_year_data = aggregate_table1_closed_period(
+        last_year_intervals(selected_interval), station_ids=[station.id],
+    )
+    scaled_plans, month_info, all_full_months = _sum_scaled_plans_between(
+        from_date, to_date, station_ids=[station.id],
+    )
 
     row = _row_to_range_dict(
         station=station,
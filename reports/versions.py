@@ -0,0 +1,71 @@
+from datetime import date
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ReportDataVersion
+
+
+STATIONS_VERSION_KEY = "stations"
+
+# rollup rebuild kabi ko'p sanali bump lar shu o'lchamdagi IN ro'yxatlari bilan yoziladi
+BUMP_BATCH_SIZE = 500
+
+
+def table1_version_key(d: date) -> str:
+    return f"table1:{d.isoformat()}"
+
+
+def table2_version_key(d: date) -> str:
+    return f"table2:{d.isoformat()}"
+
+
+def kvartalniy_plan_version_key(month: date) -> str:
+    return f"kvartalniy_plan:{month:%Y-%m}"
+
+
+def bump_versions(keys) -> None:
+    keys = sorted(set(keys))
+    now = timezone.now()
+
+    for i in range(0, len(keys), BUMP_BATCH_SIZE):
+        batch = keys[i:i + BUMP_BATCH_SIZE]
+        ReportDataVersion.objects.bulk_create(
+            [ReportDataVersion(key=key) for key in batch],
+            ignore_conflicts=True,
+        )
+        ReportDataVersion.objects.filter(key__in=batch).update(
+            version=F("version") + 1,
+            updated_at=now,
+        )
+
+
+def get_versions(keys) -> dict:
+    """{key: version}; hali bump qilinmagan kalitlar uchun 0."""
+    keys = list(keys)
+    found = dict(ReportDataVersion.objects.filter(key__in=keys).values_list("key", "version"))
+    return {key: found.get(key, 0) for key in keys}
+
+
+def _versions_between(version_key, intervals, keys=()) -> dict:
+    keys = list(keys)
+    cond = Q(key__in=keys)
+    for start, end in intervals:
+        cond |= Q(key__range=(version_key(start), version_key(end)))
+
+    found = dict(ReportDataVersion.objects.filter(cond).values_list("key", "version"))
+    return {**{key: 0 for key in keys}, **found}
+
+
+def get_table1_versions_between(intervals, keys=()) -> dict:
+    """
+    {key: version}: keys (bump qilinmaganlari 0) va [start, end] oraliqlaridagi bump
+    qilingan table1 kalitlari. Kalit ISO sana bilan tugaydi, shuning uchun satr
+    oralig'i (BETWEEN) sana oralig'i bilan bir xil - kunma-kun kalitlar ro'yxati kerak emas.
+    """
+    return _versions_between(table1_version_key, intervals, keys)
+
+
+def get_table2_versions_between(intervals, keys=()) -> dict:
+    """get_table1_versions_between() ning table2 kalitlari uchun varianti."""
+    return _versions_between(table2_version_key, intervals, keys)
@@ -1,25 +1,34 @@
 from datetime import date as dt_date, datetime
 from functools import wraps
-import io
 import json
 
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
 from django.core.exceptions import FieldError
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.db.models import Sum, Max, Count, Q
-from django.http import HttpResponseNotAllowed, HttpResponse, JsonResponse
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from django.urls import reverse
 from django.views.decorators.http import require_GET, require_POST
 
-from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.worksheet import Worksheet
 
 from accounts.models import StationProfile
-from .models import StationDailyTable1, StationDailyTable2, KPIValue, Notification, NotificationRead
-from .forms import TABLE1_FIELDS
+from .models import TABLE1_METRIC_KEYS, StationDailyTable1, StationDailyTable2, KPIValue, Notification, NotificationRead
+from .forms import TABLE1_FIELDS, TERMINAL_NAME_KEY
+from .pagination import TOTAL_APPROX, TOTAL_EXACT, paginate_by_date, read_per_page
+from .rollups import table1_rows_changed
+from .exports import export_or_enqueue
+from .table1_report import _apply_itogo_rules, get_table1_day_report
+from .table2_report import get_table2_day_report
+from .table2_sectors import clean_sector_rows, empty_sector_rows, stored_sector_rows, with_canonical_sectors
+from .versions import STATIONS_VERSION_KEY, bump_versions, table2_version_key
+from .xlsx import StreamingWorkbook
 
 
 # =========================
@@ -54,6 +63,36 @@ def _read_int_post(request, name: str) -> int:
     return _read_int(request.POST.get(name))
 
 
+def _paginate_report_dates(request, qs_dates):
+    """
+    Admin hisobot sanalari ro'yxati (JSON) uchun sahifalash: (qatorlar, pagination dict).
+
+    ?page=N - eski Paginator rejimi (to'liq COUNT + OFFSET). Aks holda sana bo'yicha keyset
+    (reports.pagination): ?after= / ?before= / ?pos=, jami soni faqat ?total=approx|exact da.
+    """
+    per_page = read_per_page(request.GET)
+
+    if "page" not in request.GET:
+        total = request.GET.get("total")
+        page = paginate_by_date(qs_dates, request.GET, per_page, total if total in (TOTAL_APPROX, TOTAL_EXACT) else None)
+        return page.object_list, page.as_json()
+
+    paginator = Paginator(qs_dates, per_page)
+    page_obj = paginator.get_page(request.GET.get("page") or 1)
+    return page_obj.object_list, {
+        "page": page_obj.number,
+        "per_page": per_page,
+        "num_pages": paginator.num_pages,
+        "total_items": paginator.count,
+        "has_previous": page_obj.has_previous(),
+        "has_next": page_obj.has_next(),
+        "previous_page_number": page_obj.previous_page_number() if page_obj.has_previous() else None,
+        "next_page_number": page_obj.next_page_number() if page_obj.has_next() else None,
+        "start_index": page_obj.start_index() if paginator.count else 0,
+        "end_index": page_obj.end_index() if paginator.count else 0,
+    }
+
+
 def _int0(v):
     try:
         return int(v or 0)
@@ -72,9 +111,6 @@ def _dget(d: dict, key: str, default=0) -> int:
 # NEW: терминалы = блоки
 # -------------------------
 
-TERMINAL_NAME_KEY = "terminal_name"
-
-
 def _station_has_night(user) -> bool:
     pro = StationProfile.objects.get(user=user)
     return bool(pro.status) or False
@@ -186,13 +222,9 @@ def station_table_1_list(request):
         .order_by("-date")
     )
 
-    per_page = _read_int(request.GET.get("per_page")) or 10
-    if per_page not in (5, 10, 20, 50):
-        per_page = 10
-
-    paginator = Paginator(list(qs_dates), per_page)
-    page_number = request.GET.get("page") or 1
-    page_obj = paginator.get_page(page_number)
+    per_page = read_per_page(request.GET)
+    # bitta stansiya sanalari - aniq COUNT arzon (reports_t1_total_user_idx)
+    page_obj = paginate_by_date(qs_dates, request.GET, per_page, total=TOTAL_EXACT)
 
     rows = [{
         "date": r["date"],
@@ -200,14 +232,10 @@ def station_table_1_list(request):
         "submitted_at": r["last_submitted_at"],
     } for r in page_obj.object_list]
 
-    existing_dates = set(r["date"] for r in qs_dates)
-
     return render(request, "station_table_1.html", {
         "rows": rows,
         "today": dt_date.today().strftime("%Y-%m-%d"),
-        "existing_dates": existing_dates,
         "page_obj": page_obj,
-        "paginator": paginator,
         "per_page": per_page,
         "from_date": from_date_str,
         "to_date": to_date_str,
@@ -256,6 +284,7 @@ def station_table_1_view(request, date_str):
 
 
 @login_required
+@transaction.atomic
 def station_table_1_edit(request, date_str):
     if request.user.is_staff or request.user.is_superuser:
         return redirect("admin_table1_reports")
@@ -266,14 +295,6 @@ def station_table_1_edit(request, date_str):
     force_new = (request.GET.get("new") == "1")
     error = None
 
-    def get_obj(shift: str, block: int):
-        return StationDailyTable1.objects.filter(
-            station_user=request.user,
-            date=d_url,
-            shift=shift,
-            block=block,
-        ).first()
-
     blocks = _terminal_blocks_for_station_date(
         request.user,
         d_url,
@@ -295,10 +316,16 @@ def station_table_1_edit(request, date_str):
         blocks_ctx = []
         any_total = False
 
+        # sananing barcha qatorlari bitta so'rovda
+        objs = {
+            (obj.shift, obj.block): obj
+            for obj in StationDailyTable1.objects.filter(station_user=request.user, date=d_url)
+        }
+
         for b in blocks:
-            day_obj = get_obj("day", b)
-            night_obj = get_obj("night", b)
-            total_obj = get_obj("total", b)
+            day_obj = objs.get(("day", b))
+            night_obj = objs.get(("night", b))
+            total_obj = objs.get(("total", b))
 
             if total_obj is not None:
                 any_total = True
@@ -361,21 +388,21 @@ def station_table_1_edit(request, date_str):
         if not blocks_to_save:
             blocks_to_save = [1]
 
-        existing_blocks = set(
-            StationDailyTable1.objects
-            .filter(station_user=request.user, date=d_save)
-            .values_list("block", flat=True)
-            .distinct()
-        )
-
-        blocks_to_delete = existing_blocks - set(blocks_to_save)
+        # Saqlanadigan qatorlar to'liq yig'iladi, keyin bitta DELETE + bitta
+        # INSERT ... ON CONFLICT DO UPDATE bilan yoziladi (update_or_create o'rniga).
+        shifts_to_save = ("day", "night", "total") if has_night else ("day", "total")
+        rows_to_save = []
 
-        if blocks_to_delete:
-            StationDailyTable1.objects.filter(
+        def add_row(shift: str, block: int, data: dict):
+            obj = StationDailyTable1(
                 station_user=request.user,
                 date=d_save,
-                block__in=blocks_to_delete,
-            ).delete()
+                shift=shift,
+                block=block,
+                data=data,
+            )
+            obj.sync_metrics()  # bulk_create save() ni chaqirmaydi
+            rows_to_save.append(obj)
 
         for b in blocks_to_save:
             day_data = {}
@@ -484,43 +511,27 @@ def station_table_1_edit(request, date_str):
 
             total_data["income_daily"] = day_income + night_income
 
-            StationDailyTable1.objects.update_or_create(
-                station_user=request.user,
-                date=d_save,
-                shift="day",
-                block=b,
-                defaults={
-                    "data": day_data,
-                },
-            )
-
+            add_row("day", b, day_data)
             if has_night:
-                StationDailyTable1.objects.update_or_create(
-                    station_user=request.user,
-                    date=d_save,
-                    shift="night",
-                    block=b,
-                    defaults={
-                        "data": night_data,
-                    },
-                )
-            else:
-                StationDailyTable1.objects.filter(
-                    station_user=request.user,
-                    date=d_save,
-                    shift="night",
-                    block=b,
-                ).delete()
-
-            StationDailyTable1.objects.update_or_create(
-                station_user=request.user,
-                date=d_save,
-                shift="total",
-                block=b,
-                defaults={
-                    "data": total_data,
-                },
-            )
+                add_row("night", b, night_data)
+            add_row("total", b, total_data)
+
+        # olib tashlangan bloklar va (tunsiz stansiyada) night qatorlari
+        StationDailyTable1.objects.filter(
+            station_user=request.user,
+            date=d_save,
+        ).exclude(
+            block__in=blocks_to_save,
+            shift__in=shifts_to_save,
+        ).delete()
+
+        # mavjud qatorlarning id va submitted_at i o'zgarmaydi (update_or_create dagidek)
+        StationDailyTable1.objects.bulk_create(
+            rows_to_save,
+            update_conflicts=True,
+            unique_fields=["station_user", "date", "shift", "block"],
+            update_fields=["data", *TABLE1_METRIC_KEYS],
+        )
 
         if request.POST.get("submit_report") == "1":
             now = timezone.now()
@@ -531,6 +542,8 @@ def station_table_1_edit(request, date_str):
                 shift="total",
             ).update(submitted_at=now)
 
+        table1_rows_changed(request.user.id, [d_save])
+
         return redirect("station_table_1_list")
 
     return render(request, "station_table_1_create.html", {
@@ -545,6 +558,7 @@ def station_table_1_edit(request, date_str):
     })
 
 @login_required
+@transaction.atomic
 def station_table_1_delete(request, date_str):
     if request.user.is_staff or request.user.is_superuser:
         return redirect("admin_table1_reports")
@@ -554,6 +568,7 @@ def station_table_1_delete(request, date_str):
 
     d = _parse_date(date_str)
     StationDailyTable1.objects.filter(station_user=request.user, date=d).delete()
+    table1_rows_changed(request.user.id, [d])
     return redirect("station_table_1_list")
 
 
@@ -643,37 +658,7 @@ TABLE2_BOTTOM_FIELDS = {
 # =========================
 # TABLE2 KP ROW HELPERS
 # =========================
-
-def _clean_sector_rows(rows):
-    """
-    rows = [{"name":..,"capacity":..,"fact":..,"free":..}, ...]
-    keeps at least one row
-    """
-    cleaned = []
-
-    for row in (rows or []):
-        name = str((row or {}).get("name") or "").strip()
-        cap = _int0((row or {}).get("capacity"))
-        fact = _int0((row or {}).get("fact"))
-        free = _int0((row or {}).get("free"))
-
-        cleaned.append({
-            "name": name,
-            "capacity": cap,
-            "fact": fact,
-            "free": free,
-        })
-
-    if not cleaned:
-        cleaned = [{
-            "name": "",
-            "capacity": 0,
-            "fact": 0,
-            "free": 0,
-        }]
-
-    return cleaned
-
+# kanonik shakl va eski kalitlarni o'tkazish - reports/table2_sectors.py
 
 def _read_sector_rows_from_post(request):
     """
@@ -707,80 +692,8 @@ def _read_sector_rows_from_post(request):
             "free": free,
         })
 
-    return _clean_sector_rows(rows)
-
-
-def _sum_sector_rows(rows):
-    rows = _clean_sector_rows(rows)
-    return {
-        "capacity": sum(_int0(r.get("capacity")) for r in rows),
-        "fact": sum(_int0(r.get("fact")) for r in rows),
-        "free": sum(_int0(r.get("free")) for r in rows),
-    }
-
-
-def _table2_sector_rows(data: dict):
-    """
-    New format:
-      data["kp_sector_rows"] = [
-        {"name":"...", "capacity":1, "fact":2, "free":3}
-      ]
-
-    Backward compatibility:
-      old keys kp_fp_rows / kp_uus_rows
-      or old summary keys kp_fp_capacity ... kp_uus_free
-    """
-    data = data or {}
-
-    rows = data.get("kp_sector_rows")
-    if isinstance(rows, list) and rows:
-        return _clean_sector_rows(rows)
-
-    converted = []
-
-    old_fp_rows = data.get("kp_fp_rows")
-    if isinstance(old_fp_rows, list):
-        for row in old_fp_rows:
-            converted.append({
-                "name": "ФТТ",
-                "capacity": _int0((row or {}).get("capacity")),
-                "fact": _int0((row or {}).get("fact")),
-                "free": _int0((row or {}).get("free")),
-            })
-
-    old_uus_rows = data.get("kp_uus_rows")
-    if isinstance(old_uus_rows, list):
-        for row in old_uus_rows:
-            converted.append({
-                "name": "УЛС",
-                "capacity": _int0((row or {}).get("capacity")),
-                "fact": _int0((row or {}).get("fact")),
-                "free": _int0((row or {}).get("free")),
-            })
-
-    if converted:
-        return _clean_sector_rows(converted)
-
-    fp_has_any = any(_int0(data.get(k)) != 0 for k in ("kp_fp_capacity", "kp_fp_fact", "kp_fp_free"))
-    uus_has_any = any(_int0(data.get(k)) != 0 for k in ("kp_uus_capacity", "kp_uus_fact", "kp_uus_free"))
-
-    if fp_has_any or uus_has_any:
-        fallback_rows = []
-        fallback_rows.append({
-            "name": "ФТТ",
-            "capacity": _int0(data.get("kp_fp_capacity")),
-            "fact": _int0(data.get("kp_fp_fact")),
-            "free": _int0(data.get("kp_fp_free")),
-        })
-        fallback_rows.append({
-            "name": "УЛС",
-            "capacity": _int0(data.get("kp_uus_capacity")),
-            "fact": _int0(data.get("kp_uus_fact")),
-            "free": _int0(data.get("kp_uus_free")),
-        })
-        return _clean_sector_rows(fallback_rows)
+    return clean_sector_rows(rows)
 
-    return _clean_sector_rows([])
 
 
 @login_required
@@ -805,15 +718,10 @@ def station_table_2_list(request):
         except Exception:
             to_date_str = ""
 
-    qs = qs.order_by("-date")
-
-    per_page = _read_int(request.GET.get("per_page")) or 10
-    if per_page not in (5, 10, 20, 50):
-        per_page = 10
+    qs = qs.filter(date__isnull=False).only("id", "date", "submitted_at")
 
-    page_number = request.GET.get("page", 1)
-    paginator = Paginator(qs, per_page)
-    page_obj = paginator.get_page(page_number)
+    per_page = read_per_page(request.GET)
+    page_obj = paginate_by_date(qs, request.GET, per_page, total=TOTAL_EXACT)
 
     rows = [{
         "date": obj.date,
@@ -821,14 +729,10 @@ def station_table_2_list(request):
         "submitted_at": getattr(obj, "submitted_at", None),
     } for obj in page_obj.object_list]
 
-    existing_dates = set(qs.values_list("date", flat=True))
-
     return render(request, "station_table_2.html", {
         "rows": rows,
         "page_obj": page_obj,
-        "paginator": paginator,
         "today": dt_date.today().strftime("%Y-%m-%d"),
-        "existing_dates": existing_dates,
         "per_page": per_page,
         "from_date": from_date_str,
         "to_date": to_date_str,
@@ -852,7 +756,7 @@ def station_table_2_view(request, date_str):
         "rows_def": TABLE2_ROWS,
         "mode": "view",
         "bottom": TABLE2_BOTTOM_FIELDS,
-        "sector_rows": _table2_sector_rows(data),
+        "sector_rows": stored_sector_rows(data),
         "r22_keys": {
             "g_total": R22_G_TOTAL, "g_ktk": R22_G_KTK,
             "p_total": R22_P_TOTAL, "p_ktk": R22_P_KTK,
@@ -861,6 +765,7 @@ def station_table_2_view(request, date_str):
 
 
 @login_required
+@transaction.atomic
 def station_table_2_edit(request, date_str):
     if request.user.is_staff or request.user.is_superuser:
         return redirect("admin_table2_reports")
@@ -894,12 +799,7 @@ def station_table_2_edit(request, date_str):
                 "bottom": TABLE2_BOTTOM_FIELDS,
                 "is_new": True,
                 "error": error,
-                "sector_rows": [{
-                    "name": "",
-                    "capacity": 0,
-                    "fact": 0,
-                    "free": 0,
-                }],
+                "sector_rows": empty_sector_rows(),
                 "r22_keys": {
                     "g_total": R22_G_TOTAL, "g_ktk": R22_G_KTK,
                     "p_total": R22_P_TOTAL, "p_ktk": R22_P_KTK,
@@ -931,22 +831,15 @@ def station_table_2_edit(request, date_str):
 
         data[TABLE2_BOTTOM_FIELDS["cargo_name"]] = (request.POST.get(TABLE2_BOTTOM_FIELDS["cargo_name"]) or "").strip()
 
-        # NEW dynamic sector rows
-        sector_rows = _read_sector_rows_from_post(request)
-        sector_sum = _sum_sector_rows(sector_rows)
-
-        data["kp_sector_rows"] = sector_rows
-
-        # compatibility totals
-        data["kp_sector_capacity_total"] = sector_sum["capacity"]
-        data["kp_sector_fact_total"] = sector_sum["fact"]
-        data["kp_sector_free_total"] = sector_sum["free"]
+        # dinamik sektor qatorlari + yig'indilar (kanonik shakl)
+        data = with_canonical_sectors(data, _read_sector_rows_from_post(request))
 
         StationDailyTable2.objects.update_or_create(
             station_user=request.user,
             date=d_save,
             defaults={"data": data}
         )
+        bump_versions([table2_version_key(d_save)])
 
         return redirect("station_table_2_list")
 
@@ -962,7 +855,7 @@ def station_table_2_edit(request, date_str):
         "bottom": TABLE2_BOTTOM_FIELDS,
         "is_new": is_new,
         "error": error,
-        "sector_rows": _table2_sector_rows(table2_data),
+        "sector_rows": stored_sector_rows(table2_data),
         "r22_keys": {
             "g_total": R22_G_TOTAL, "g_ktk": R22_G_KTK,
             "p_total": R22_P_TOTAL, "p_ktk": R22_P_KTK,
@@ -979,7 +872,9 @@ def station_table_2_delete(request, date_str):
         return HttpResponseNotAllowed(["POST"])
 
     d = _parse_date(date_str)
-    StationDailyTable2.objects.filter(station_user=request.user, date=d).delete()
+    with transaction.atomic():
+        StationDailyTable2.objects.filter(station_user=request.user, date=d).delete()
+        bump_versions([table2_version_key(d)])
     return redirect("station_table_2_list")
 
 
@@ -991,6 +886,7 @@ def promote_station(request, pk):
     station = get_object_or_404(StationProfile, id=pk)
     station.status = not station.status
     station.save()
+    bump_versions([STATIONS_VERSION_KEY])
     return redirect("admin_stations")
 
 
@@ -1044,16 +940,10 @@ def admin_table1_reports_json(request):
         .order_by("-date")
     )
 
-    per_page = _read_int(request.GET.get("per_page")) or 10
-    if per_page not in (5, 10, 20, 50):
-        per_page = 10
-
-    paginator = Paginator(qs_dates, per_page)
-    page_number = request.GET.get("page") or 1
-    page_obj = paginator.get_page(page_number)
+    rows, pagination = _paginate_report_dates(request, qs_dates)
 
     items = []
-    for r in page_obj.object_list:
+    for r in rows:
         d = r["date"]
         submitted_count = int(r.get("submitted_count") or 0)
         last_submitted_at = r.get("last_submitted_at")
@@ -1077,18 +967,7 @@ def admin_table1_reports_json(request):
             "from_date": from_date_str,
             "to_date": to_date_str,
         },
-        "pagination": {
-            "page": page_obj.number,
-            "per_page": per_page,
-            "num_pages": paginator.num_pages,
-            "total_items": paginator.count,
-            "has_previous": page_obj.has_previous(),
-            "has_next": page_obj.has_next(),
-            "previous_page_number": page_obj.previous_page_number() if page_obj.has_previous() else None,
-            "next_page_number": page_obj.next_page_number() if page_obj.has_next() else None,
-            "start_index": page_obj.start_index() if paginator.count else 0,
-            "end_index": page_obj.end_index() if paginator.count else 0,
-        }
+        "pagination": pagination,
     })
 
 
@@ -1203,243 +1082,36 @@ def admin_table2_status_detail(request, date_str):
 
 
 
-def _apply_itogo_rules(data: dict, status=False) -> dict:
-    d = dict(data or {})
-    if status:
-        d['k_podache_so_st'] = 0
-    print(d['k_podache_so_st'])
-    blocks = [
-        ("vygr",      "ft", "cont", "kr", "pv", "proch"),
-        ("pod_vygr",  "ft", "cont", "kr", "pv", "proch"),
-        ("pogr",      "ft", "cont", "kr", "pv", "proch"),
-        ("pod_pogr",  "ft", "cont", "kr", "pv", "proch"),
-    ]
-
-    for prefix, k_ft, k_cont, k_kr, k_pv, k_proch in blocks:
-        ft = _int0(d.get(f"{prefix}_{k_ft}"))
-        kr = _int0(d.get(f"{prefix}_{k_kr}"))
-        pv = _int0(d.get(f"{prefix}_{k_pv}"))
-        proch = _int0(d.get(f"{prefix}_{k_proch}"))
-        cont = _int0(d.get(f"{prefix}_{k_cont}"))
-
-        d[f"{prefix}_itogo"] = ft + kr + pv + proch
-        d[f"{prefix}_itogo_kon"] = cont
-
-    return d
-
-
-def _table1_part_field_name():
-    try:
-        field_names = {f.name for f in StationDailyTable1._meta.get_fields()}
-    except Exception:
-        return None
-
-    candidates = [
-        "part", "table_part", "table_no", "table_num",
-        "table_index", "table_idx",
-        "block", "block_no", "group", "group_no",
-        "pack", "pack_no", "set_no", "form_no",
-    ]
-    for nm in candidates:
-        if nm in field_names:
-            return nm
-    return None
-
-
-def _sum_dicts(dicts):
-    out = {}
-    if not dicts:
-        return out
-
-    keys = set()
-    for d in dicts:
-        keys |= set((d or {}).keys())
-
-    for k in keys:
-        if k in ("k_podache_so_st", TERMINAL_NAME_KEY):
-            val = ""
-            for d in dicts:
-                v = (d or {}).get(k, "")
-                if v not in ("", None):
-                    val = v
-                    break
-            out[k] = val
-            continue
-
-        s = 0
-        for d in dicts:
-            s += _int0((d or {}).get(k))
-        out[k] = s
-
-    return out
-
-
-def _get_table1_shift_data_for_admin(user, d, shift: str):
-    part_field = _table1_part_field_name()
-    qs = StationDailyTable1.objects.filter(station_user=user, date=d, shift=shift)
-
-    if part_field:
-        objs = list(qs.order_by(part_field))
-        data_list = [(o.data or {}) for o in objs]
-        return _sum_dicts(data_list)
-
-    obj = qs.first()
-    return (obj.data or {}) if obj else {}
-
-
-def _station_display_name(user):
-    try:
-        sp = StationProfile.objects.select_related("user").get(user=user)
-    except StationProfile.DoesNotExist:
-        return getattr(user, "username", str(user))
-
-    candidates = [
-        "station_name", "name", "title", "display_name", "short_name",
-        "lc_name", "center_name", "department_name",
-    ]
-    for f in candidates:
-        v = getattr(sp, f, None)
-        if v:
-            return str(v)
-
-    for rel in ["station", "lc", "center", "department", "branch"]:
-        obj = getattr(sp, rel, None)
-        if obj:
-            for f in ["station_name", "title", "short_name"]:
-                v = getattr(obj, f, None)
-                if v:
-                    return str(v)
-            return str(obj)
-
-    return getattr(user, "profilestation", str(user.profilestation.station_name))
-
-
 @staff_required
 def admin_table1_report_view(request, date_str):
     d = _parse_date(date_str)
-
-    User = get_user_model()
-    users = (
-        User.objects
-        .exclude(is_staff=True)
-        .exclude(is_superuser=True)
-        .order_by("username")
-    )
-
-    FIELDS = [
-        "podano_lc", "k_podache_so_st",
-        "vygr_ft", "vygr_cont", "vygr_kr", "vygr_pv", "vygr_proch", "vygr_itogo", "vygr_itogo_kon",
-        "pod_vygr_ft", "pod_vygr_cont", "pod_vygr_kr", "pod_vygr_pv", "pod_vygr_proch", "pod_vygr_itogo", "pod_vygr_itogo_kon",
-        "uborka",
-        "pogr_ft", "pogr_cont", "pogr_kr", "pogr_pv", "pogr_proch", "pogr_itogo_kon",
-        "pod_pogr_ft", "pod_pogr_cont", "pod_pogr_kr", "pod_pogr_pv", "pod_pogr_proch", "pod_pogr_itogo_kon",
-        "income_daily",
-    ]
-
-    def _to_int(v):
-        if v in (None, "", "—", "-", "–"):
-            return 0
-        if isinstance(v, str):
-            v = v.replace("\xa0", "").replace(" ", "").replace(",", "")
-        try:
-            return int(float(v))
-        except Exception:
-            return 0
-
-    def _sum_into(dst: dict, src: dict):
-        for k in FIELDS:
-            dst[k] = dst.get(k, 0) + _to_int(src.get(k, 0))
+    report = get_table1_day_report(d)
 
     station_list = []
-
-    for u in users:
-        try:
-            sp = StationProfile.objects.select_related("user").get(user=u)
-        except StationProfile.DoesNotExist:
-            continue
-
-        has_night = bool(sp.status)
-
-        sent = StationDailyTable1.objects.filter(
-            station_user=u,
-            date=d,
-            submitted_at__isnull=False,
-        ).exists()
-        if not sent:
-            continue
-
-        blocks = _terminal_blocks_for_station_date(u, d, force_new=False)
-
-        terminals = []
-        for b in blocks:
-            day_obj = StationDailyTable1.objects.filter(station_user=u, date=d, shift="day", block=b).first()
-            night_obj = StationDailyTable1.objects.filter(station_user=u, date=d, shift="night", block=b).first()
-
-            day_raw = (day_obj.data or {}) if day_obj else {}
-            night_raw = (night_obj.data or {}) if (night_obj and has_night) else {}
-            night_data = _apply_itogo_rules(night_raw, status=True) if has_night else {}
-   
-            day_data = _apply_itogo_rules(day_raw )
-            
-
-            total_data = {}
-            if has_night:
-                total_data = {k: 0 for k in FIELDS}
-                _sum_into(total_data, day_data)
-                _sum_into(total_data, night_data)
-                total_data = _apply_itogo_rules(total_data)
-
-            term_name = (
-                (day_raw or {}).get(TERMINAL_NAME_KEY)
-                or (night_raw or {}).get(TERMINAL_NAME_KEY)
-                or ""
-            )
-
-            terminals.append({
-                "block": b,
-                "terminal_name": term_name,
-                "day_data": day_data,
-                "night_data": night_data,
-                "total_data": total_data,
-            })
-
-        sum_total = {k: 0 for k in FIELDS}
-        for t in terminals:
-            _sum_into(sum_total, t["day_data"])
-            if has_night:
-                _sum_into(sum_total, t["night_data"])
-        sum_total = _apply_itogo_rules(sum_total)
-
+    for st in report.submitted_stations:
         blocks_url = ""
-        if has_night:
+        if st.status:
             blocks_url = reverse(
                 "admin_table1_station_blocks",
-                kwargs={"date_str": d.strftime("%Y-%m-%d"), "user_id": u.id},
+                kwargs={"date_str": d.strftime("%Y-%m-%d"), "user_id": st.user_id},
             )
-
         station_list.append({
-            "name": _station_display_name(u),
-            "login": getattr(u, "username", ""),
-            "user_id": u.id,
-            "status": has_night,
+            "name": st.name,
+            "login": st.login,
+            "user_id": st.user_id,
+            "status": st.status,
             "blocks_url": blocks_url,
-            "terminals": terminals,
-            "sum_total": sum_total,
+            "terminals": st.terminals,
+            "sum_total": st.sum_total,
         })
 
     station_list.sort(key=lambda x: (x["name"] or "").lower())
-    grand_total = {k: 0 for k in FIELDS}
-
-    for st in station_list:
-        _sum_into(grand_total, st.get("sum_total") or {})
-
-    grand_total = _apply_itogo_rules(grand_total)
 
     return render(request, "admin_table1_report_view.html", {
         "date": d,
         "stations": station_list,
         "fields": TABLE1_FIELDS,
-        "grand_total": grand_total,
+        "grand_total": report.grand_total,
     })
 
 
@@ -1516,16 +1188,10 @@ def admin_table2_reports_json(request):
         .order_by("-date")
     )
 
-    per_page = _read_int(request.GET.get("per_page")) or 10
-    if per_page not in (5, 10, 20, 50):
-        per_page = 10
-
-    paginator = Paginator(qs_dates, per_page)
-    page_number = request.GET.get("page") or 1
-    page_obj = paginator.get_page(page_number)
+    rows, pagination = _paginate_report_dates(request, qs_dates)
 
     items = []
-    for r in page_obj.object_list:
+    for r in rows:
         d = r["date"]
         submitted_count = int(r.get("submitted_count") or 0)
         last_submitted_at = r.get("last_submitted_at")
@@ -1549,18 +1215,7 @@ def admin_table2_reports_json(request):
             "from_date": from_date_str,
             "to_date": to_date_str,
         },
-        "pagination": {
-            "page": page_obj.number,
-            "per_page": per_page,
-            "num_pages": paginator.num_pages,
-            "total_items": paginator.count,
-            "has_previous": page_obj.has_previous(),
-            "has_next": page_obj.has_next(),
-            "previous_page_number": page_obj.previous_page_number() if page_obj.has_previous() else None,
-            "next_page_number": page_obj.next_page_number() if page_obj.has_next() else None,
-            "start_index": page_obj.start_index() if paginator.count else 0,
-            "end_index": page_obj.end_index() if paginator.count else 0,
-        }
+        "pagination": pagination,
     })
 
 
@@ -1641,20 +1296,12 @@ def admin_table2_view(request, date_str):
 @staff_required
 def admin_table2_graph(request, date_str):
     d = _parse_date(date_str)
+    report = get_table2_day_report(d)
 
-    objs = (
-        StationDailyTable2.objects
-        .filter(date=d, submitted_at__isnull=False)
-        .select_related("station_user")
-        .exclude(station_user__is_staff=True)
-        .exclude(station_user__is_superuser=True)
-        .order_by("station_user__username")
-    )
+    if any(st.profile_name is None for st in report.stations):
+        raise Http404("No StationProfile matches the given query.")
 
-    stations = [{
-        "name":get_object_or_404(StationProfile, user__username= _station_name(o.station_user)).station_name,
-        "data": o.data or {},
-    } for o in objs]
+    stations = [{"name": st.profile_name, "data": st.data} for st in report.stations]
 
     if not stations:
         return render(request, "admin_table2_graph.html", {
@@ -1663,26 +1310,15 @@ def admin_table2_graph(request, date_str):
             "grid": [],
         })
 
-    all_keys = []
-    for _n, _label, _code, k_total, k_ktk in TABLE2_ROWS:
-        all_keys.append(k_total)
-        all_keys.append(k_ktk)
-
-    road_data = {k: 0 for k in all_keys}
-    for st in stations:
-        data = st["data"]
-        for k in all_keys:
-            road_data[k] += _dget(data, k, 0)
-
-    stations_plus = stations + [{"name": "Дорога", "data": road_data}]
+    stations_plus = stations + [{"name": "Дорога", "data": report.road_sum}]
 
     grid = []
     for n, label, code, k_total, k_ktk in TABLE2_ROWS:
         row = {"n": n, "label": label, "code": code, "cells": []}
         for st in stations_plus:
             row["cells"].append({
-                "total": _dget(st["data"], k_total, 0),
-                "ktk": _dget(st["data"], k_ktk, 0),
+                "total": st["data"][k_total],
+                "ktk": st["data"][k_ktk],
             })
         grid.append(row)
 
@@ -1694,270 +1330,62 @@ def admin_table2_graph(request, date_str):
 
 
 
-# =========================
-# ADMIN: TABLE 2 LAYOUT GROUPS
-# =========================
-
-DISPLAY_GROUPS = [
-    {
-        "title": "1",
-        "stations": [
-            "Chuqursoy LM",
-            "Toshkent LM",
-            "Sergeli LM",
-            "Jaloir LM",
-            "Ohangaron LM",
-            "Nazarbek LM",
-            "Urtavul LM",
-            "Sirdaryo LM",
-            "Jizzax LM",
-            "Ablik LM",
-            "To'ytepa",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "2",
-        "stations": [
-            "Qo'qon LM",
-            "Rovuston LM",
-            "Marg'ilon LM",
-            "Axtachi LM",
-            "Asaka LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "3",
-        "stations": [
-            "Buxoro LM",
-            "Tinchlik LM",
-            "Karmana LM",
-            "Yangi-Zarafshon LM",
-            "Ulug'bek LM",
-            "Marokand LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "4",
-        "stations": [
-            "Qarshi LM",
-            "Dehqonobod LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "5",
-        "stations": [
-            "Termiz LM",
-        ],
-        "has_veshoz": True,
-    },
-    {
-        "title": "6",
-        "stations": [
-            "Nukus LM",
-            "Kirkkiz LM",
-            "Urganch LM",
-            "Pitnyak LM",
-        ],
-        "has_veshoz": True,
-    },
-]
+# maket ustunlari: (bucket nomi, Table2 qatori) -> {nom}_cont = rNN_total, {nom}_kr = rNN_ktk
+TABLE2_LAYOUT_PAIRS = (
+    ("work", "r24"),
+    ("pogr", "r12"),
+    ("vygr", "r23"),
+    ("site", "r25"),
+    ("to_export", "r29"),
+    ("ready", "r28"),
+    ("empty", "r30"),
+    ("sort", "r27"),
+)
 
 
-def _normalize_station_name(value):
+def _table2_layout_bucket(sums: dict, tuk_sums: dict | None = None) -> dict:
     """
-    Station nomlarini solishtirish uchun normal holatga keltiradi.
-    Masalan: Qo'qon / Qo‘qon, bo'sh joylar, katta-kichik harflar farq qilmaydi.
+    Table2DayReport yig'indisidan maket bucket i.
+    vygr_tuk - kelgan umumiy (r01_total); tuk_sums berilsa shundan olinadi.
     """
-    s = str(value or "").strip().lower()
-
-    replacements = {
-        "‘": "'",
-        "’": "'",
-        "`": "'",
-        "ʼ": "'",
-        "ʻ": "'",
-        "ё": "е",
-        "–": "-",
-        "—": "-",
-    }
-
-    for old, new in replacements.items():
-        s = s.replace(old, new)
-
-    s = " ".join(s.split())
-    return s
-
-
-def _find_display_group_for_station(station_name):
-    """
-    Station nomi qaysi DISPLAY_GROUPS ichida bo'lsa, shu group qaytadi.
-    Topilmasa None qaytadi.
-    """
-    station_norm = _normalize_station_name(station_name)
-
-    for idx, group in enumerate(DISPLAY_GROUPS, start=1):
-        for st_name in group.get("stations", []):
-            if _normalize_station_name(st_name) == station_norm:
-                return {
-                    "key": f"group{idx}",
-                    "title": group.get("title") or f"group{idx}",
-                    "has_veshoz": bool(group.get("has_veshoz", False)),
-                }
-
-    return None
+    bucket = {}
+    for name, row in TABLE2_LAYOUT_PAIRS:
+        bucket[f"{name}_cont"] = sums[f"{row}_total"]
+        bucket[f"{name}_kr"] = sums[f"{row}_ktk"]
+    bucket["vygr_tuk"] = (tuk_sums if tuk_sums is not None else sums)["r01_total"]
+    return bucket
 
 
 @staff_required
 def admin_table2_layout(request, date_str):
     d = _parse_date(date_str)
-
-    objs = (
-        StationDailyTable2.objects
-        .filter(date=d, submitted_at__isnull=False)
-        .select_related("station_user")
-        .exclude(station_user__is_staff=True)
-        .exclude(station_user__is_superuser=True)
-        .order_by("station_user__username")
-    )
-
-    def empty_bucket():
-        return {
-            "work_cont": 0, "work_kr": 0,
-            "pogr_cont": 0, "pogr_kr": 0,
-            "vygr_cont": 0, "vygr_kr": 0,
-            "vygr_tuk": 0,
-            "site_cont": 0, "site_kr": 0,
-            "to_export_cont": 0, "to_export_kr": 0,
-            "ready_cont": 0, "ready_kr": 0,
-            "empty_cont": 0, "empty_kr": 0,
-            "sort_cont": 0, "sort_kr": 0,
-        }
-
-    KEY = {
-        "arr_total": "r01_total",
-
-        "work_total": "r24_total",
-        "work_ktk": "r24_ktk",
-
-        "pogr_total": "r12_total",
-        "pogr_ktk": "r12_ktk",
-
-        "vygr_total": "r23_total",
-        "vygr_ktk": "r23_ktk",
-
-        "site_total": "r25_total",
-        "site_ktk": "r25_ktk",
-
-        "to_export_total": "r29_total",
-        "to_export_ktk": "r29_ktk",
-
-        "ready_total": "r28_total",
-        "ready_ktk": "r28_ktk",
-
-        "empty_total": "r30_total",
-        "empty_ktk": "r30_ktk",
-
-        "sort_total": "r27_total",
-        "sort_ktk": "r27_ktk",
-    }
-
-    def add_pair(bucket, data, total_key, ktk_key, out_total, out_ktk):
-        bucket[out_total] += _dget(data, total_key, 0)
-        bucket[out_ktk] += _dget(data, ktk_key, 0)
+    report = get_table2_day_report(d)
 
     # Oldin station bo‘yicha edi.
     # Endi faqat 6 ta group bo‘yicha chiqadi.
     cols = []
     buckets = {}
 
-    for idx, group in enumerate(DISPLAY_GROUPS, start=1):
-        group_key = f"group{idx}"
-        group_title = group.get("title") or group_key
-
+    for idx, group_key in enumerate(report.group_sums, start=1):
         cols.append({
             "key": group_key,
-            "title": group_title,
+            "title": str(idx),
         })
+        buckets[group_key] = _table2_layout_bucket(report.group_sums[group_key])
 
-        buckets[group_key] = empty_bucket()
-
-    # Agar station DISPLAY_GROUPS ichida topilmasa,
+    # Agar station hech bir guruhda topilmasa (station_groups),
     # xatolik bo‘lmasin deb alohida bucketga yig‘amiz.
-    other_key = "other"
-    other_has_data = False
-    buckets[other_key] = empty_bucket()
-
-    for o in objs:
-        u = o.station_user
-
-        try:
-            station_profile = StationProfile.objects.get(user=u)
-            station_name = station_profile.station_name or getattr(u, "username", "")
-        except StationProfile.DoesNotExist:
-            station_name = getattr(u, "username", "")
-
-        group_info = _find_display_group_for_station(station_name)
-
-        if group_info:
-            bucket_key = group_info["key"]
-        else:
-            bucket_key = other_key
-            other_has_data = True
-
-        data = o.data or {}
-        b = buckets[bucket_key]
-
-        add_pair(b, data, KEY["work_total"], KEY["work_ktk"], "work_cont", "work_kr")
-        add_pair(b, data, KEY["pogr_total"], KEY["pogr_ktk"], "pogr_cont", "pogr_kr")
-        add_pair(b, data, KEY["vygr_total"], KEY["vygr_ktk"], "vygr_cont", "vygr_kr")
-        add_pair(b, data, KEY["site_total"], KEY["site_ktk"], "site_cont", "site_kr")
-        add_pair(b, data, KEY["to_export_total"], KEY["to_export_ktk"], "to_export_cont", "to_export_kr")
-        add_pair(b, data, KEY["ready_total"], KEY["ready_ktk"], "ready_cont", "ready_kr")
-        add_pair(b, data, KEY["empty_total"], KEY["empty_ktk"], "empty_cont", "empty_kr")
-        add_pair(b, data, KEY["sort_total"], KEY["sort_ktk"], "sort_cont", "sort_kr")
-
-        # TUK tushirish / kelgan umumiy qiymat.
-        # Oldingi kodda bu alohida for orqali Дорога ga qo‘shilgan edi.
-        # Endi har bir groupga ham qo‘shamiz.
-        b["vygr_tuk"] += _dget(data, KEY["arr_total"], 0)
-
-    if other_has_data:
+    if report.has_other:
         cols.append({
-            "key": other_key,
+            "key": "other",
             "title": "Boshqa",
         })
-    else:
-        buckets.pop(other_key, None)
+        buckets["other"] = _table2_layout_bucket(report.other_sum)
 
     # Umumiy Дорога
-    road_key = "road"
-    buckets[road_key] = empty_bucket()
-
-    road_sum_keys = (
-        "work_cont", "work_kr",
-        "pogr_cont", "pogr_kr",
-        "vygr_cont", "vygr_kr",
-        "vygr_tuk",
-        "site_cont", "site_kr",
-        "to_export_cont", "to_export_kr",
-        "ready_cont", "ready_kr",
-        "empty_cont", "empty_kr",
-        "sort_cont", "sort_kr",
-    )
-
-    for c in cols:
-        b = buckets.get(c["key"]) or {}
-        road = buckets[road_key]
-
-        for k in road_sum_keys:
-            road[k] += int(b.get(k, 0) or 0)
-
+    buckets["road"] = _table2_layout_bucket(report.road_sum)
     cols.append({
-        "key": road_key,
+        "key": "road",
         "title": "Дорога",
     })
 
@@ -1970,138 +1398,31 @@ def admin_table2_layout(request, date_str):
 
 @staff_required
 def admin_table2_layout_export_excel(request, date_str):
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-    from openpyxl.utils import get_column_letter
-    from django.http import HttpResponse
-
-    d = _parse_date(date_str)
-
-    objs = (
-        StationDailyTable2.objects
-        .filter(date=d, submitted_at__isnull=False)
-        .select_related("station_user")
-        .exclude(station_user__is_staff=True)
-        .exclude(station_user__is_superuser=True)
-        .order_by("station_user__username")
-    )
-
-    def empty_bucket():
-        return {
-            "work_cont": 0, "work_kr": 0,
-            "pogr_cont": 0, "pogr_kr": 0,
-            "vygr_cont": 0, "vygr_kr": 0,
-            "vygr_tuk": 0,
-            "site_cont": 0, "site_kr": 0,
-            "to_export_cont": 0, "to_export_kr": 0,
-            "ready_cont": 0, "ready_kr": 0,
-            "empty_cont": 0, "empty_kr": 0,
-            "sort_cont": 0, "sort_kr": 0,
-        }
-
-    KEY = {
-        "arr_total": "r01_total",
-
-        "work_total": "r24_total",
-        "work_ktk": "r24_ktk",
+    return export_or_enqueue(request, "table2_layout", {"date": _parse_date(date_str)})
 
-        "pogr_total": "r12_total",
-        "pogr_ktk": "r12_ktk",
 
-        "vygr_total": "r23_total",
-        "vygr_ktk": "r23_ktk",
-
-        "site_total": "r25_total",
-        "site_ktk": "r25_ktk",
-
-        "to_export_total": "r29_total",
-        "to_export_ktk": "r29_ktk",
-
-        "ready_total": "r28_total",
-        "ready_ktk": "r28_ktk",
-
-        "empty_total": "r30_total",
-        "empty_ktk": "r30_ktk",
-
-        "sort_total": "r27_total",
-        "sort_ktk": "r27_ktk",
-    }
-
-    def add_pair(bucket, data, total_key, ktk_key, out_total, out_ktk):
-        bucket[out_total] += _dget(data, total_key, 0)
-        bucket[out_ktk] += _dget(data, ktk_key, 0)
+def table2_layout_workbook(d) -> StreamingWorkbook:
+    report = get_table2_day_report(d)
 
     cols = []
     buckets = {}
 
-    for idx, group in enumerate(DISPLAY_GROUPS, start=1):
-        group_key = f"group{idx}"
+    for idx, group_key in enumerate(report.group_sums, start=1):
         cols.append({
             "key": group_key,
             "title": str(idx),
         })
-        buckets[group_key] = empty_bucket()
-
-    road_tuk_total = 0
-
-    for o in objs:
-        u = o.station_user
-
-        try:
-            station_profile = StationProfile.objects.get(user=u)
-            station_name = station_profile.station_name or getattr(u, "username", "")
-        except StationProfile.DoesNotExist:
-            station_name = getattr(u, "username", "")
-
-        group_info = _find_display_group_for_station(station_name)
-        data = o.data or {}
-
-        road_tuk_total += _dget(data, KEY["arr_total"], 0)
-
-        if not group_info:
-            continue
-
-        bucket_key = group_info["key"]
-        b = buckets[bucket_key]
-
-        add_pair(b, data, KEY["work_total"], KEY["work_ktk"], "work_cont", "work_kr")
-        add_pair(b, data, KEY["pogr_total"], KEY["pogr_ktk"], "pogr_cont", "pogr_kr")
-        add_pair(b, data, KEY["vygr_total"], KEY["vygr_ktk"], "vygr_cont", "vygr_kr")
-        add_pair(b, data, KEY["site_total"], KEY["site_ktk"], "site_cont", "site_kr")
-        add_pair(b, data, KEY["to_export_total"], KEY["to_export_ktk"], "to_export_cont", "to_export_kr")
-        add_pair(b, data, KEY["ready_total"], KEY["ready_ktk"], "ready_cont", "ready_kr")
-        add_pair(b, data, KEY["empty_total"], KEY["empty_ktk"], "empty_cont", "empty_kr")
-        add_pair(b, data, KEY["sort_total"], KEY["sort_ktk"], "sort_cont", "sort_kr")
-
-    road_key = "road"
-    buckets[road_key] = empty_bucket()
-
-    road_sum_keys = (
-        "work_cont", "work_kr",
-        "pogr_cont", "pogr_kr",
-        "vygr_cont", "vygr_kr",
-        "site_cont", "site_kr",
-        "to_export_cont", "to_export_kr",
-        "ready_cont", "ready_kr",
-        "empty_cont", "empty_kr",
-        "sort_cont", "sort_kr",
-    )
-
-    for c in cols:
-        b = buckets.get(c["key"]) or {}
-        for k in road_sum_keys:
-            buckets[road_key][k] += int(b.get(k, 0) or 0)
-
-    buckets[road_key]["vygr_tuk"] = road_tuk_total
+        buckets[group_key] = _table2_layout_bucket(report.group_sums[group_key])
 
+    # Excel da "Boshqa" ustuni yo'q: guruhsiz stansiyalar faqat Дорога dagi ТУК ga kiradi
+    buckets["road"] = _table2_layout_bucket(report.groups_total, tuk_sums=report.road_sum)
     cols.append({
-        "key": road_key,
+        "key": "road",
         "title": "Дорога",
     })
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Макет"
+    book = StreamingWorkbook()
+    ws = book.sheet("Макет")
 
     thin = Side(style="thin", color="000000")
     medium = Side(style="medium", color="000000")
@@ -2110,7 +1431,6 @@ def admin_table2_layout_export_excel(request, date_str):
     border_medium = Border(left=medium, right=medium, top=medium, bottom=medium)
 
     center = Alignment(horizontal="center", vertical="center", wrap_text=True)
-    left = Alignment(horizontal="left", vertical="center", wrap_text=True)
 
     font_title = Font(name="Times New Roman", size=14, bold=True)
     font_header = Font(name="Times New Roman", size=12, bold=True)
@@ -2123,49 +1443,44 @@ def admin_table2_layout_export_excel(request, date_str):
 
     last_col = 2 + len(cols)
 
+    ws.column_width("A", 22)
+    ws.column_width("B", 10)
+    for col in range(3, last_col + 1):
+        ws.column_width(get_column_letter(col), 11)
+
+    ws.freeze_panes = "C8"
+    ws.ws.sheet_properties.pageSetUpPr.fitToPage = True
+
     ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=last_col)
-    c = ws.cell(row=1, column=1)
-    c.value = "Работа с контейнерами\n(по оперативным данным)"
-    c.font = font_title
-    c.alignment = center
+    ws.cell(1, 1, "Работа с контейнерами\n(по оперативным данным)", font=font_title, alignment=center)
+    ws.row_height(1, 36)
 
     ws.merge_cells(start_row=4, start_column=1, end_row=4, end_column=last_col)
-    c = ws.cell(row=4, column=1)
-    c.value = "Код дороги"
-    c.font = font_header
-    c.alignment = center
-    c.border = border_medium
+    ws.cell(4, 1, "Код дороги", font=font_header)
 
     ws.merge_cells(start_row=5, start_column=1, end_row=5, end_column=last_col)
-    c = ws.cell(row=5, column=1)
-    c.value = f"Дата {d.strftime('%d.%m.%Y')} г."
-    c.font = font_header
-    c.alignment = center
-    c.border = border_medium
+    ws.cell(5, 1, f"Дата {d.strftime('%d.%m.%Y')} г.", font=font_header)
 
     ws.merge_cells(start_row=6, start_column=1, end_row=6, end_column=last_col)
-    c = ws.cell(row=6, column=1)
-    c.value = "Отделения"
-    c.font = font_header
-    c.alignment = center
-    c.border = border_medium
+    ws.cell(6, 1, "Отделения", font=font_header)
 
     header_row = 7
 
     ws.merge_cells(start_row=header_row, start_column=1, end_row=header_row, end_column=2)
-    c = ws.cell(row=header_row, column=1)
-    c.value = "Показатели"
-    c.font = font_header
-    c.alignment = center
-    c.border = border
+    ws.cell(header_row, 1, "Показатели")
 
     for idx, col in enumerate(cols, start=3):
-        cell = ws.cell(row=header_row, column=idx)
-        cell.value = col["title"]
-        cell.font = font_header
-        cell.alignment = center
-        cell.border = border
-        cell.fill = fill_header
+        ws.cell(header_row, idx, col["title"], fill=fill_header)
+
+    # 4-7 qatorlar: ingichka ramka, sarlavha qatori - qalin
+    for row in range(4, header_row + 1):
+        for col in range(1, last_col + 1):
+            ws.cell(row, col, border=border, alignment=center)
+        ws.row_height(row, 24)
+    for col in range(1, last_col + 1):
+        ws.cell(header_row, col, font=font_header, border=border_medium)
+
+    ws.flush(header_row + 1)
 
     rows = [
         {
@@ -2246,82 +1561,41 @@ def admin_table2_layout_export_excel(request, date_str):
         if len(items) > 1:
             ws.merge_cells(start_row=start_r, start_column=1, end_row=end_r, end_column=1)
 
-        label_cell = ws.cell(row=start_r, column=1)
-        label_cell.value = label
-        label_cell.font = font_body_bold
-        label_cell.alignment = center
-        label_cell.border = border
-        label_cell.fill = fill_body
+        ws.cell(start_r, 1, label, font=font_body_bold, fill=fill_body)
 
         for item_label, key in items:
-            item_cell = ws.cell(row=r, column=2)
-            item_cell.value = item_label
-            item_cell.font = font_body_bold
-            item_cell.alignment = center
-            item_cell.border = border
-            item_cell.fill = fill_body
+            ws.cell(r, 2, item_label, font=font_body_bold, fill=fill_body)
 
             for col_idx, col in enumerate(cols, start=3):
-                cell = ws.cell(row=r, column=col_idx)
-
                 if is_tuk and col["key"] != "road":
-                    cell.value = ""
+                    value = ""
                 else:
-                    cell.value = int((buckets.get(col["key"]) or {}).get(key, 0) or 0)
+                    value = int((buckets.get(col["key"]) or {}).get(key, 0) or 0)
 
-                cell.font = font_road if col["key"] == "road" else font_body
-                cell.alignment = center
-                cell.border = border
-                cell.fill = fill_body
+                ws.cell(
+                    r, col_idx, value,
+                    font=font_road if col["key"] == "road" else font_body,
+                    fill=fill_body,
+                )
 
+            for col in range(1, last_col + 1):
+                ws.cell(r, col, border=border, alignment=center)
+            ws.row_height(r, 24)
             r += 1
 
-        for rr in range(start_r, end_r + 1):
-            ws.cell(row=rr, column=1).border = border
-
-    for row in ws.iter_rows(min_row=4, max_row=r - 1, min_col=1, max_col=last_col):
-        for cell in row:
-            cell.border = border
-            cell.alignment = center
-
-    for col in range(1, last_col + 1):
-        ws.cell(row=header_row, column=col).font = font_header
-        ws.cell(row=header_row, column=col).border = border_medium
+        ws.flush(r)
 
-    for row in range(4, r):
-        ws.row_dimensions[row].height = 24
+    setup = ws.ws.page_setup
+    setup.orientation = "landscape"
+    setup.paperSize = Worksheet.PAPERSIZE_A4
+    setup.fitToWidth = 1
+    setup.fitToHeight = 1
+    ws.ws.page_margins.left = 0.25
+    ws.ws.page_margins.right = 0.25
+    ws.ws.page_margins.top = 0.35
+    ws.ws.page_margins.bottom = 0.35
 
-    ws.row_dimensions[1].height = 36
-    ws.row_dimensions[6].height = 24
-    ws.row_dimensions[7].height = 24
-
-    ws.column_dimensions["A"].width = 22
-    ws.column_dimensions["B"].width = 10
-
-    for col in range(3, last_col + 1):
-        ws.column_dimensions[get_column_letter(col)].width = 11
-
-    ws.page_setup.orientation = "landscape"
-    ws.page_setup.paperSize = ws.PAPERSIZE_A4
-    ws.page_setup.fitToWidth = 1
-    ws.page_setup.fitToHeight = 1
-    ws.sheet_properties.pageSetUpPr.fitToPage = True
-    ws.page_margins.left = 0.25
-    ws.page_margins.right = 0.25
-    ws.page_margins.top = 0.35
-    ws.page_margins.bottom = 0.35
-
-    ws.freeze_panes = "C8"
-
-    filename = f"maket_table2_{d.strftime('%Y_%m_%d')}.xlsx"
-
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-
-    wb.save(response)
-    return response
+    return book
 
 @login_required(login_url='login')
 def admin_table2_station_pick(request, date_str):
@@ -2368,7 +1642,7 @@ def admin_table2_station_view(request, date_str, user_id: int):
         "rows_def": TABLE2_ROWS,
         "mode": "view",
         "bottom": TABLE2_BOTTOM_FIELDS,
-        "sector_rows": _table2_sector_rows(data),
+        "sector_rows": stored_sector_rows(data),
         "r22_keys": {
             "g_total": R22_G_TOTAL, "g_ktk": R22_G_KTK,
             "p_total": R22_P_TOTAL, "p_ktk": R22_P_KTK,
@@ -2395,60 +1669,26 @@ def _get_all_stations():
 
 @staff_required
 def admin_table1_export_excel(request, date_str):
-    d = _parse_date(date_str)
+    return export_or_enqueue(request, "table1_day", {"date": _parse_date(date_str)})
 
-    User = get_user_model()
-    users = (
-        User.objects
-        .exclude(is_staff=True)
-        .exclude(is_superuser=True)
-        .order_by("username")
-    )
-
-    station_list = []
-    for u in users:
-        try:
-            sp = StationProfile.objects.get(user=u)
-        except StationProfile.DoesNotExist:
-            continue
-
-        sent = StationDailyTable1.objects.filter(
-            station_user=u,
-            date=d,
-            shift="total",
-            submitted_at__isnull=False,
-        ).exists()
-        if not sent:
-            continue
 
-        has_night = bool(sp.status)
+def table1_export_workbook(d) -> StreamingWorkbook:
+    report = get_table1_day_report(d)
 
-        day_data_raw = _get_table1_shift_data_for_admin(u, d, "day")
-        night_data_raw = _get_table1_shift_data_for_admin(u, d, "night") if has_night else {}
-        total_data_raw = _get_table1_shift_data_for_admin(u, d, "total")
-
-        day_data = _apply_itogo_rules(day_data_raw or {},  status=True)
-        night_data = _apply_itogo_rules(night_data_raw or {})
-        total_data = _apply_itogo_rules(total_data_raw or {})
-
-        day_income = _int0(day_data.get("income_daily"))
-        night_income = _int0(night_data.get("income_daily")) if has_night else 0
-        total_data["income_daily"] = day_income + night_income
-
-        station_list.append({
-            "name": u.username,
-            "day": day_data,
-            "night": night_data,
-            "total": total_data,
-            "status": has_night,
-        })
-
-    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-    from openpyxl.cell.cell import MergedCell
+    # kunduzgi qatorda "к подаче со ст" yozilmaydi (0) - sahifadagi kun/tun/jami bilan bir xil
+    station_list = [
+        {
+            "name": st.login,
+            "day": _apply_itogo_rules(st.day_sum, status=True),
+            "night": st.night_sum,
+            "total": st.total_sum,
+            "status": st.status,
+        }
+        for st in report.submitted_stations
+    ]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Table1 {d.strftime('%d.%m.%Y')}"
+    book = StreamingWorkbook()
+    ws = book.sheet(f"Table1 {d.strftime('%d.%m.%Y')}")
 
     thin = Side(style="thin", color="99A3B3")
     border = Border(left=thin, right=thin, top=thin, bottom=thin)
@@ -2462,17 +1702,9 @@ def admin_table1_export_excel(request, date_str):
     vtxt = Alignment(horizontal="center", vertical="center", text_rotation=90, wrap_text=True)
 
     def set_cell(r, c, value=None, *, font=None, fill=None, align=None, b=border):
-        cell = ws.cell(row=r, column=c)
         if value is not None:
-            cell.value = value
-        cell.border = b
-        if font:
-            cell.font = font
-        if fill:
-            cell.fill = fill
-        if align:
-            cell.alignment = align
-        return cell
+            return ws.cell(r, c, value, border=b, font=font, fill=fill, alignment=align)
+        return ws.cell(r, c, border=b, font=font, fill=fill, alignment=align)
 
     def F(hex6):
         return PatternFill("solid", fgColor=("FF" + hex6.upper()))
@@ -2530,6 +1762,13 @@ def admin_table1_export_excel(request, date_str):
     col_shift = 2
     last_col = 2 + len(COLS)
 
+    ws.freeze_panes = "C4"
+
+    ws.column_width("A", 22)
+    ws.column_width("B", 10)
+    for cc in range(3, last_col + 1):
+        ws.column_width(get_column_letter(cc), 10)
+
     r = 1
     ws.merge_cells(start_row=r, start_column=1, end_row=r, end_column=last_col)
     set_cell(
@@ -2539,12 +1778,12 @@ def admin_table1_export_excel(request, date_str):
         fill=fill_title,
         align=center,
     )
-    ws.row_dimensions[r].height = 24
+    ws.row_height(r, 24)
 
     r1 = 2
     r2 = 3
-    ws.row_dimensions[r1].height = 34
-    ws.row_dimensions[r2].height = 110
+    ws.row_height(r1, 34)
+    ws.row_height(r2, 110)
 
     ws.merge_cells(start_row=r1, start_column=col_name, end_row=r2, end_column=col_name)
     ws.merge_cells(start_row=r1, start_column=col_shift, end_row=r2, end_column=col_shift)
@@ -2575,6 +1814,9 @@ def admin_table1_export_excel(request, date_str):
     set_cell(r1, 32, "sutkalik daromad", font=hdr_font, fill=fill_gray_hdr, align=vtxt)
 
     for excel_col, (key, lbl) in enumerate(COLS[2:], start=5):
+        if excel_col in (19, 32):
+            # r1:r2 birlashtirilgan, sarlavha yuqorida yozilgan
+            continue
         if 5 <= excel_col <= 11:
             fill = fill_green_hdr
         elif 12 <= excel_col <= 18:
@@ -2587,12 +1829,7 @@ def admin_table1_export_excel(request, date_str):
             fill = None
         set_cell(r2, excel_col, lbl, font=hdr_font, fill=fill, align=vtxt)
 
-    ws.freeze_panes = "C4"
-
-    ws.column_dimensions["A"].width = 22
-    ws.column_dimensions["B"].width = 10
-    for cc in range(3, last_col + 1):
-        ws.column_dimensions[get_column_letter(cc)].width = 10
+    ws.flush(r2 + 1)
 
     row_idx = 4
 
@@ -2645,61 +1882,42 @@ def admin_table1_export_excel(request, date_str):
 
         write_shift_row(row_idx, "jami", st["total"], is_total=True)
         row_idx += 1
+        ws.flush(row_idx)
 
-    ws.page_setup.orientation = ws.ORIENTATION_LANDSCAPE
-    ws.page_setup.fitToWidth = 1
-    ws.page_setup.fitToHeight = 0
-
-    buff = io.BytesIO()
-    wb.save(buff)
-    buff.seek(0)
+    ws.ws.page_setup.orientation = Worksheet.ORIENTATION_LANDSCAPE
+    ws.ws.page_setup.fitToWidth = 1
+    ws.ws.page_setup.fitToHeight = 0
 
-    filename = f"table1_like_site_{d.strftime('%Y-%m-%d')}.xlsx"
-    resp = HttpResponse(
-        buff.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    resp["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return resp
+    return book
 
 
 @staff_required
 def admin_table1_station_blocks(request, date_str, user_id: int):
     d = _parse_date(date_str)
 
-    User = get_user_model()
-    u = get_object_or_404(User, id=user_id)
-
-    sp = get_object_or_404(StationProfile, user=u)
-    has_night = bool(sp.status)
+    st = get_table1_day_report(d).station(user_id)
+    if st is None:
+        raise Http404("StationProfile not found")
+    has_night = st.status
 
-    blocks = _terminal_blocks_for_station_date(u, d, force_new=False)
-
-    def get_obj(shift: str, block: int):
-        return StationDailyTable1.objects.filter(
-            station_user=u, date=d, shift=shift, block=block
-        ).first()
-
-    blocks_ctx = []
-    for b in blocks:
-        blocks_ctx.append({
-            "b": b,
-            "day_obj": get_obj("day", b),
-            "night_obj": get_obj("night", b),
-            "total_obj": get_obj("total", b),
-        })
-
-    day_sum = _apply_itogo_rules(_get_table1_shift_data_for_admin(u, d, "day") or {})
-    night_sum = _apply_itogo_rules(_get_table1_shift_data_for_admin(u, d, "night") or {}) if has_night else {}
-    total_sum = _apply_itogo_rules(_get_table1_shift_data_for_admin(u, d, "total") or {}) if has_night else {}
+    blocks_ctx = [
+        {
+            "b": t.block,
+            "day_obj": t.day_row,
+            "night_obj": t.night_row,
+            "total_obj": t.total_row,
+        }
+        for t in st.terminals
+    ]
 
-    if has_night:
-        total_sum["income_daily"] = _int0(day_sum.get("income_daily")) + _int0(night_sum.get("income_daily"))
+    day_sum = st.day_sum
+    night_sum = st.night_sum
+    total_sum = st.total_sum if has_night else {}
 
     return render(request, "admin_table1_station_blocks.html", {
         "date": d,
-        "station_name": u.username,
-        "user_id": u.id,
+        "station_name": st.login,
+        "user_id": st.user_id,
         "fields": TABLE1_FIELDS,
         "blocks_ctx": blocks_ctx,
         "sum_day": day_sum,
@@ -2716,102 +1934,23 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib.auth.decorators import login_required
-from django.db.models import Exists, OuterRef
-from django.templatetags.static import static
 
 from .models import Notification, NotificationRead
-
-
-
-def _safe_user_name(user):
-    full_name = f"{getattr(user, 'first_name', '')} {getattr(user, 'last_name', '')}".strip()
-    if full_name:
-        return full_name
-    username = getattr(user, "username", "") or ""
-    if username:
-        return username
-    return f"User {user.id}"
-
-
-def _safe_avatar_url(notification):
-    try:
-        if notification.avatar and hasattr(notification.avatar, "url"):
-            return notification.avatar.url
-    except Exception:
-        pass
-
-    try:
-        creator = notification.created_by
-        if creator:
-            profile = getattr(creator, "profile", None)
-            if profile and getattr(profile, "photo", None) and hasattr(profile.photo, "url"):
-                return profile.photo.url
-    except Exception:
-        pass
-
-    return static("images/admin-bot.png")
+from .notifications import (
+    NOTIFICATION_READ_TOPIC,
+    NOTIFICATION_TOPIC,
+    _safe_avatar_url,
+    _safe_user_name,
+    latest_notification_payload,
+    publish,
+)
 
 
 @require_GET
 @login_required
 def notifications_latest(request):
-
-    """
-    User/admin uchun oxirgi aktiv habarnoma.
-    Admin uchun:
-      - xabar
-      - kimlar o'qiganini live ko'rsatish
-    User uchun:
-      - xabar
-      - unread holat
-    """
-    latest_qs = Notification.objects.filter(is_active=True)
-
-
-    read_subq = NotificationRead.objects.filter(
-        user=request.user,
-        notification=OuterRef("pk")
-    )
-
-    notif = latest_qs.annotate(
-        user_has_read=Exists(read_subq)
-    ).order_by("-created_at").select_related("created_by").first()
-
-    if not notif:
-        return JsonResponse({"ok": True, "notification": None, "unread": False})
-
-    unread = not bool(getattr(notif, "user_has_read", False))
-
-    read_events = []
-    if request.user.is_staff or request.user.is_superuser:
-        latest_reads = (
-            NotificationRead.objects
-            .filter(notification=notif)
-            .select_related("user")
-            .order_by("-read_at")[:20]
-        )
-
-        read_events = [
-            {
-                "user_id": r.user_id,
-                "user_name": _safe_user_name(r.user),
-                "read_at": timezone.localtime(r.read_at).strftime("%d.%m.%Y %H:%M:%S"),
-            }
-            for r in latest_reads
-        ]
-
-    return JsonResponse({
-        "ok": True,
-        "notification": {
-            "id": notif.id,
-            "message": notif.message,
-            "created_at": timezone.localtime(notif.created_at).strftime("%d.%m.%Y %H:%M:%S"),
-            "created_by_name": _safe_user_name(notif.created_by) if notif.created_by else "Admin",
-            "avatar_url": _safe_avatar_url(notif),
-        },
-        "unread": unread,
-        "read_events": read_events,
-    })
+    """Polling fallback: SSE (notifications_stream) ishlamaganda base.js shu yerni so'raydi."""
+    return JsonResponse(latest_notification_payload(request.user))
 
 
 @require_POST
@@ -2834,6 +1973,8 @@ def notifications_ack(request):
         user=request.user,
         notification=notif
     )
+    if created:
+        publish(NOTIFICATION_READ_TOPIC)
 
     return JsonResponse({
         "ok": True,
@@ -2865,6 +2006,7 @@ def notifications_send(request):
         created_by=request.user,
         is_active=True,
     )
+    publish(NOTIFICATION_TOPIC)
 
     return JsonResponse({
         "ok": True,
@@ -0,0 +1,135 @@
+"""
+Excel eksportlar uchun openpyxl write-only (streaming) workbook.
+
+Write-only rejimda qatorlar faqat ketma-ket, bir marta yoziladi. StreamingSheet
+qatorlarni flush() gacha kichik bufferda ushlab turadi - shu oraliqda kataklarni
+istalgan tartibda to'ldirish va stilini o'zgartirish mumkin (merge, ramka va h.k.),
+flush() dan keyin esa qator diskka ketadi va xotiradan chiqadi.
+
+Stillar katak-katak nusxalanmaydi: har bir noyob (font, fill, border, alignment,
+number_format) to'plami workbook da bitta NamedStyle bo'lib ro'yxatdan o'tadi.
+"""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.worksheet.cell_range import CellRange
+
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+STYLE_PARTS = ("font", "fill", "border", "alignment", "number_format")
+
+# berilmagan qismlar oddiy katakdagidek bo'lsin (NamedStyle ning o'z default lari bo'sh)
+STYLE_DEFAULTS = {
+    "font": DEFAULT_FONT,
+    "fill": DEFAULT_EMPTY_FILL,
+    "border": DEFAULT_BORDER,
+    "alignment": Alignment(),
+    "number_format": "General",
+}
+
+_UNSET = object()
+
+
+class StreamingWorkbook:
+    def __init__(self, style_prefix: str = "necro"):
+        self.wb = Workbook(write_only=True)
+        self.style_prefix = style_prefix
+        self._style_names = {}
+
+    def sheet(self, title: str) -> "StreamingSheet":
+        return StreamingSheet(self, self.wb.create_sheet(title))
+
+    def style_name(self, parts: dict):
+        key = tuple(parts.get(p) for p in STYLE_PARTS)
+        if all(v is None for v in key):
+            return None
+
+        name = self._style_names.get(key)
+        if name is None:
+            name = f"{self.style_prefix}_{len(self._style_names) + 1}"
+            style = NamedStyle(name=name)
+            for part, value in zip(STYLE_PARTS, key):
+                setattr(style, part, STYLE_DEFAULTS[part] if value is None else value)
+            self.wb.add_named_style(style)
+            self._style_names[key] = name
+        return name
+
+    def save(self, path):
+        """Qatorlar flush() qilingan bo'lishi kerak; write-only workbook faqat bir marta saqlanadi."""
+        self.wb.save(path)
+
+
+class StreamingSheet:
+    """
+    ws.cell()/ws.merge_cells() ga o'xshash interfeys. Ustun kengliklari, freeze_panes va
+    page_setup birinchi flush() dan oldin, qator balandligi shu qator flush() bo'lguncha
+    berilishi kerak.
+    """
+
+    def __init__(self, book: StreamingWorkbook, ws):
+        self.book = book
+        self.ws = ws
+        self._rows = {}
+        self._next_row = 1
+
+    def _check_row(self, row: int):
+        if row < self._next_row:
+            raise ValueError(f"Row {row} is already flushed")
+
+    def cell(self, row: int, column: int, value=_UNSET, **parts) -> dict:
+        """
+        Katakni yozadi/yangilaydi. None berilgan stil qismlari o'zgarmaydi.
+        Natija - katakning bufferdagi dict i: {"value": ..., "font": ..., ...}.
+        """
+        self._check_row(row)
+        c = self._rows.setdefault(row, {}).setdefault(column, {"value": None})
+        if value is not _UNSET:
+            c["value"] = value
+        for part, v in parts.items():
+            if part not in STYLE_PARTS:
+                raise TypeError(f"Unknown style part: {part}")
+            if v is not None:
+                c[part] = v
+        return c
+
+    @property
+    def freeze_panes(self):
+        return self.ws.freeze_panes
+
+    @freeze_panes.setter
+    def freeze_panes(self, ref):
+        self.ws.freeze_panes = ref
+
+    def merge_cells(self, start_row: int, start_column: int, end_row: int, end_column: int):
+        self.ws.merged_cells.add(CellRange(
+            min_row=start_row, min_col=start_column, max_row=end_row, max_col=end_column,
+        ))
+
+    def row_height(self, row: int, height):
+        self._check_row(row)
+        self.ws.row_dimensions[row].height = height
+
+    def column_width(self, column_letter: str, width):
+        self.ws.column_dimensions[column_letter].width = width
+
+    def flush(self, before_row: int | None = None):
+        """before_row dan oldingi barcha qatorlarni yozadi (None - hammasini)."""
+        if before_row is None:
+            before_row = max(self._rows, default=self._next_row - 1) + 1
+
+        for r in range(self._next_row, before_row):
+            cells = self._rows.pop(r, {})
+            values = [None] * max(cells, default=0)
+            for col, c in cells.items():
+                out = WriteOnlyCell(self.ws, c["value"])
+                name = self.book.style_name(c)
+                if name:
+                    out.style = name
+                values[col - 1] = out
+            self.ws.append(values)
+
+        self._next_row = max(self._next_row, before_row)
@@ -1,6 +1,18 @@
 pkill gunicorn
+pkill -f run_export_worker
+pkill -f flush_presence
+pkill -f "uvicorn bunker.asgi"
 
 
 gunicorn --workers 3 --bind unix:/home/necro/gunicorn.sock bunker.wsgi:application --daemon
 
+# SSE (habarnoma/presence push) - ASGI. nginx: location /api/notifications/stream/ -> asgi.sock, proxy_buffering off
+nohup uvicorn bunker.asgi:application --uds /home/necro/asgi.sock --workers 1 >> /home/necro/asgi.log 2>&1 &
+
+# Excel eksport navbati (reports.exports) - gunicorn dan alohida jarayon
+nohup python manage.py run_export_worker >> /home/necro/export_worker.log 2>&1 &
+
+# heartbeat presence -> StationProfile.last_seen (accounts.presence)
+nohup python manage.py flush_presence --loop >> /home/necro/flush_presence.log 2>&1 &
+
 systemctl restart nginx.service
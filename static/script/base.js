@@ -179,13 +179,15 @@
    - New message: glow + dot + sound
    - Unread persists until user opens/acks
    - Backend APIs:
-       GET  /api/notifications/latest/
+       GET  /api/notifications/stream/   (SSE: notification, presence)
+       GET  /api/notifications/latest/   (polling fallback)
        POST /api/notifications/ack/
        POST /api/notifications/send/   (admin only)
    ============================================================ */
 (function () {
   "use strict";
 
+  const API_STREAM = "/api/notifications/stream/";
   const API_LATEST = "/api/notifications/latest/";
   const API_ACK = "/api/notifications/ack/";
   const API_SEND = "/api/notifications/send/";
@@ -679,7 +681,10 @@
   async function tick() {
     const data = await fetchLatest();
     if (!data) return;
+    await applyLatest(data);
+  }
 
+  async function applyLatest(data) {
     const n = data.notification;
 
     if (!n) {
@@ -904,6 +909,41 @@
     }
 
     refreshBellVisual();
-    setInterval(tick, POLL_MS);
+    startStream();
   })();
+
+  let pollTimer = null;
+
+  function startPolling() {
+    if (!pollTimer) pollTimer = setInterval(tick, POLL_MS);
+  }
+
+  // SSE: server faqat o'zgarish bo'lganda yuboradi. Stream ishlamasa (WSGI -> 204,
+  // ulanib bo'lmadi) EventSource CLOSED bo'ladi -> eski polling.
+  function startStream() {
+    if (!window.EventSource) {
+      startPolling();
+      return;
+    }
+
+    const es = new EventSource(API_STREAM);
+
+    es.addEventListener("notification", async (e) => {
+      try {
+        const data = JSON.parse(e.data);
+        if (data && data.ok) await applyLatest(data);
+      } catch (_) {}
+    });
+
+    // admin sahifalari online ro'yxatini yangilashi uchun
+    es.addEventListener("presence", (e) => {
+      try {
+        window.dispatchEvent(new CustomEvent("necro:presence", { detail: JSON.parse(e.data) }));
+      } catch (_) {}
+    });
+
+    es.onerror = () => {
+      if (es.readyState === EventSource.CLOSED) startPolling();
+    };
+  }
 })();